@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import time
+import uuid
+from routers.match_summary import build_match_summary_prompt
+from utils.app_context import app_context
+from utils.concurrency import run_blocking, TokenBucket, LLM_CONCURRENCY, LLM_RATE_PER_MINUTE
+from utils.llm import generate_text
+from utils.match_info import build_match_info
+
+
+class SeasonSummaryJob:
+    '''
+    Job que gera e armazena os resumos de todas as partidas de uma competição/temporada.
+    Partidas que já têm resumo armazenado são puladas, então o job pode ser retomado.
+    As chamadas passam pelo gateway do LLM, limitado a LLM_RATE_PER_MINUTE para toda
+    a aplicação; rate_per_minute só reduz a taxa deste job abaixo desse limite.
+    '''
+
+    def __init__(self, competition_id: int, season_id: int,
+                 concurrency: int = LLM_CONCURRENCY, rate_per_minute: float = LLM_RATE_PER_MINUTE,
+                 on_progress=None):
+        self.job_id = uuid.uuid4().hex
+        self.competition_id = competition_id
+        self.season_id = season_id
+        self.concurrency = concurrency
+        # Na taxa do gateway ou acima dela, o limite do próprio gateway já basta
+        self.limiter = (TokenBucket(rate_per_minute, capacity=concurrency)
+                        if rate_per_minute < LLM_RATE_PER_MINUTE else None)
+        self.on_progress = on_progress
+        self.status = 'pending'
+        self.total = 0
+        self.skipped = 0
+        self.completed = 0
+        self.failed = {}
+        self.error = None
+        self.timings = {}
+        self.started_at = None
+        self.finished_at = None
+
+    async def run(self) -> dict:
+        '''
+        Função que executa o job: lista as partidas, carrega eventos e escalações
+        em paralelo no pool de dados e gera os resumos respeitando o limite de
+        concorrência e de taxa do LLM
+        Returns:
+            dict: Progresso final do job
+        '''
+        self.status = 'running'
+        self.started_at = time.time()
+        try:
+            matches = await run_blocking(app_context.sb.matches,
+                                         competition_id=self.competition_id,
+                                         season_id=self.season_id, fmt='dict')
+            stored = await run_blocking(app_context.summary_store.stored_ids,
+                                        self.competition_id, self.season_id)
+            pending = [match for match_id, match in matches.items() if match_id not in stored]
+            self.total = len(matches)
+            self.skipped = self.total - len(pending)
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(*(self._summarize(match, semaphore) for match in pending))
+            self.status = 'finished'
+        except Exception as e:
+            self.status = 'failed'
+            self.error = str(e)
+            raise
+        finally:
+            self.finished_at = time.time()
+        return self.progress()
+
+    async def _summarize(self, match: dict, semaphore: asyncio.Semaphore) -> None:
+        match_id = match['match_id']
+        try:
+            start = time.perf_counter()
+            prompt = await run_blocking(build_match_summary_prompt, match_id,
+                                        str(build_match_info(match)))
+            data_seconds = time.perf_counter() - start
+
+            async with semaphore:
+                if self.limiter is not None:
+                    await self.limiter.acquire()
+                start = time.perf_counter()
+                summary = await generate_text(prompt)
+                llm_seconds = time.perf_counter() - start
+
+            await run_blocking(app_context.summary_store.set, match_id, summary,
+                               self.competition_id, self.season_id, data_seconds, llm_seconds)
+            self.completed += 1
+            self.timings[match_id] = {'data_seconds': round(data_seconds, 3),
+                                      'llm_seconds': round(llm_seconds, 3)}
+        except Exception as e:
+            self.failed[match_id] = str(e)
+
+        if self.on_progress is not None:
+            self.on_progress(self, match_id)
+
+    def progress(self) -> dict:
+        '''Retorna o progresso do job e os tempos de cada partida'''
+        return {
+            'job_id': self.job_id,
+            'competition_id': self.competition_id,
+            'season_id': self.season_id,
+            'status': self.status,
+            'error': self.error,
+            'total': self.total,
+            'skipped': self.skipped,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timings': self.timings,
+            'elapsed_seconds': round((self.finished_at or time.time()) - self.started_at, 3)
+            if self.started_at else 0.0
+        }
+
+
+def print_progress(job: SeasonSummaryJob, match_id: int) -> None:
+    done = job.skipped + job.completed + len(job.failed)
+    detail = job.timings.get(match_id) or {'erro': job.failed.get(match_id)}
+    print(f'[{done}/{job.total}] Partida {match_id}: {detail}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Gera e armazena os resumos de todas as partidas de uma competição/temporada')
+    parser.add_argument('--competition-id', type=int, required=True)
+    parser.add_argument('--season-id', type=int, required=True)
+    parser.add_argument('--concurrency', type=int, default=LLM_CONCURRENCY)
+    parser.add_argument('--rate-per-minute', type=float, default=LLM_RATE_PER_MINUTE)
+    args = parser.parse_args()
+    if args.concurrency < 1 or not 0 < args.rate_per_minute:
+        parser.error('--concurrency deve ser ao menos 1 e --rate-per-minute maior que zero')
+
+    job = SeasonSummaryJob(args.competition_id, args.season_id, args.concurrency,
+                           args.rate_per_minute, on_progress=print_progress)
+    result = asyncio.run(job.run())
+    print(f"{result['completed']} resumos gerados, {result['skipped']} já existentes, "
+          f"{len(result['failed'])} falhas em {result['elapsed_seconds']} s")
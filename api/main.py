@@ -1,8 +1,32 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, JSONResponse, ORJSONResponse
 from routers.match_summary import router as match_summary_router
 from routers.player_profile import router as player_profile_router
+from routers.batch import router as batch_router
+from routers.match_data import router as match_data_router
+from routers.live import router as live_router
+from utils.app_context import app_context
+from utils.metrics import metrics, cache_collector, start_trace, finish_trace
+from utils.serialization import orjson
 
-app = FastAPI()
+# Label das requisições que não correspondem a nenhuma rota
+UNMATCHED_PATH = '<unmatched>'
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app_context.startup()
+    yield
+    app_context.shutdown()
+
+
+# Respostas JSON dos modelos serializadas com o orjson, quando instalado
+app = FastAPI(lifespan=lifespan,
+              default_response_class=ORJSONResponse if orjson is not None else JSONResponse)
+
+metrics.register_collector(cache_collector(app_context.cache_stats))
 
 app.include_router(match_summary_router,
                    prefix='/summary', tags=['summary'])
@@ -10,7 +34,54 @@ app.include_router(match_summary_router,
 app.include_router(player_profile_router,
                    prefix='/profile', tags=['profile'])
 
+app.include_router(batch_router,
+                   prefix='/batch', tags=['batch'])
+
+app.include_router(match_data_router,
+                   prefix='/data', tags=['data'])
+
+app.include_router(live_router,
+                   prefix='/live', tags=['live'])
+
+
+@app.middleware('http')
+async def record_request_metrics(request: Request, call_next):
+    token = start_trace()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        # Usa o caminho da rota (ex: /data/matches/{match_id}/roster) para limitar as séries;
+        # URLs sem rota (404) ficam todas na mesma série
+        route = request.scope.get('route')
+        path = getattr(route, 'path', UNMATCHED_PATH)
+        metrics.observe('http_request_duration_seconds', elapsed,
+                        method=request.method, path=path)
+        metrics.inc('http_requests_total', method=request.method, path=path, status=status)
+        finish_trace(token, request.method, path, status, elapsed)
+
 
 @app.get('/')
 def read_root():
     return {'message': 'O servirdor está no ar!'}
+
+
+@app.get('/cache/llm')
+def llm_cache_stats():
+    return app_context.response_cache.stats()
+
+
+@app.delete('/cache/llm')
+def invalidate_llm_cache():
+    app_context.response_cache.invalidate()
+    return {'message': 'Cache de respostas do LLM limpo.'}
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(metrics.render(),
+                             media_type='text/plain; version=0.0.4')
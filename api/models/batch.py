@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from utils.concurrency import LLM_RATE_PER_MINUTE
+
+
+class SeasonSummaryJobModel(BaseModel):
+    competition_id: int
+    season_id: int
+    concurrency: int = Field(default=4, ge=1)
+    # O gateway do LLM já limita todas as chamadas a LLM_RATE_PER_MINUTE; o job só pode ir mais devagar
+    rate_per_minute: float = Field(default=LLM_RATE_PER_MINUTE, gt=0, le=LLM_RATE_PER_MINUTE)
+
+
+class JobCreatedResponse(BaseModel):
+    job_id: str
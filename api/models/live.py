@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+
+class LiveReplayModel(BaseModel):
+    speed: float = Field(default=60, ge=0)
+
+
+class LiveSummaryModel(BaseModel):
+    match_info: str = ''
+
+
+class LiveResponse(BaseModel):
+    match_id: int
+    status: str
+    seq: int
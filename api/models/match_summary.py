@@ -1,9 +1,11 @@
+from typing import Literal
 from pydantic import BaseModel
 
 
 class MatchSummaryModel(BaseModel):
     match_id: int
     match_info: str
+    mode: Literal['auto', 'full', 'windowed'] = 'auto'
 
 
 class LLMModel(BaseModel):
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -12,3 +13,15 @@ class LLMModel(BaseModel):
 
 class LLMResponse(BaseModel):
     assistant: str
+
+
+class SeasonProfileModel(BaseModel):
+    player_name: str
+    match_ids: Optional[List[int]] = None
+    competition_id: Optional[int] = None
+    season_id: Optional[int] = None
+
+
+class SeasonProfileResponse(BaseModel):
+    assistant: str
+    stats: dict
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import os
+from fastapi import APIRouter, HTTPException
+from models.batch import SeasonSummaryJobModel, JobCreatedResponse
+from jobs.precompute_summaries import SeasonSummaryJob
+
+# Jobs mantidos para consulta do progresso; acima disso, os encerrados há mais tempo são descartados
+BATCH_MAX_JOBS = int(os.getenv('BATCH_MAX_JOBS', 100))
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Jobs iniciados nesta instância da API, com as tasks mantidas vivas até o fim
+jobs = {}
+tasks = set()
+
+
+def _make_room() -> None:
+    '''Descarta os jobs encerrados há mais tempo até caber um novo job'''
+    finished = sorted((job for job in jobs.values() if job.finished_at is not None),
+                      key=lambda job: job.finished_at)
+    while len(jobs) >= BATCH_MAX_JOBS:
+        if not finished:
+            raise HTTPException(status_code=429, detail=f'Limite de {BATCH_MAX_JOBS} jobs em andamento atingido.')
+        del jobs[finished.pop(0).job_id]
+
+
+def _job_done(task: asyncio.Task) -> None:
+    tasks.discard(task)
+    # A falha já fica registrada no job; aqui ela só é lida e vai para o log
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f'Falha no job de resumos: {task.exception()}')
+
+
+@router.post('/season_summaries')
+async def season_summaries(request: SeasonSummaryJobModel) -> JobCreatedResponse:
+    _make_room()
+    job = SeasonSummaryJob(
+        competition_id=request.competition_id,
+        season_id=request.season_id,
+        concurrency=request.concurrency,
+        rate_per_minute=request.rate_per_minute
+    )
+    jobs[job.job_id] = job
+
+    task = asyncio.create_task(job.run())
+    tasks.add(task)
+    task.add_done_callback(_job_done)
+
+    return JobCreatedResponse(job_id=job.job_id)
+
+
+@router.get('/jobs/{job_id}')
+async def job_progress(job_id: str) -> dict:
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail='Job não encontrado.')
+    return jobs[job_id].progress()
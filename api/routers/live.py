@@ -0,0 +1,115 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from models.live import LiveReplayModel, LiveSummaryModel, LiveResponse
+from models.match_summary import LLMResponse
+from utils.concurrency import run_blocking
+from utils.context_cache import MatchContext, match_context_text, match_summary_instruction, inline_prompt
+from utils.live import live_matches, load_replay_events, LiveError
+from utils.llm import generate_text
+from utils.llm_gateway import LLMError
+from utils.metrics import metrics
+from utils.serialization import dumps_json
+from utils.streaming import format_sse
+
+router = APIRouter()
+
+
+def get_live_match(match_id: int):
+    live = live_matches.get(match_id)
+    if live is None:
+        raise HTTPException(status_code=404, detail=f'Partida {match_id} não está sendo transmitida.')
+    return live
+
+
+@router.post('/{match_id}/replay')
+async def start_replay(match_id: int, request: LiveReplayModel) -> LiveResponse:
+    try:
+        events = await run_blocking(load_replay_events, match_id)
+        live = await live_matches.start_replay(match_id, events, request.speed)
+    except LiveError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return LiveResponse(match_id=live.match_id, status=live.status, seq=live.seq)
+
+
+@router.delete('/{match_id}')
+async def stop_replay(match_id: int) -> LiveResponse:
+    live = get_live_match(match_id)
+    await live_matches.stop(match_id)
+    return LiveResponse(match_id=live.match_id, status=live.status, seq=live.seq)
+
+
+@router.get('')
+async def list_live_matches() -> list:
+    return live_matches.stats()
+
+
+@router.get('/{match_id}')
+async def live_snapshot(match_id: int) -> dict:
+    return get_live_match(match_id).snapshot()
+
+
+@router.get('/{match_id}/players/{player_name}/passes')
+async def live_player_passes(match_id: int, player_name: str) -> dict:
+    try:
+        return get_live_match(match_id).player_passes(player_name)
+    except LiveError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+
+async def sse_updates(live):
+    async for message in live.updates():
+        yield format_sse(dumps_json(message).decode('utf-8'), event=message['type'])
+
+
+@router.get('/{match_id}/stream')
+async def live_stream(match_id: int) -> StreamingResponse:
+    '''Snapshot do estado atual seguido das atualizações de cada evento, como eventos SSE'''
+    live = get_live_match(match_id)
+    return StreamingResponse(sse_updates(live), media_type='text/event-stream')
+
+
+@router.websocket('/{match_id}/ws')
+async def live_websocket(websocket: WebSocket, match_id: int):
+    '''As mesmas mensagens de /stream, em JSON, por WebSocket'''
+    live = live_matches.get(match_id)
+    if live is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    metrics.inc('live_websocket_connections_total')
+    try:
+        async for message in live.updates():
+            await websocket.send_text(dumps_json(message).decode('utf-8'))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+def live_summary_instruction(match_info: str, clock: dict) -> str:
+    return (match_summary_instruction(match_info) + f'''
+                A partida ainda pode estar em andamento: relate apenas o que aconteceu até o minuto {clock['minute']} do período {clock['period']}.
+                ''')
+
+
+@router.post('/{match_id}/summary')
+async def live_summary(match_id: int, request: LiveSummaryModel) -> LLMResponse:
+    '''
+    Resumo da partida no estado atual, a partir dos contadores e das linhas de
+    eventos já codificadas na ingestão, sem reprocessar os eventos anteriores
+    '''
+    live = get_live_match(match_id)
+    encoded = live.encode()
+    # O contexto muda a cada evento, então vai no próprio prompt em vez do cache de contexto
+    context = MatchContext(f'live:{match_id}:{live.seq}', match_context_text(encoded.sections),
+                           encoded.total_tokens)
+    prompt = inline_prompt(context, live_summary_instruction(request.match_info, live.clock))
+    metrics.observe('prompt_tokens', encoded.total_tokens, endpoint='live_summary')
+    try:
+        response = await generate_text(prompt)
+    except LLMError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return LLMResponse(assistant=response)
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from utils.concurrency import run_blocking
+from utils.http_cache import etag_response
+from utils.app_context import app_context
+
+router = APIRouter()
+
+
+def match_roster(match_id: int) -> dict:
+    from utils.dataprep import GetMatchStats
+
+    return GetMatchStats(match_id).get_roster()
+
+
+def match_player_passes(match_id: int, player_name: str) -> dict:
+    from utils.dataprep import GetMatchStats
+
+    return GetMatchStats(match_id).get_player_passes(player_name)
+
+
+def match_events(match_id: int, columns: str = None) -> list:
+    from utils.dataprep import GetMatchStats, EVENT_COLUMNS, frame_records
+
+    events = GetMatchStats(match_id).get_events_frame()
+    if columns:
+        selected = [column for column in columns.split(',') if column in EVENT_COLUMNS]
+        events = events[selected]
+    return frame_records(events)
+
+
+def match_heatmap(match_id: int, team: str = None, event_type: str = None, player: str = None) -> dict:
+    from utils.spatial import load_match_spatial
+
+    return load_match_spatial(match_id).heatmap(team, event_type, player)
+
+
+def match_pass_network(match_id: int, team: str) -> dict:
+    from utils.spatial import load_match_spatial
+
+    return load_match_spatial(match_id).pass_network(team)
+
+
+@router.get('/catalog')
+async def catalog(request: Request) -> Response:
+    try:
+        payload = await run_blocking(app_context.catalog.index)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return etag_response(request, payload)
+
+
+@router.get('/matches')
+async def matches(request: Request, competition_id: int, season_id: int) -> Response:
+    try:
+        payload = await run_blocking(app_context.catalog.season_matches, competition_id, season_id)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return etag_response(request, payload)
+
+
+@router.get('/matches/{match_id}/roster')
+async def roster(request: Request, match_id: int) -> Response:
+    try:
+        payload = await run_blocking(match_roster, match_id)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return etag_response(request, payload)
+
+
+@router.get('/matches/{match_id}/players/{player_name}/passes')
+async def player_passes(request: Request, match_id: int, player_name: str) -> Response:
+    try:
+        payload = await run_blocking(match_player_passes, match_id, player_name)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return etag_response(request, payload)
+
+
+@router.get('/matches/{match_id}/events')
+async def events(request: Request, match_id: int, columns: str = None) -> Response:
+    try:
+        payload = await run_blocking(match_events, match_id, columns)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return etag_response(request, payload)
+
+
+@router.get('/matches/{match_id}/heatmap')
+async def heatmap(request: Request, match_id: int, team: str = None, event_type: str = None,
+                  player: str = None) -> Response:
+    try:
+        payload = await run_blocking(match_heatmap, match_id, team, event_type, player)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return etag_response(request, payload)
+
+
+@router.get('/matches/{match_id}/teams/{team}/pass_network')
+async def pass_network(request: Request, match_id: int, team: str) -> Response:
+    try:
+        payload = await run_blocking(match_pass_network, match_id, team)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return etag_response(request, payload)
@@ -1,54 +1,63 @@
-import yaml
-import os
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
+import logging
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from models.match_summary import MatchSummaryModel, LLMModel, LLMResponse
-from utils.dataprep import GetMatchStats
+from utils.app_context import app_context
+from utils.context_cache import (load_match_data, encode_match_summary, summary_match_context,
+                                 match_summary_instruction, inline_prompt)
+from utils.llm import generate_text, stream_text
+from utils.llm_gateway import LLMError
+from utils.streaming import sse_stream, prime_stream
+from utils.concurrency import run_blocking
+from utils.metrics import metrics, span
+from utils.singleflight import SingleFlight
+from utils.narration import split_windows, encode_window, needs_windows, map_windows
 from fastapi import HTTPException
 
 router = APIRouter()
 
-# Tentar carregar as variáveis de ambiente do arquivo .env, se não existir, configurar manualmente
-ENV_PATH = os.path.abspath(os.path.join('..', '.env'))
+logger = logging.getLogger(__name__)
 
-print(ENV_PATH)
+# Requisições simultâneas do mesmo resumo compartilham o carregamento dos dados e a geração
+summary_flight = SingleFlight('match_summary')
 
 
-if os.getenv('GEMINI_API_KEY') is None:
-    try:
-        load_dotenv(dotenv_path=ENV_PATH,
-                    override=True)
-    except FileNotFoundError:
-        print('Arquivo .env não encontrado. As variáveis de ambiente devem ser configuradas manualmente.')
+def build_match_summary_prompt(match_id: int, match_info: str) -> str:
+    '''Prompt completo do resumo, com o contexto da partida no próprio prompt'''
+    prompt = inline_prompt(summary_match_context(match_id), match_summary_instruction(match_info))
+    metrics.observe('prompt_chars', len(prompt), endpoint='match_summary')
+    return prompt
 
-# Configuração do cliente com a chave da API
-client = genai.Client(
-    api_key=os.getenv('GEMINI_API_KEY')
-)
 
+def window_summary_prompt(window) -> str:
+    events_text, legend = encode_window(window)
+    return (f'''
+                Resuma em português, em no máximo 80 palavras, o que aconteceu no trecho da partida descrito abaixo ({window.label}):
+                - Legenda: {legend} - códigos usados para os times (T) e jogadores (P). No texto, use sempre os nomes completos.
+                - Events: {events_text} - CSV em ordem cronológica com os eventos do trecho e suas coordenadas em um campo de 120x80.
+                Relate apenas os fatos, em ordem cronológica: gols, chances claras, cartões, substituições e quem dominou o trecho.
+                Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas.
+                ''')
 
-def yaml_conversion(data: dict) -> str:
-    return yaml.dump(data, allow_unicode=True)
 
+def reduce_summary_prompt(lineups, counters, match_info: str, windows: list, summaries: list) -> str:
+    from utils.player_stats import PLAYER_STATS_KEYS
+    from utils.prompt_encoder import NameDictionary, encode_lineups, encode_player_stats
 
-def generate_match_summary(match_id: int, match_info: str) -> str:
-    lineups = GetMatchStats(match_id).get_lineups()
-    events = GetMatchStats(match_id).get_events()
-    player_stats = GetMatchStats(match_id).get_player_stats()
-    lineups_yaml = yaml_conversion(lineups)
-    match_info_yaml = yaml_conversion(match_info)
-    events_yaml = yaml_conversion(events)
-    player_stats_yaml = yaml_conversion(player_stats)
+    names = NameDictionary()
+    lineups_text = encode_lineups(lineups, names)
+    player_stats_text = encode_player_stats(counters, PLAYER_STATS_KEYS, names)
+    windows_text = '\n'.join(f'[{window.label}] {summary.strip()}'
+                              for window, summary in zip(windows, summaries))
 
     prompt = (f'''
-                Elabore um resumo envolvente e informativo do jogo descrito abaixo, em português, através do conteúdo dos YAML fornecidos:
-                - Lineups: {lineups_yaml} - contêm informações sobre as escalações dos times
-                - Match Info: {match_info_yaml} - contêm informações gerais da partida como data, estádio, times, placar, nome da competição.
-                - Events: {events_yaml} - contêm informações sobre os eventos da partida passes, faltas cometidas, faltas sofridas, interceptações, recuperação de bola, dribles e suas localizações.
-                - Player Stats: {player_stats_yaml} - contêm informações sobre os jogadores individuais com os jogadores e, junto com os eventos, irão dar a visão geral da partida.
-                Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas, como por exemplo adivinhar a ordem dos eventos da partida.
+                Elabore um resumo envolvente e informativo do jogo descrito abaixo, em português, através dos dados compactos fornecidos:
+                - Legenda: {names.legend()} - códigos usados para os times (T) e jogadores (P) nas escalações e estatísticas. No texto, use sempre os nomes completos.
+                - Lineups: {lineups_text} - contêm as escalações dos times, com número da camisa e jogador
+                - Match Info: {match_info} - contêm informações gerais da partida como data, estádio, times, placar, nome da competição.
+                - Resumos por trecho: {windows_text} - resumos, em ordem cronológica, do que aconteceu em cada trecho da partida.
+                - Player Stats: {player_stats_text} - CSV com as estatísticas individuais dos jogadores que, junto com os resumos por trecho, irão dar a visão geral da partida.
+                Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas.
                 O objetivo é criar um texto cativante e acessível, destacando os principais acontecimentos e aspectos interessantes da partida.
                 O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo, com o tom escolhido pelo usuário.
                 Mencione a data da partida explicitamente, sem utilizar termos como 'hoje'.
@@ -56,29 +65,108 @@ def generate_match_summary(match_id: int, match_info: str) -> str:
                 Focalize os momentos-chave do jogo, não entre em detalhes excessivos sobre cada jogador.
                 ''')
 
-    response = client.models.generate_content(
-        model='gemini-1.5-flash',
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.3,
-            max_output_tokens=500,
-            top_p=0.95,
-            top_k=40
-        ))
-
-    return response.text
+    metrics.observe('prompt_chars', len(prompt), endpoint='match_summary_reduce')
+    return prompt
+
+
+def plan_match_summary(match_id: int, match_info: str, mode: str = 'auto') -> dict:
+    '''
+    Função que prepara o resumo da partida no modo pedido. No modo 'full' a partida
+    vai em um único prompt; no 'windowed' os eventos são divididos em janelas de tempo,
+    narradas separadamente e depois reunidas; no 'auto' as janelas são usadas apenas
+    quando o prompt único não comporta todos os eventos ou houve prorrogação.
+    No prompt único, o contexto da partida segue à parte para ser reaproveitado
+    pelo cache de contexto do provedor.
+    Returns:
+        dict: {'prompt': ..., 'context': ...} ou {'windows': ..., 'window_prompts': ..., 'lineups': ..., 'counters': ...}
+    '''
+    events, lineups, counters = load_match_data(match_id)
+    if mode != 'windowed':
+        encoded = encode_match_summary(match_id, events, lineups, counters)
+        if mode == 'full' or not needs_windows(events, encoded):
+            context = summary_match_context(match_id, encoded=encoded)
+            instruction = match_summary_instruction(match_info)
+            metrics.observe('prompt_chars', len(context.text) + len(instruction), endpoint='match_summary')
+            return {'prompt': instruction, 'context': context}
+
+    with span('encode_windows'):
+        windows = split_windows(events)
+        window_prompts = [window_summary_prompt(window) for window in windows]
+    logger.info('Partida %s narrada em %s janelas', match_id, len(windows))
+    return {'windows': windows, 'window_prompts': window_prompts,
+            'lineups': lineups, 'counters': counters}
+
+
+async def resolve_summary_prompt(plan: dict, match_info: str) -> str:
+    '''Retorna o prompt final: o prompt único ou, no modo por janelas, o prompt que reúne os resumos das janelas'''
+    if 'prompt' in plan:
+        return plan['prompt']
+
+    with span('window_map'):
+        summaries = await map_windows(plan['window_prompts'])
+    return await run_blocking(reduce_summary_prompt, plan['lineups'], plan['counters'],
+                              match_info, plan['windows'], summaries)
+
+
+async def generate_match_summary(match_id: int, match_info: str, mode: str = 'auto') -> str:
+    if mode == 'auto':
+        with span('summary_store_lookup'):
+            stored = await run_blocking(app_context.summary_store.get, match_id)
+        if stored is not None:
+            return stored
+
+    plan = await run_blocking(plan_match_summary, match_id, match_info, mode)
+    prompt = await resolve_summary_prompt(plan, match_info)
+    return await generate_text(prompt, plan.get('context'))
 
 
 @router.post('/match_summary')
 async def match_summary(request: MatchSummaryModel) -> LLMResponse:
     try:
-        response = generate_match_summary(
-            match_id=request.match_id,
-            match_info=request.match_info
+        response = await summary_flight.do(
+            (request.match_id, request.match_info, request.mode),
+            lambda: generate_match_summary(
+                match_id=request.match_id,
+                match_info=request.match_info,
+                mode=request.mode
+            )
         )
 
         response_text = LLMModel(message=response)
         return LLMResponse(assistant=response_text.message)
 
+    except LLMError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     except Exception as e:
         raise HTTPException(status_code=422, detail=str(e))
+
+
+async def _single_chunk(text: str):
+    yield text
+
+
+@router.post('/match_summary/stream')
+async def match_summary_stream(request: MatchSummaryModel) -> StreamingResponse:
+    if request.mode == 'auto':
+        with span('summary_store_lookup'):
+            stored = await run_blocking(app_context.summary_store.get, request.match_id)
+        if stored is not None:
+            return StreamingResponse(sse_stream(_single_chunk(stored)),
+                                     media_type='text/event-stream')
+
+    try:
+        plan = await run_blocking(
+            plan_match_summary,
+            match_id=request.match_id,
+            match_info=request.match_info,
+            mode=request.mode
+        )
+        prompt = await resolve_summary_prompt(plan, request.match_info)
+        chunks = await prime_stream(stream_text(prompt, plan.get('context')))
+    except LLMError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return StreamingResponse(sse_stream(chunks),
+                             media_type='text/event-stream')
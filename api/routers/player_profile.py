@@ -1,99 +1,64 @@
-import yaml
-import os
-from google import genai
-from google.genai import types
+import logging
 from fastapi import HTTPException
-from dotenv import load_dotenv
-from utils.dataprep import GetMatchStats
+from utils.app_context import app_context
+from utils.context_cache import summary_match_context, inline_prompt
+from utils.llm import generate_text, stream_text
+from utils.llm_gateway import LLMError
+from utils.streaming import sse_stream, prime_stream
+from utils.concurrency import run_blocking
+from utils.metrics import metrics, span
 from fastapi import APIRouter
-from models.player_profile import PlayerProfileModel, LLMModel, LLMResponse
-from statsbombpy import sb
+from fastapi.responses import StreamingResponse
+from models.player_profile import (PlayerProfileModel, LLMModel, LLMResponse,
+                                   SeasonProfileModel, SeasonProfileResponse)
+from utils.season_stats import aggregate_player_season
+from utils.singleflight import SingleFlight
 
 router = APIRouter()
 
-# Tentar carregar as variáveis de ambiente do arquivo .env, se não existir, configurar manualmente
-ENV_PATH = os.path.abspath(os.path.join('..', '.env'))
-
-
-if os.getenv('GEMINI_API_KEY') is None:
-    try:
-        load_dotenv(dotenv_path=ENV_PATH,
-                    override=True)
-    except FileNotFoundError:
-        print('Arquivo .env não encontrado. As variáveis de ambiente devem ser configuradas manualmente.')
-
-# Configuração do cliente com a chave da API
-client = genai.Client(
-    api_key=os.getenv('GEMINI_API_KEY')
-)
-
-
-def yaml_conversion(data: dict) -> str:
-    return yaml.dump(data, allow_unicode=True)
-
-
-def generate_player_profile(match_id: int, player_name: str) -> str:
-    events = sb.events(match_id=match_id)
-    player_events = events[events['player'] == player_name]
-    stats = {
-        "Jogador": player_name,
-        "Passes Completos": player_events[
-            (player_events['type'] == 'Pass') & (
-                player_events['pass_outcome'].isna())
-        ].shape[0],
-        "Tentativas de Passes": player_events[player_events['type'] == 'Pass'].shape[0],
-        "Chutes": player_events[player_events['type'] == 'Shot'].shape[0],
-        "Chutes no Alvo": player_events[
-            (player_events['type'] == 'Shot') & (
-                player_events['shot_outcome'] == 'On Target')
-        ].shape[0],
-        "Faltas Cometidas": player_events[player_events['type'] == 'Foul Committed'].shape[0],
-        "Faltas Sofridas": player_events[player_events['type'] == 'Foul Won'].shape[0],
-        "Contestações de Bola": player_events[player_events['type'] == 'Tackle'].shape[0],
-        "Interceptações": player_events[player_events['type'] == 'Interception'].shape[0],
-        "Dribles Completados": player_events[
-            (player_events['type'] == 'Dribble') & (
-                player_events['dribble_outcome'] == 'Complete')
-        ].shape[0],
-        "Tentativas de Dribles": player_events[player_events['type'] == 'Dribble'].shape[0],
-        "Gols (exceto pênaltis)": player_events[
-            (player_events['type'] == 'Shot') &
-            (player_events['shot_outcome'] == 'Goal') &
-            (player_events['shot_type'] != 'Penalty')
-        ].shape[0],
-        "Gols de Pênalti": player_events[
-            (player_events['type'] == 'Shot') &
-            (player_events['shot_outcome'] == 'Goal') &
-            (player_events['shot_type'] == 'Penalty')
-        ].shape[0],
-        "Recuperações de Bola": player_events[player_events['type'] == 'Ball Recovery'].shape[0],
-        "Bloqueios": player_events[player_events['type'] == 'Block'].shape[0],
-        "Paralisações por Lesão": player_events[player_events['type'] == 'Injury Stoppage'].shape[0],
-        "Perda de Controle": player_events[player_events['type'] == 'Miscontrol'].shape[0],
-        "Cartões Amarelos": player_events[
-            (player_events['type'] == 'Foul Committed') &
-            (player_events['foul_committed_card'].eq(
-                'Yellow Card') if 'foul_committed_card' in player_events else False)
-        ].shape[0],
-        "Cartões Vermelhos": player_events[
-            (player_events['type'] == 'Foul Committed') &
-            (player_events['foul_committed_card'].eq(
-                'Red Card') if 'foul_committed_card' in player_events else False)
-        ].shape[0]
-    }
-    player_stats_yaml = yaml_conversion(stats)
-
-    events = GetMatchStats(match_id=match_id).get_events()
-
-    events_yaml = yaml_conversion(events)
-
-    prompt = (f'''
-                Elabore um resumo envolvente e informativo do jogador selecionado, em português, através do conteúdo dos YAML fornecidos:
-                        - Player_stats: {player_stats_yaml} - contêm informações sobre as estatísticas do jogador na partida. Como: passes completos,
+logger = logging.getLogger(__name__)
+
+# Requisições simultâneas do mesmo perfil compartilham o carregamento dos dados e a geração
+profile_flight = SingleFlight('player_profile')
+season_profile_flight = SingleFlight('season_profile')
+
+
+# Rótulos do perfil do jogador e o contador correspondente em utils.player_stats
+PROFILE_LABELS = {
+    "Passes Completos": 'passes_completed',
+    "Tentativas de Passes": 'passes_attempted',
+    "Chutes": 'shots',
+    "Chutes no Alvo": 'shots_on_target',
+    "Faltas Cometidas": 'fouls_committed',
+    "Faltas Sofridas": 'fouls_won',
+    "Contestações de Bola": 'tackles',
+    "Interceptações": 'interceptions',
+    "Dribles Completados": 'dribbles_completed',
+    "Tentativas de Dribles": 'dribbles_attempted',
+    "Gols (exceto pênaltis)": 'non_penalty_goals',
+    "Gols de Pênalti": 'penalty_goals',
+    "Recuperações de Bola": 'ball_recoveries',
+    "Bloqueios": 'blocks',
+    "Paralisações por Lesão": 'injury_stoppages',
+    "Perda de Controle": 'miscontrols',
+    "Cartões Amarelos": 'yellow_cards',
+    "Cartões Vermelhos": 'red_cards'
+}
+
+
+def player_profile_instruction(player_name: str, counters: dict) -> str:
+    '''Instrução do perfil, enviada depois do contexto da partida (utils.context_cache)'''
+    stats = {"Jogador": player_name}
+    stats.update({label: counters[key]
+                 for label, key in PROFILE_LABELS.items()})
+    player_stats_text = '\n'.join(f'{label}: {value}' for label, value in stats.items())
+
+    return (f'''
+                Elabore um resumo envolvente e informativo do jogador selecionado, em português, através dos dados da partida acima e das estatísticas abaixo:
+                        - Player_stats: {player_stats_text} - contêm informações sobre as estatísticas do jogador na partida. Como: passes completos,
                         tentativas de passes, chutes, chutes no alvo, faltas cometidas, faltas sofridas, contestações de bola, interceptações, dribles completados,
                         tentativas de dribles, gols (exceto pênaltis), gols de pênalti, recuperações de bola, bloqueios, cartões amarelos, cartões vermelhos,
                         paralisações por lesão, perda de controle.
-                        - Events: {events_yaml} - contêm informações sobre os eventos gerais da partida, envolvendo todos os jogadores.
                         Com a combinação das estatísticas do jogador e dos eventos da partida, você irá traçar o perfil do jogador na partida.
                         Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas, como por exemplo adivinhar a ordem dos eventos da partida.
                         Não use termos como de acordo com os dados que me foram fornecidos, ou algo do tipo.
@@ -101,29 +66,165 @@ def generate_player_profile(match_id: int, player_name: str) -> str:
                         O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo.
                 ''')
 
-    response = client.models.generate_content(
-        model='gemini-1.5-flash',
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.3,
-            max_output_tokens=500,
-            top_p=0.95,
-            top_k=40
-        ))
 
-    return response.text
+def plan_player_profile(match_id: int, player_name: str) -> tuple:
+    '''
+    Função que prepara o perfil do jogador: a instrução com as estatísticas dele
+    e o contexto da partida, o mesmo do resumo e dos perfis dos demais jogadores
+    Returns:
+        tuple: Instrução e contexto da partida (MatchContext)
+    '''
+    # Importados aqui para que importar a API não carregue pandas e statsbombpy
+    from utils.dataprep import load_events
+    from utils.player_stats import compute_player_counters, player_counters
+
+    with span('load_events'):
+        events = load_events(match_id)
+    with span('player_stats'):
+        counters = player_counters(compute_player_counters(events), player_name)
+    instruction = player_profile_instruction(player_name, counters)
+    context = summary_match_context(match_id)
+
+    metrics.observe('prompt_tokens', context.tokens, endpoint='player_profile')
+    metrics.observe('prompt_chars', len(context.text) + len(instruction), endpoint='player_profile')
+    return instruction, context
+
+
+def build_player_profile_prompt(match_id: int, player_name: str) -> str:
+    '''Prompt completo do perfil, com o contexto da partida no próprio prompt'''
+    instruction, context = plan_player_profile(match_id, player_name)
+    return inline_prompt(context, instruction)
+
+
+async def generate_player_profile(match_id: int, player_name: str) -> str:
+    instruction, context = await run_blocking(plan_player_profile, match_id, player_name)
+    return await generate_text(instruction, context)
 
 
 @router.post('/player_profile')
 async def player_profile(request: PlayerProfileModel) -> LLMResponse:
     try:
-        response = generate_player_profile(
-            match_id=request.match_id,
-            player_name=request.player_name
+        response = await profile_flight.do(
+            (request.match_id, request.player_name),
+            lambda: generate_player_profile(
+                match_id=request.match_id,
+                player_name=request.player_name
+            )
         )
 
         response_text = LLMModel(message=response)
         return LLMResponse(assistant=response_text.message)
 
+    except LLMError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.post('/player_profile/stream')
+async def player_profile_stream(request: PlayerProfileModel) -> StreamingResponse:
+    try:
+        instruction, context = await run_blocking(
+            plan_player_profile,
+            match_id=request.match_id,
+            player_name=request.player_name
+        )
+        chunks = await prime_stream(stream_text(instruction, context))
+    except LLMError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return StreamingResponse(sse_stream(chunks),
+                             media_type='text/event-stream')
+
+
+# Colunas da tabela por partida do perfil de temporada
+SEASON_MATCH_COLUMNS = ['minutes_played', 'passes_completed', 'passes_attempted',
+                        'shots', 'shots_on_target', 'goals', 'assists', 'dribbles_completed']
+
+SEASON_RATE_LABELS = {
+    'pass_completion': 'Aproveitamento de Passes',
+    'dribble_success': 'Aproveitamento de Dribles',
+    'shots_per_90': 'Chutes por 90 minutos',
+    'goals_per_90': 'Gols por 90 minutos',
+    'passes_per_90': 'Passes por 90 minutos',
+    'tackles_interceptions_per_90': 'Desarmes e Interceptações por 90 minutos'
+}
+
+
+def season_match_ids(request: SeasonProfileModel) -> list:
+    '''
+    Função que retorna as partidas do perfil de temporada: as informadas na
+    requisição ou todas as partidas da competição/temporada
+    '''
+    if request.match_ids:
+        return request.match_ids
+    if request.competition_id is None or request.season_id is None:
+        raise ValueError('Informe match_ids ou competition_id e season_id.')
+    matches = app_context.sb.matches(competition_id=request.competition_id,
+                                     season_id=request.season_id, fmt='dict')
+    return sorted(matches)
+
+
+def build_season_profile_prompt(aggregate: dict) -> str:
+    '''
+    Função que monta o prompt do perfil de temporada apenas com as estatísticas
+    agregadas do jogador, sem eventos
+    Args:
+        aggregate (dict): Resultado de PlayerSeasonAggregate.to_dict
+    Returns:
+        str: Prompt completo
+    '''
+    totals = aggregate['totals']
+    stats = {"Jogador": aggregate['player_name'], "Time": aggregate['team'],
+             "Partidas Disputadas": aggregate['matches_played'],
+             "Minutos Jogados": totals['minutes_played']}
+    stats.update({label: totals[key] for label, key in PROFILE_LABELS.items()})
+    stats.update({label: aggregate['rates'][key] for key, label in SEASON_RATE_LABELS.items()})
+    season_stats_text = '\n'.join(f'{label}: {value}' for label, value in stats.items())
+
+    per_match_lines = ['partida,' + ','.join(SEASON_MATCH_COLUMNS)]
+    per_match_lines += [f'{match_id},' + ','.join(str(values[column]) for column in SEASON_MATCH_COLUMNS)
+                        for match_id, values in sorted(aggregate['per_match'].items())]
+    per_match_text = '\n'.join(per_match_lines)
+
+    prompt = (f'''
+                Elabore um perfil envolvente e informativo da temporada do jogador selecionado, em português, através das estatísticas agregadas fornecidas:
+                        - Season_stats: {season_stats_text} - contêm os totais do jogador somados em todas as partidas da temporada e as taxas de aproveitamento e por 90 minutos.
+                        - Per_match: {per_match_text} - CSV com as principais estatísticas do jogador em cada partida, em ordem de ID da partida.
+                        Com as estatísticas agregadas, você irá traçar o perfil do jogador na temporada: pontos fortes, regularidade e destaques.
+                        Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas.
+                        Não use termos como de acordo com os dados que me foram fornecidos, ou algo do tipo.
+                        O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo.
+                ''')
+
+    return prompt
+
+
+async def generate_season_profile(request: SeasonProfileModel) -> tuple:
+    match_ids = await run_blocking(season_match_ids, request)
+    with span('season_aggregate'):
+        aggregate = await aggregate_player_season(request.player_name, match_ids)
+        aggregate = aggregate.to_dict()
+    if aggregate['matches_played'] == 0:
+        raise ValueError(f"O jogador {request.player_name} não participou das partidas informadas.")
+
+    prompt = build_season_profile_prompt(aggregate)
+    metrics.observe('prompt_chars', len(prompt), endpoint='season_profile')
+    return await generate_text(prompt), aggregate
+
+
+@router.post('/season_profile')
+async def season_profile(request: SeasonProfileModel) -> SeasonProfileResponse:
+    try:
+        key = (request.player_name, tuple(request.match_ids or ()),
+               request.competition_id, request.season_id)
+        response, aggregate = await season_profile_flight.do(
+            key, lambda: generate_season_profile(request))
+        return SeasonProfileResponse(assistant=response, stats=aggregate)
+
+    except LLMError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message, headers=e.headers)
     except Exception as e:
         raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,140 @@
+import os
+import sys
+import threading
+
+# Arquivo .env na raíz do projeto, relativo ao diretório api de onde a API é executada
+ENV_PATH = os.path.abspath(os.path.join('..', '.env'))
+
+# Inicializa cliente, sessão e caches já no startup da API, em vez de na primeira requisição
+WARM_START = os.getenv('WARM_START', '0') == '1'
+
+# Caches expostos nas métricas: nome -> (módulo, singleton)
+CACHES = {
+    'events': ('utils.event_cache', 'event_cache'),
+    'event_projections': ('utils.event_cache', 'projection_cache'),
+    'match_index': ('utils.match_index', 'match_index_cache'),
+    'llm_responses': ('utils.llm_cache', 'response_cache'),
+    'statsbomb_http': ('utils.cache_manager', 'cache_manager'),
+    'season_partials': ('utils.season_stats', 'partial_cache'),
+    'catalog': ('utils.catalog', 'catalog'),
+    'spatial': ('utils.spatial', 'spatial_cache'),
+    'match_contexts': ('utils.context_cache', 'match_contexts'),
+    'llm_contexts': ('utils.context_cache', 'context_cache')
+}
+
+
+class AppContext:
+    '''
+    Contexto compartilhado da aplicação: um único cliente do Gemini, a sessão
+    HTTP do StatsBomb e os caches, criados na primeira utilização (ou no startup,
+    com WARM_START=1). Assim importar a API não carrega o SDK do Gemini,
+    o statsbombpy ou o pandas, e cada worker cria um único cliente.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._llm = None
+
+    @staticmethod
+    def load_env() -> None:
+        '''Carrega as variáveis do arquivo .env caso a chave do Gemini não esteja configurada'''
+        if os.getenv('GEMINI_API_KEY') is not None:
+            return
+        from dotenv import load_dotenv
+
+        try:
+            load_dotenv(dotenv_path=ENV_PATH, override=True)
+        except FileNotFoundError:
+            print('Arquivo .env não encontrado. As variáveis de ambiente devem ser configuradas manualmente.')
+
+    @property
+    def client(self):
+        '''Cliente do Gemini, criado na primeira utilização'''
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self.load_env()
+                    from google import genai
+
+                    self._client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
+    @property
+    def llm(self):
+        '''Gateway do LLM (utils.llm_gateway) com o backend configurado em LLM_BACKEND'''
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    from utils.llm_gateway import LLMGateway, create_backend, LLM_BACKEND
+
+                    self._llm = LLMGateway(create_backend(LLM_BACKEND, lambda: self.client))
+        return self._llm
+
+    @property
+    def statsbomb(self):
+        '''Sessão HTTP compartilhada do StatsBomb, instalada no statsbombpy na primeira utilização'''
+        from utils.cache_manager import cache_manager
+
+        return cache_manager
+
+    @property
+    def sb(self):
+        '''Módulo statsbombpy.sb, já usando a sessão compartilhada'''
+        self.statsbomb
+        from statsbombpy import sb
+
+        return sb
+
+    @property
+    def response_cache(self):
+        from utils.llm_cache import response_cache
+
+        return response_cache
+
+    @property
+    def summary_store(self):
+        from utils.summary_store import summary_store
+
+        return summary_store
+
+    @property
+    def catalog(self):
+        from utils.catalog import catalog
+
+        return catalog
+
+    def cache_stats(self) -> dict:
+        '''Estatísticas dos caches já carregados; os que ainda não foram usados são omitidos'''
+        stats = {}
+        for name, (module, attribute) in CACHES.items():
+            if module in sys.modules:
+                stats[name] = getattr(sys.modules[module], attribute).stats()
+        return stats
+
+    def startup(self) -> None:
+        '''Chamado no startup da API. Com WARM_START=1, cria tudo antes da primeira requisição'''
+        if not WARM_START:
+            return
+        import utils.dataprep  # noqa: F401
+        from google.genai import types  # noqa: F401
+
+        self.sb
+        self.response_cache
+        self.summary_store
+        if self.llm.backend.name == 'gemini':
+            self.client
+
+    def shutdown(self) -> None:
+        '''Chamado no encerramento da API: fecha a sessão HTTP e o pool de processos, se foram criados'''
+        if 'utils.cache_manager' in sys.modules:
+            self.statsbomb.session.close()
+        if 'utils.season_stats' in sys.modules:
+            sys.modules['utils.season_stats'].shutdown_process_pool()
+
+
+app_context = AppContext()
@@ -1,6 +1,25 @@
+import os
+import threading
 import requests_cache
 from contextlib import contextmanager
-import requests_cache
+from requests.adapters import HTTPAdapter
+
+STATSBOMB_DATA_URL = 'raw.githubusercontent.com/statsbomb/open-data/master/data'
+
+POOL_MAXSIZE = int(os.getenv('STATSBOMB_POOL_MAXSIZE', 16))
+
+# Validade do cache por endpoint, em segundos. Eventos, escalações e dados 360
+# de partidas históricas nunca mudam; a lista de competições é atualizada a cada hora
+COMPETITIONS_EXPIRE_AFTER = int(os.getenv('COMPETITIONS_EXPIRE_AFTER', 3600))
+MATCHES_EXPIRE_AFTER = int(os.getenv('MATCHES_EXPIRE_AFTER', 86400))
+
+URLS_EXPIRE_AFTER = {
+    f'{STATSBOMB_DATA_URL}/competitions.json': COMPETITIONS_EXPIRE_AFTER,
+    f'{STATSBOMB_DATA_URL}/matches/*': MATCHES_EXPIRE_AFTER,
+    f'{STATSBOMB_DATA_URL}/events/*': requests_cache.NEVER_EXPIRE,
+    f'{STATSBOMB_DATA_URL}/lineups/*': requests_cache.NEVER_EXPIRE,
+    f'{STATSBOMB_DATA_URL}/three-sixty/*': requests_cache.NEVER_EXPIRE,
+}
 
 
 class CacheManager:
@@ -13,12 +32,44 @@ class CacheManager:
         return cls._instance
 
     def initialize(self):
-        """Inicializa o cache"""
+        """Inicializa a sessão cacheada com pool de conexões e a instala no statsbombpy"""
         self.session = requests_cache.CachedSession(
             'statsbomb_cache',
             backend='sqlite',
-            expire_after=3600
+            expire_after=COMPETITIONS_EXPIRE_AFTER,
+            urls_expire_after=URLS_EXPIRE_AFTER
         )
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount('https://', self.adapter)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.install()
+
+    def install(self):
+        """
+        Faz o statsbombpy usar esta sessão em todas as chamadas (competitions, matches,
+        lineups, events). O statsbombpy instala por conta própria um cache global em um
+        diretório temporário, que é removido aqui.
+        """
+        from statsbombpy import public, sb  # noqa: F401
+
+        requests_cache.uninstall_cache()
+        public.get_response = self.get_json
+
+    def get_json(self, url: str):
+        """Faz um GET pela sessão compartilhada e retorna o JSON da resposta"""
+        response = self.session.get(url)
+        response.raise_for_status()
+        with self._lock:
+            self.requests += 1
+            if getattr(response, 'from_cache', False):
+                self.cache_hits += 1
+        return response.json()
+
+    def invalidate(self, url: str) -> None:
+        """Remove do cache a resposta de uma URL, para que a próxima consulta vá ao servidor"""
+        self.session.cache.delete(urls=[url])
 
     @contextmanager
     def get_session(self):
@@ -28,5 +79,19 @@ class CacheManager:
         finally:
             pass
 
+    def stats(self) -> dict:
+        """Retorna as estatísticas do cache HTTP e do pool de conexões"""
+        with self._lock:
+            requests, cache_hits = self.requests, self.cache_hits
+        return {
+            'requests': requests,
+            'cache_hits': cache_hits,
+            'cache_misses': requests - cache_hits,
+            'hit_rate': cache_hits / requests if requests else 0.0,
+            'cached_responses': len(self.session.cache.responses),
+            'pool_hosts': len(self.adapter.poolmanager.pools),
+            'pool_maxsize': POOL_MAXSIZE
+        }
+
 
 cache_manager = CacheManager()
@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import threading
+import time
+from utils.match_info import build_match_info
+
+CATALOG_PATH = os.getenv('CATALOG_PATH', 'catalog.json')
+CATALOG_REFRESH_SECONDS = int(os.getenv('CATALOG_REFRESH_SECONDS', 3600))
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def match_display(match: dict) -> str:
+    '''Texto da partida exibido na barra lateral'''
+    return f"{match['home_team']['home_team_name']} vs {match['away_team']['away_team_name']}"
+
+
+class Catalog:
+    '''
+    Catálogo persistente de competições, temporadas e partidas do StatsBomb.
+    Os índices (competição -> temporadas -> partidas) são montados uma única vez,
+    já com os textos da barra lateral e as informações gerais de cada partida,
+    e gravados em disco. A lista de competições é consultada de novo a cada
+    CATALOG_REFRESH_SECONDS e só as temporadas cujo match_updated mudou têm
+    as partidas recarregadas, na próxima vez em que forem pedidas.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._seasons = {}
+        self._index = None
+        self.refreshed_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._read()
+
+    def _read(self) -> None:
+        '''Carrega o catálogo gravado em disco, se existir'''
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.refreshed_at = stored.get('refreshed_at', 0.0)
+        for season in stored.get('seasons', []):
+            self._seasons[(season['competition_id'], season['season_id'])] = season
+
+    def _write(self) -> None:
+        '''Grava o catálogo em disco, substituindo o arquivo anterior de uma vez'''
+        payload = {'refreshed_at': self.refreshed_at, 'seasons': list(self._seasons.values())}
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(payload, file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def _stale(self) -> bool:
+        return not self._seasons or time.time() - self.refreshed_at >= CATALOG_REFRESH_SECONDS
+
+    def refresh(self, force: bool = False) -> None:
+        '''
+        Função que atualiza a lista de competições e temporadas. Temporadas novas
+        entram sem partidas; as que tiveram o match_updated alterado perdem as
+        partidas guardadas, recarregadas na próxima consulta
+        Args:
+            force (bool): Atualiza mesmo que o catálogo ainda esteja dentro da validade
+        '''
+        with self._lock:
+            if not force and not self._stale():
+                return
+            from statsbombpy.config import OPEN_DATA_PATHS
+            from utils.app_context import app_context
+
+            try:
+                competitions = app_context.sb.competitions(fmt='dict')
+            except Exception as e:
+                # Sem acesso ao StatsBomb, o catálogo gravado em disco continua valendo
+                if not self._seasons:
+                    raise
+                logger.warning(f'Falha ao atualizar o catálogo, usando a versão em disco: {e}')
+                return
+            seasons = {}
+            for entry in competitions.values():
+                key = (entry['competition_id'], entry['season_id'])
+                season = self._seasons.get(key)
+                if season is None or season['match_updated'] != entry.get('match_updated'):
+                    if season is not None and season['matches'] is not None:
+                        app_context.statsbomb.invalidate(OPEN_DATA_PATHS['matches'].format(
+                            competition_id=key[0], season_id=key[1]))
+                    season = {
+                        'competition_id': entry['competition_id'],
+                        'season_id': entry['season_id'],
+                        'competition_name': entry['competition_name'],
+                        'competition_gender': entry.get('competition_gender'),
+                        'season_name': entry['season_name'],
+                        'match_updated': entry.get('match_updated'),
+                        'matches': None
+                    }
+                seasons[key] = season
+
+            self._seasons = seasons
+            self._index = None
+            self.refreshed_at = time.time()
+            self._write()
+
+    def _build_index(self) -> dict:
+        '''
+        Índice da barra lateral: nome da competição -> ID e temporadas (nome -> ID).
+        Competições diferentes com o mesmo nome são diferenciadas pelo gênero.
+        '''
+        names = {}
+        for season in self._seasons.values():
+            names.setdefault(season['competition_name'], set()).add(season['competition_id'])
+
+        index = {}
+        for season in sorted(self._seasons.values(),
+                             key=lambda season: (season['competition_name'], season['season_name']),
+                             reverse=True):
+            name = season['competition_name']
+            if len(names[name]) > 1:
+                name = f"{name} ({season['competition_gender']})"
+            competition = index.setdefault(name, {'competition_id': season['competition_id'],
+                                                  'seasons': {}})
+            competition['seasons'][season['season_name']] = season['season_id']
+        return dict(sorted(index.items()))
+
+    def index(self) -> dict:
+        '''
+        Função que retorna o índice de competições e temporadas para a barra lateral
+        Returns:
+            dict: Nome da competição -> {'competition_id', 'seasons': {nome da temporada: season_id}}
+        '''
+        self.refresh()
+        with self._lock:
+            if self._index is None:
+                self._index = self._build_index()
+            return self._index
+
+    def season_matches(self, competition_id: int, season_id: int) -> list:
+        '''
+        Função que retorna as partidas de uma competição/temporada com o texto
+        exibido na barra lateral e as informações gerais de cada partida,
+        carregando-as do StatsBomb apenas na primeira consulta
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            list: Partidas com match_id, match_display e match_info
+        '''
+        self.refresh()
+        with self._lock:
+            season = self._seasons.get((competition_id, season_id))
+            if season is None:
+                raise CatalogError(f'Temporada {season_id} da competição {competition_id} não encontrada.')
+            if season['matches'] is not None:
+                self.hits += 1
+                return season['matches']
+            self.misses += 1
+
+            from utils.app_context import app_context
+
+            matches = app_context.sb.matches(competition_id=competition_id,
+                                             season_id=season_id, fmt='dict')
+            season['matches'] = [
+                {
+                    'match_id': match['match_id'],
+                    'match_display': match_display(match),
+                    'match_info': build_match_info(match)
+                }
+                for match in matches.values()
+            ]
+            self._write()
+            return season['matches']
+
+    def stats(self) -> dict:
+        '''Temporadas conhecidas, temporadas com partidas carregadas e acertos'''
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'seasons': len(self._seasons),
+                'loaded_seasons': sum(season['matches'] is not None for season in self._seasons.values()),
+                'age_seconds': round(time.time() - self.refreshed_at, 3) if self.refreshed_at else 0.0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+catalog = Catalog(CATALOG_PATH)
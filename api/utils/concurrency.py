@@ -0,0 +1,77 @@
+import asyncio
+import contextvars
+import functools
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+DATA_WORKERS = int(os.getenv('DATA_WORKERS', 8))
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', 4))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 60))
+LLM_RATE_PER_MINUTE = float(os.getenv('LLM_RATE_PER_MINUTE', 15))
+
+# Pool limitado para o carregamento de dados (HTTP do StatsBomb, leitura do disco e pandas),
+# que é bloqueante e não pode rodar no event loop do uvicorn
+data_executor = ThreadPoolExecutor(max_workers=DATA_WORKERS,
+                                   thread_name_prefix='match-data')
+
+# Limite de chamadas simultâneas ao LLM, um semáforo por event loop: o primitivo do asyncio
+# fica preso ao loop em que foi usado e não pode ser criado na importação
+_llm_semaphores = weakref.WeakKeyDictionary()
+
+
+def llm_semaphore() -> asyncio.Semaphore:
+    '''
+    Função que retorna o semáforo do LLM do event loop em execução, criando-o no primeiro uso
+    Returns:
+        asyncio.Semaphore: Semáforo compartilhado pelas chamadas ao LLM deste loop
+    '''
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(LLM_CONCURRENCY)
+    return semaphore
+
+
+async def run_blocking(func, *args, **kwargs):
+    '''
+    Função que executa uma função bloqueante no pool de dados sem travar o event loop.
+    O contexto atual é copiado para a thread, preservando o trace da requisição.
+    Args:
+        func (callable): Função bloqueante
+        *args, **kwargs: Argumentos da função
+    Returns:
+        O retorno da função
+    '''
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(data_executor,
+                                      functools.partial(context.run, func, *args, **kwargs))
+
+
+class TokenBucket:
+    '''
+    Limitador de taxa assíncrono: libera até `capacity` chamadas de uma vez
+    e depois `rate_per_minute` chamadas por minuto
+    '''
+
+    def __init__(self, rate_per_minute: float, capacity: int = 1):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        '''Espera até haver uma ficha disponível e a consome'''
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from utils.event_cache import MatchCache, EVENT_CACHE_MAXSIZE, EVENT_CACHE_TTL
+from utils.llm_gateway import LLMError
+from utils.metrics import metrics, span
+from utils.singleflight import SingleFlight
+
+# Liga o cache de contexto no provedor; com '0' o contexto sempre vai no prompt
+CONTEXT_CACHE = os.getenv('CONTEXT_CACHE', '1') == '1'
+CONTEXT_CACHE_TTL = int(os.getenv('CONTEXT_CACHE_TTL', 3600))
+CONTEXT_CACHE_MAXSIZE = int(os.getenv('CONTEXT_CACHE_MAXSIZE', 16))
+# Contextos menores que isso vão no prompt, além do mínimo exigido pelo backend
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv('CONTEXT_CACHE_MIN_TOKENS', 0))
+# O cached content do Gemini exige uma versão fixa do modelo. No Gemini 2.0 o mínimo é de 4.096 tokens,
+# abaixo do contexto de uma partida; no 1.5 (32.768 tokens) o contexto quase sempre iria no prompt
+CONTEXT_CACHE_MODEL = os.getenv('CONTEXT_CACHE_MODEL', 'gemini-2.0-flash-001')
+# Contextos que expiram em menos que isso não são mais usados, para não expirarem durante a geração
+CONTEXT_CACHE_MARGIN = 60
+
+logger = logging.getLogger(__name__)
+
+# Contextos de partida já montados, indexados pelo match_id
+match_contexts = MatchCache(maxsize=EVENT_CACHE_MAXSIZE, ttl=EVENT_CACHE_TTL)
+
+
+@dataclass
+class MatchContext:
+    '''
+    Material estático de uma partida (legenda, escalações, eventos e estatísticas),
+    o mesmo em todas as perguntas sobre ela; só a instrução muda entre resumo e perfis
+    '''
+    key: str
+    text: str
+    tokens: int
+
+
+def match_context_text(sections: dict) -> str:
+    '''Texto do contexto da partida a partir das seções de utils.prompt_encoder.encode_match'''
+    return (f'''
+                Dados da partida, em formato compacto:
+                - Legenda: {sections['legend']} - códigos usados para os times (T) e jogadores (P) nas demais seções. No texto, use sempre os nomes completos.
+                - Lineups: {sections['lineups']} - contêm as escalações dos times, com número da camisa e jogador
+                - Events: {sections['events']} - CSV em ordem cronológica com os eventos da partida (passes, chutes, faltas cometidas, faltas sofridas, interceptações, recuperação de bola, dribles) e suas coordenadas de início e fim em um campo de 120x80.
+                - Player Stats: {sections['player_stats']} - CSV com as estatísticas individuais dos jogadores na partida.
+                ''')
+
+
+def match_context(match_id: int, encode) -> MatchContext:
+    '''
+    Função que retorna o contexto da partida, montando-o apenas na primeira vez
+    Args:
+        match_id (int): ID da partida
+        encode (callable): Função sem argumentos que retorna o EncodedPrompt da partida
+    Returns:
+        MatchContext: Contexto com a chave (partida e conteúdo), o texto e os tokens estimados
+    '''
+    def build() -> MatchContext:
+        encoded = encode()
+        text = match_context_text(encoded.sections)
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+        return MatchContext(f'match:{match_id}:{digest}', text, encoded.total_tokens)
+
+    return match_contexts.get_or_load(int(match_id), build)
+
+
+def load_match_data(match_id: int) -> tuple:
+    '''
+    Função que carrega os dados da partida usados no contexto
+    Returns:
+        tuple: Eventos, escalações e contadores dos jogadores
+    '''
+    # Importado aqui para que importar a API não carregue pandas e statsbombpy
+    from utils.dataprep import GetMatchStats
+
+    match_stats = GetMatchStats(match_id)
+    with span('load_events'):
+        events = match_stats.get_events_frame()
+    with span('load_lineups'):
+        lineups = match_stats.get_lineups_frames()
+    with span('player_stats'):
+        counters = match_stats.get_player_counters()
+    return events, lineups, counters
+
+
+def encode_match_summary(match_id: int, events, lineups, counters):
+    '''Função que codifica as seções compactas da partida (utils.prompt_encoder.encode_match)'''
+    from utils.player_stats import PLAYER_STATS_KEYS
+    from utils.prompt_encoder import encode_match
+
+    with span('encode_prompt'):
+        encoded = encode_match(
+            events=events,
+            lineups=lineups,
+            counters=counters,
+            stat_columns=PLAYER_STATS_KEYS
+        )
+    logger.info('Prompt da partida %s: %s tokens %s, %s eventos descartados',
+                match_id, encoded.total_tokens, encoded.token_counts, encoded.dropped_events)
+    metrics.observe('prompt_tokens', encoded.total_tokens, endpoint='match_summary')
+    return encoded
+
+
+def summary_match_context(match_id: int, encoded=None) -> MatchContext:
+    '''
+    Contexto da partida compartilhado pelo resumo e pelos perfis, montado uma vez por partida
+    Args:
+        match_id (int): ID da partida
+        encoded (EncodedPrompt, optional): Seções já codificadas; carregadas da partida se None
+    '''
+    return match_context(match_id, lambda: encoded if encoded is not None
+                         else encode_match_summary(match_id, *load_match_data(match_id)))
+
+
+def match_summary_instruction(match_info: str) -> str:
+    '''Instrução do resumo, enviada depois do contexto da partida'''
+    return (f'''
+                Elabore um resumo envolvente e informativo do jogo descrito nos dados da partida acima, em português:
+                - Match Info: {match_info} - contêm informações gerais da partida como data, estádio, times, placar, nome da competição.
+                Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas, como por exemplo adivinhar a ordem dos eventos da partida.
+                O objetivo é criar um texto cativante e acessível, destacando os principais acontecimentos e aspectos interessantes da partida.
+                O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo, com o tom escolhido pelo usuário.
+                Mencione a data da partida explicitamente, sem utilizar termos como 'hoje'.
+                Não use termos como de acordo com os dados que me foram fornecidos, ou algo do tipo.
+                Focalize os momentos-chave do jogo, não entre em detalhes excessivos sobre cada jogador.
+                ''')
+
+
+def inline_prompt(context: MatchContext, instruction: str) -> str:
+    '''Prompt completo, com o contexto antes da instrução, usado quando o contexto não está em cache'''
+    return f'{context.text}\n{instruction}'
+
+
+@dataclass
+class CachedContext:
+    name: str
+    tokens: int
+    created_at: float
+    expires_at: float
+    uses: int = 0
+
+
+class ContextCache:
+    '''
+    Contextos de partida registrados no cached content do provedor do LLM.
+    Cada contexto é enviado uma única vez e reaproveitado por todas as perguntas
+    sobre a partida até expirar (TTL); acima de `maxsize` contextos, o usado há
+    mais tempo é removido do provedor. Contextos pequenos demais para o provedor
+    continuam indo no prompt.
+    '''
+
+    def __init__(self, ttl: int = CONTEXT_CACHE_TTL, maxsize: int = CONTEXT_CACHE_MAXSIZE,
+                 enabled: bool = CONTEXT_CACHE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._flight = SingleFlight('context_cache')
+        self._deletions = set()
+        self.hits = 0
+        self.creates = 0
+        self.inline = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+
+    def _expire(self) -> None:
+        '''Descarta os contextos perto de expirar; o provedor os remove sozinho ao fim do TTL'''
+        now = time.time()
+        for key in [key for key, entry in self._entries.items()
+                    if entry.expires_at - CONTEXT_CACHE_MARGIN <= now]:
+            del self._entries[key]
+            self.expirations += 1
+            metrics.inc('context_cache_expirations_total')
+
+    def _evict(self, gateway) -> None:
+        '''Remove do provedor os contextos usados há mais tempo além de maxsize'''
+        while len(self._entries) > self.maxsize:
+            _, entry = self._entries.popitem(last=False)
+            self.evictions += 1
+            metrics.inc('context_cache_evictions_total')
+            task = asyncio.ensure_future(self._delete(gateway, entry))
+            self._deletions.add(task)
+            task.add_done_callback(self._deletions.discard)
+
+    @staticmethod
+    async def _delete(gateway, entry: CachedContext) -> None:
+        try:
+            await gateway.delete_cache(entry.name)
+        except Exception as e:
+            logger.warning(f'Falha ao remover o contexto {entry.name} do provedor: {e}')
+
+    async def _create(self, gateway, context: MatchContext) -> CachedContext:
+        with span('context_cache_create'):
+            name = await gateway.create_cache(CONTEXT_CACHE_MODEL, context.text, self.ttl,
+                                              display_name=context.key)
+        now = time.time()
+        entry = CachedContext(name, context.tokens, now, now + self.ttl)
+        self._entries[context.key] = entry
+        self.creates += 1
+        metrics.inc('context_cache_creates_total')
+        metrics.inc('context_cache_tokens_total', context.tokens)
+        self._evict(gateway)
+        return entry
+
+    async def acquire(self, gateway, context: MatchContext):
+        '''
+        Função que retorna o nome do contexto em cache no provedor, registrando-o
+        na primeira pergunta sobre a partida. Perguntas simultâneas sobre a mesma
+        partida esperam o mesmo registro.
+        Args:
+            gateway (LLMGateway): Gateway do LLM
+            context (MatchContext): Contexto da partida
+        Returns:
+            str: Nome do contexto em cache, ou None quando o contexto deve ir no prompt
+        '''
+        minimum = max(CONTEXT_CACHE_MIN_TOKENS, gateway.backend.min_cache_tokens(CONTEXT_CACHE_MODEL))
+        if not self.enabled or context.tokens < minimum:
+            self.inline += 1
+            metrics.inc('context_cache_inline_total')
+            return None
+
+        self._expire()
+        entry = self._entries.get(context.key)
+        if entry is not None:
+            self._entries.move_to_end(context.key)
+            self.hits += 1
+            metrics.inc('context_cache_hits_total')
+        else:
+            try:
+                entry = await self._flight.do(context.key, lambda: self._create(gateway, context))
+            except LLMError as e:
+                # Sem o cache o contexto vai no prompt, como antes
+                self.errors += 1
+                metrics.inc('context_cache_errors_total', error=type(e).__name__)
+                logger.warning(f'Falha ao registrar o contexto {context.key} no provedor: {e.message}')
+                return None
+        entry.uses += 1
+        return entry.name
+
+    def invalidate(self, context: MatchContext) -> None:
+        '''Esquece o contexto, por exemplo quando o provedor informa que ele não existe mais'''
+        if self._entries.pop(context.key, None) is not None:
+            metrics.inc('context_cache_invalidations_total')
+
+    def stats(self) -> dict:
+        '''Contextos em cache, usos de cada um e contadores do ciclo de vida'''
+        now = time.time()
+        requests = self.hits + self.creates
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'creates': self.creates,
+            'inline': self.inline,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'errors': self.errors,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'cached_tokens': sum(entry.tokens for entry in self._entries.values()),
+            'contexts': {key: {'uses': entry.uses, 'tokens': entry.tokens,
+                               'expires_in': round(entry.expires_at - now, 1)}
+                         for key, entry in self._entries.items()}
+        }
+
+
+context_cache = ContextCache()
@@ -1,8 +1,135 @@
 from statsbombpy import sb
-import json
+import logging
 from copy import copy
+import numpy as np
+import pandas as pd
 from utils.cache_manager import cache_manager
-import requests_cache
+from utils.event_cache import event_cache, projection_cache
+from utils.event_store import event_store
+from utils.match_index import MatchIndex, match_index_cache
+from utils.player_stats import compute_player_counters, PLAYER_STATS_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Colunas dos eventos enviadas ao LLM
+EVENT_COLUMNS = ['timestamp', 'team', 'type', 'period',
+                 'minute', 'x', 'y', 'end_x', 'end_y', 'player']
+
+# Colunas mantidas em memória; as demais colunas do statsbombpy são descartadas
+KEEP_COLUMNS = ['id', 'index', 'period', 'timestamp', 'minute', 'second', 'possession',
+                'type', 'team', 'player', 'pass_recipient', 'pass_outcome', 'pass_goal_assist',
+                'shot_outcome', 'shot_type', 'dribble_outcome', 'foul_committed_card']
+
+# Colunas de texto com poucos valores distintos, guardadas como categóricas
+CATEGORICAL_COLUMNS = ['type', 'team', 'player', 'pass_recipient', 'pass_outcome',
+                       'shot_outcome', 'shot_type', 'dribble_outcome', 'foul_committed_card']
+
+# Coordenadas planas (float32) e a coluna de lista do statsbombpy de onde vêm
+COORDINATE_COLUMNS = {'x': ('location', 0), 'y': ('location', 1),
+                      'end_x': ('pass_end_location', 0), 'end_y': ('pass_end_location', 1)}
+
+
+def _split_coordinates(points: pd.Series) -> np.ndarray:
+    '''Converte uma coluna de listas [x, y, ...] em um array (n, 2) float32, com NaN quando ausente'''
+    coordinates = np.full((len(points), 2), np.nan, dtype=np.float32)
+    for position, point in enumerate(points.tolist()):
+        if isinstance(point, (list, tuple, np.ndarray)) and len(point) >= 2:
+            coordinates[position] = point[:2]
+    return coordinates
+
+
+def normalize_events(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Função que converte os eventos do statsbombpy em uma representação compacta:
+    apenas as colunas usadas pela aplicação, textos repetidos como categóricas e
+    as listas location/pass_end_location como colunas float32 x, y, end_x e end_y
+    Args:
+        events (pd.DataFrame): Eventos como retornados por sb.events (ou parte das colunas)
+    Returns:
+        pd.DataFrame: Eventos normalizados
+    '''
+    before = events.memory_usage(deep=True).sum()
+
+    normalized = events[[column for column in KEEP_COLUMNS if column in events]].copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in normalized:
+            normalized[column] = normalized[column].astype('category')
+    for column in ('index', 'period', 'minute', 'second', 'possession'):
+        if column in normalized:
+            normalized[column] = pd.to_numeric(normalized[column], downcast='integer')
+
+    for source in ('location', 'pass_end_location'):
+        if source in events:
+            coordinates = _split_coordinates(events[source])
+            for column, (origin, axis) in COORDINATE_COLUMNS.items():
+                if origin == source:
+                    normalized[column] = coordinates[:, axis]
+
+    after = normalized.memory_usage(deep=True).sum()
+    logger.info('Eventos normalizados: %.2f MB -> %.2f MB (%d linhas)',
+                before / 1e6, after / 1e6, len(normalized))
+    return normalized
+
+
+def _source_columns(columns: list) -> list:
+    '''Colunas do armazenamento local necessárias para gerar as colunas normalizadas pedidas'''
+    sources = []
+    for column in columns:
+        source = COORDINATE_COLUMNS[column][0] if column in COORDINATE_COLUMNS else column
+        if source not in sources:
+            sources.append(source)
+    return sources
+
+
+def load_events(match_id: int, columns=None) -> pd.DataFrame:
+    '''
+    Função que retorna os eventos normalizados de uma partida a partir do cache,
+    lendo do armazenamento local (ou da API StatsBomb) apenas na primeira vez.
+    O DataFrame retornado é compartilhado e não deve ser modificado.
+    Args:
+        match_id (int): ID da partida
+        columns (list, optional): Colunas normalizadas necessárias. Todas, se None
+    Returns:
+        pd.DataFrame: DataFrame com os eventos da partida
+    '''
+    match_id = int(match_id)
+    if columns is None:
+        return event_cache.get_or_load(
+            match_id, lambda: normalize_events(event_store.load(match_id)))
+
+    events = event_cache.peek(match_id)
+    if events is not None:
+        return events[[column for column in columns if column in events]]
+
+    columns = tuple(columns)
+
+    def load_projection():
+        events = normalize_events(event_store.load(match_id, _source_columns(columns)))
+        return events[[column for column in columns if column in events]]
+
+    return projection_cache.get_or_load((match_id, columns), load_projection)
+
+
+def frame_records(frame: pd.DataFrame) -> list:
+    '''
+    Função que converte um DataFrame em uma lista de dicts com tipos nativos:
+    categóricas viram texto e valores ausentes (NaN) viram None
+    '''
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None).to_dict('records')
+
+
+def load_match_index(match_id: int) -> MatchIndex:
+    '''
+    Função que retorna o índice da partida a partir do cache, construindo-o
+    a partir dos eventos apenas na primeira vez
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        MatchIndex: Índice da partida
+    '''
+    match_id = int(match_id)
+    return match_index_cache.get_or_load(match_id, lambda: MatchIndex(load_events(match_id)))
 
 
 class PlayerStatsError(Exception):
@@ -16,79 +143,98 @@ class PlayerStatsError(Exception):
 class GetMatchStats:
     def __init__(self, match_id):
         self.match_id = int(match_id)
-        self.session = requests_cache.CachedSession(
-            'statsbomb_cache',
-            backend='sqlite',
-            expire_after=3600
-        )
-
-    def get_events(self) -> str:
-        '''Função que retorna os eventos de uma partida em formato JSON
-        Args:
-            match_id (int): ID da partida
+
+    def get_events_frame(self):
+        '''
+        Função que retorna os eventos de uma partida como DataFrame, ordenados no tempo
         Returns:
-            str: JSON com os eventos da partida
+            pd.DataFrame: DataFrame com as colunas de EVENT_COLUMNS
+        '''
+        events = load_events(self.match_id, columns=EVENT_COLUMNS)
+        return events.sort_values(['minute', 'timestamp'])
+
+    def get_lineups_frames(self) -> dict:
+        '''
+        Função que retorna as escalações de uma partida
+        Returns:
+            dict: Dicionário time -> DataFrame com a escalação
+        '''
+        return sb.lineups(match_id=self.match_id)
+
+    def get_player_counters(self):
+        '''
+        Função que retorna os contadores de todos os jogadores da partida
+        Returns:
+            pd.DataFrame: DataFrame indexado pelo jogador, ver utils.player_stats
+        '''
+        all_players = load_match_index(self.match_id).players
+        counters = compute_player_counters(load_events(self.match_id))
+        return counters[counters.index.isin(all_players)]
+
+    def get_events(self) -> list:
+        '''Função que retorna os eventos de uma partida como registros
+        Returns:
+            list: Eventos da partida (um dict por evento), ou dict com a chave error
         '''
         try:
-            events = sb.events(match_id=self.match_id)
-            events = events[['timestamp', 'team', 'type',
-                             'minute', 'location', 'pass_end_location', 'player']]
-            events = events.sort_values(['minute', 'timestamp'])
-            return json.dumps(events.to_dict('records'), indent=4)
+            return frame_records(self.get_events_frame())
         except Exception as e:
-            return json.dumps({"error": f"Error getting events: {str(e)}"}, indent=4)
+            return {"error": f"Error getting events: {str(e)}"}
 
-    def get_lineups(self) -> str:
+    def get_lineups(self) -> dict:
         '''
-        Função que retorna as escalações de uma partida em formato JSON
-        Args:
-            match_id (int): ID da partida
+        Função que retorna as escalações de uma partida
         Returns:
-            str: JSON com as escalações da partida
+            dict: Time -> lista de jogadores, ou dict com a chave error
         '''
         try:
-            lineups = sb.lineups(match_id=self.match_id)
-            return json.dumps(lineups, indent=4)
+            return {team: frame_records(lineup)
+                    for team, lineup in self.get_lineups_frames().items()}
         except Exception as e:
-            return json.dumps({"error": f"Error getting lineups: {str(e)}"}, indent=4)
+            return {"error": f"Error getting lineups: {str(e)}"}
 
-    def get_player_stats(self) -> str:
+    def get_player_stats(self) -> list:
         '''
-        Função que retorna as estatísticas dos jogadores de uma partida em formato JSON
-        Args:
-            match_id (int): ID da partida
+        Função que retorna as estatísticas dos jogadores de uma partida
         Returns:
-            str: JSON com as estatísticas dos jogadores da partida
+            list: Jogador, time e estatísticas de cada jogador, ou dict com a chave error
         '''
         try:
-            events = sb.events(match_id=self.match_id)
-            all_players = self.get_all_players(events)
-
             all_stats = []
-            for player_name in all_players:
-                player_events = events[events['player'] == player_name]
-                stats = {
+            for player_name, row in self.get_player_counters().iterrows():
+                statistics = {key: int(row[key]) for key in PLAYER_STATS_KEYS}
+                statistics['minutes_played'] = int(row['minutes_played'])
+                all_stats.append({
                     "player": player_name,
-                    "team": player_events['team'].iloc[0] if not player_events.empty else None,
-                    "statistics": {
-                        "passes_completed": int(player_events[(player_events['type'] == 'Pass') & (player_events['pass_outcome'].isna())].shape[0]),
-                        "passes_attempted": int(player_events[player_events['type'] == 'Pass'].shape[0]),
-                        "shots": int(player_events[player_events['type'] == 'Shot'].shape[0]),
-                        "shots_on_target": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'On Target')].shape[0]),
-                        "goals": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'Goal')].shape[0]),
-                        "assists": int(player_events[player_events['pass_goal_assist'] == True].shape[0]),
-                        "fouls_committed": int(player_events[player_events['type'] == 'Foul Committed'].shape[0]),
-                        "fouls_won": int(player_events[player_events['type'] == 'Foul Won'].shape[0]),
-                        "tackles": int(player_events[player_events['type'] == 'Tackle'].shape[0]),
-                        "interceptions": int(player_events[player_events['type'] == 'Interception'].shape[0]),
-                        "minutes_played": int(player_events['minute'].max() if not player_events.empty else 0)
-                    }
-                }
-                all_stats.append(stats)
-
-            return json.dumps(all_stats, indent=4)
+                    "team": row['team'],
+                    "statistics": statistics
+                })
+
+            return all_stats
         except Exception as e:
-            return json.dumps({"error": f"Error getting player stats: {str(e)}"}, indent=4)
+            return {"error": f"Error getting player stats: {str(e)}"}
+
+    def get_roster(self) -> dict:
+        '''
+        Função que retorna os times e os jogadores de cada time na partida
+        Returns:
+            dict: home_team, away_team, home_players e away_players
+        '''
+        return load_match_index(self.match_id).roster()
+
+    def get_player_passes(self, player_name: str) -> dict:
+        '''
+        Função que retorna os passes de um jogador como arrays de coordenadas
+        Args:
+            player_name (str): Nome completo do jogador
+        Returns:
+            dict: Listas x, y, end_x, end_y (arredondadas) e completed (passe sem outcome)
+        '''
+        passes = load_match_index(self.match_id).player_events(player_name, 'Pass')
+        payload = {column: passes[column].astype(float).round(1).tolist()
+                   for column in ('x', 'y', 'end_x', 'end_y')}
+        payload['completed'] = passes['pass_outcome'].isna().tolist()
+        return payload
 
     @staticmethod
     def get_all_players(events_df):
@@ -100,17 +246,6 @@ class GetMatchStats:
             list: Lista com os nomes de todos os jogadores que participaram da partida
         '''
         try:
-            home_team = events_df[events_df['type']
-                                  == 'Starting XI'].iloc[0]['team']
-            away_team = [team for team in events_df['team'].unique()
-                         if team != home_team][0]
-
-            home_team_events = events_df[events_df['team'] == home_team]
-            away_team_events = events_df[events_df['team'] == away_team]
-
-            home_team_players = home_team_events['player'].dropna().unique()
-            away_team_players = away_team_events['player'].dropna().unique()
-
-            return list(set(home_team_players).union(set(away_team_players)))
+            return MatchIndex(events_df).players
         except Exception as e:
             raise PlayerStatsError(f"Error getting players: {str(e)}")
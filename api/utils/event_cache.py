@@ -0,0 +1,115 @@
+import os
+import threading
+from concurrent.futures import Future
+from cachetools import TTLCache
+
+EVENT_CACHE_MAXSIZE = int(os.getenv('EVENT_CACHE_MAXSIZE', 32))
+EVENT_CACHE_TTL = int(os.getenv('EVENT_CACHE_TTL', 3600))
+# Projeções (subconjuntos de colunas) ficam em um cache próprio, para não tirar partidas inteiras do event_cache
+PROJECTION_CACHE_MAXSIZE = int(os.getenv('PROJECTION_CACHE_MAXSIZE', 16))
+
+
+class MatchCache:
+    '''
+    Cache LRU em memória, limitado em tamanho e com expiração (TTL),
+    compartilhado por todo o processo e indexado pelo match_id.
+    Threads que pedem a mesma chave enquanto ela está sendo carregada
+    aguardam o mesmo carregamento em vez de repeti-lo.
+    '''
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_load(self, key, loader):
+        '''
+        Função que retorna o valor em cache para a chave ou o carrega com o loader
+        Args:
+            key: Chave do cache (normalmente o match_id)
+            loader (callable): Função sem argumentos que carrega o valor
+        Returns:
+            O valor em cache ou o valor recém-carregado
+        '''
+        with self._lock:
+            try:
+                value = self._cache[key]
+                self.hits += 1
+                return value
+            except KeyError:
+                pass
+            future = self._loading.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = self._loading[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = value
+            del self._loading[key]
+        future.set_result(value)
+        return value
+
+    def get(self, key):
+        '''Retorna o valor em cache para a chave, ou None, contando o acerto ou a falha'''
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def peek(self, key):
+        '''Retorna o valor em cache para a chave, ou None, sem alterar os contadores'''
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value) -> None:
+        '''Guarda um valor já carregado no cache'''
+        with self._lock:
+            self._cache[key] = value
+
+    def invalidate(self, key=None):
+        '''Remove uma chave do cache ou, sem argumentos, limpa o cache inteiro'''
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def stats(self) -> dict:
+        '''Retorna os contadores de acertos e falhas do cache'''
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._cache),
+                'maxsize': self._cache.maxsize,
+                'ttl': self._cache.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'loading': len(self._loading),
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+event_cache = MatchCache(maxsize=EVENT_CACHE_MAXSIZE, ttl=EVENT_CACHE_TTL)
+projection_cache = MatchCache(maxsize=PROJECTION_CACHE_MAXSIZE, ttl=EVENT_CACHE_TTL)
+
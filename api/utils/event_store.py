@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
+from statsbombpy import sb
+
+EVENT_STORE_PATH = os.getenv('EVENT_STORE_PATH', 'event_store')
+
+
+class EventStore:
+    '''
+    Armazenamento local e colunar (Parquet) dos eventos já processados de cada partida.
+    Partidas históricas não mudam, então cada partida é buscada e convertida uma única vez.
+    '''
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, match_id: int) -> str:
+        return os.path.join(self.root, f'{int(match_id)}.parquet')
+
+    def has(self, match_id: int) -> bool:
+        return os.path.exists(self.path(match_id))
+
+    def write(self, match_id: int, events) -> None:
+        '''
+        Função que grava os eventos de uma partida em um arquivo Parquet.
+        Colunas com dicionários (ex: tactics) são gravadas como strings JSON,
+        já que o schema desses objetos varia entre os eventos.
+        Args:
+            match_id (int): ID da partida
+            events (pd.DataFrame): DataFrame com os eventos da partida
+        '''
+        os.makedirs(self.root, exist_ok=True)
+        events = events.copy()
+        for column in events.columns[events.dtypes == object]:
+            if events[column].map(lambda value: isinstance(value, dict)).any():
+                events[column] = events[column].map(
+                    lambda value: json.dumps(value) if isinstance(value, dict) else None)
+
+        table = pa.Table.from_pandas(events, preserve_index=False)
+        # Arquivo temporário único por processo/thread, já que workers diferentes
+        # podem buscar a mesma partida ao mesmo tempo
+        tmp_path = f'{self.path(match_id)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, self.path(match_id))
+
+    def read(self, match_id: int, columns=None):
+        '''
+        Função que lê os eventos de uma partida do disco com memory map,
+        carregando apenas as colunas pedidas
+        Args:
+            match_id (int): ID da partida
+            columns (list, optional): Colunas a carregar. Todas, se None
+        Returns:
+            pd.DataFrame: DataFrame com os eventos da partida
+        '''
+        path = self.path(match_id)
+        if columns is not None:
+            available = set(pq.read_schema(path, memory_map=True).names)
+            columns = [column for column in columns if column in available]
+
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        events = table.to_pandas()
+
+        # Colunas de lista (ex: location) voltam como listas, igual ao statsbombpy
+        for field in table.schema:
+            if pa.types.is_list(field.type):
+                events[field.name] = events[field.name].map(
+                    lambda value: value.tolist() if value is not None else None)
+        return events
+
+    def fetch(self, match_id: int):
+        '''Busca os eventos da partida na API StatsBomb e os grava no disco'''
+        events = sb.events(match_id=int(match_id))
+        self.write(match_id, events)
+        return events
+
+    def load(self, match_id: int, columns=None):
+        '''
+        Função que retorna os eventos de uma partida do disco, buscando
+        na API StatsBomb apenas se a partida ainda não estiver armazenada
+        Args:
+            match_id (int): ID da partida
+            columns (list, optional): Colunas a carregar. Todas, se None
+        Returns:
+            pd.DataFrame: DataFrame com os eventos da partida
+        '''
+        if self.has(match_id):
+            return self.read(match_id, columns)
+
+        events = self.fetch(match_id)
+        if columns is not None:
+            events = events[[column for column in columns if column in events]]
+        return events
+
+    def warm(self, competition_id: int, season_id: int) -> list:
+        '''
+        Função que pré-carrega no disco todas as partidas de uma competição/temporada
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            list: IDs das partidas que foram buscadas na API
+        '''
+        matches = sb.matches(competition_id=competition_id,
+                             season_id=season_id, fmt='dict')
+        fetched = []
+        for match_id in matches:
+            if self.has(match_id):
+                continue
+            self.fetch(match_id)
+            fetched.append(match_id)
+            print(f'Partida {match_id} armazenada ({len(fetched)})')
+        return fetched
+
+
+event_store = EventStore(EVENT_STORE_PATH)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Pré-carrega os eventos de uma competição/temporada no armazenamento local')
+    parser.add_argument('--competition-id', type=int, required=True)
+    parser.add_argument('--season-id', type=int, required=True)
+    args = parser.parse_args()
+
+    fetched = event_store.warm(args.competition_id, args.season_id)
+    print(f'{len(fetched)} partidas novas em {event_store.root}')
@@ -0,0 +1,38 @@
+import hashlib
+from fastapi import Request, Response
+from utils.serialization import (negotiate_media_type, negotiate_encoding, encode, compress,
+                                 COMPRESSION_MIN_BYTES)
+
+DATA_MAX_AGE = 300
+
+
+def etag_response(request: Request, payload) -> Response:
+    '''
+    Função que serializa o payload no formato pedido em Accept (JSON compacto ou
+    MessagePack), comprime corpos grandes conforme Accept-Encoding (zstd ou gzip)
+    e responde 304 sem corpo quando o cliente já tem a mesma versão (ETag)
+    Args:
+        request (Request): Requisição, de onde vêm Accept, Accept-Encoding e If-None-Match
+        payload: Dados nativos (dicts, listas, arrays do NumPy)
+    Returns:
+        Response: Resposta 200 com o corpo serializado ou 304
+    '''
+    media_type = negotiate_media_type(request.headers.get('accept'))
+    body = encode(payload, media_type)
+    encoding = None
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+
+    # Cada representação (formato e compressão) tem o seu ETag
+    digest = hashlib.sha1(body)
+    digest.update(media_type.encode('ascii'))
+    etag = '"' + digest.hexdigest() + (f'-{encoding}' if encoding else '') + '"'
+    headers = {'ETag': etag, 'Cache-Control': f'max-age={DATA_MAX_AGE}',
+               'Vary': 'Accept, Accept-Encoding'}
+
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
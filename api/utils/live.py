@@ -0,0 +1,429 @@
+import asyncio
+import logging
+import os
+import time
+from utils.metrics import metrics
+
+# Velocidade padrão da reprodução: segundos de jogo por segundo real (0 = sem pausas)
+LIVE_REPLAY_SPEED = float(os.getenv('LIVE_REPLAY_SPEED', 60))
+# Mensagens pendentes por assinante; quem fica para trás recebe um snapshot novo
+LIVE_QUEUE_SIZE = int(os.getenv('LIVE_QUEUE_SIZE', 1000))
+LIVE_MAX_MATCHES = int(os.getenv('LIVE_MAX_MATCHES', 8))
+
+# Período da disputa de pênaltis, cujos gols não entram no placar
+SHOOTOUT_PERIOD = 5
+
+# Informações do evento repassadas aos assinantes em cada atualização
+DELTA_EVENT_KEYS = ['index', 'period', 'minute', 'second', 'team', 'player', 'type']
+
+logger = logging.getLogger(__name__)
+
+
+class LiveError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def _text(value):
+    '''Nome de time/jogador, ou None quando ausente'''
+    return value if isinstance(value, str) else None
+
+
+def _missing(value) -> bool:
+    '''Valor ausente, como None (utils.dataprep.frame_records) ou NaN'''
+    return value is None or value != value
+
+
+def _coordinate(value):
+    return None if _missing(value) else round(float(value), 1)
+
+
+def _offer(queue: asyncio.Queue, message: dict, snapshot) -> bool:
+    '''
+    Entrega a mensagem ao assinante sem bloquear a ingestão. Com a fila cheia,
+    as mensagens pendentes são trocadas por um snapshot do estado atual
+    Returns:
+        bool: False quando o assinante ficou para trás e recebeu um snapshot
+    '''
+    try:
+        queue.put_nowait(message)
+        return True
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(snapshot())
+        if message['type'] == 'end':
+            queue.put_nowait(message)
+        return False
+
+
+class LiveMatch:
+    '''
+    Estado de uma partida alimentado evento a evento, como em uma transmissão ao vivo:
+    contadores por jogador e por time, elencos, placar, passes e as linhas de eventos
+    já codificadas para o prompt. Cada evento custa O(1), sem reprocessar os anteriores,
+    e gera uma atualização (delta) entregue a todos os assinantes.
+    '''
+
+    def __init__(self, match_id: int):
+        # Importado aqui para que importar a API não carregue pandas
+        from utils.prompt_encoder import NameDictionary
+
+        self.match_id = int(match_id)
+        self.status = 'pending'
+        self.speed = None
+        self.seq = 0
+        self.last_index = None
+        self.clock = {'period': 0, 'minute': 0, 'second': 0}
+        self.home_team = None
+        self.rosters = {}
+        self.player_teams = {}
+        self.player_stats = {}
+        self.team_stats = {}
+        self.score = {}
+        self.shootout = {}
+        self.passes = {}
+        self.pass_links = {}
+        self.names = NameDictionary()
+        self.event_rows = []
+        self.priority_rows = []
+        self.subscribers = set()
+        self.task = None
+        self.started_at = None
+        self.finished_at = None
+
+    def _team(self, team: str) -> dict:
+        '''Registra o time na primeira aparição e retorna os contadores dele'''
+        from utils.player_stats import STAT_SPECS
+
+        if team not in self.team_stats:
+            self.rosters[team] = []
+            self.score[team] = 0
+            self.shootout[team] = 0
+            self.team_stats[team] = dict.fromkeys(STAT_SPECS, 0)
+        return self.team_stats[team]
+
+    def ingest(self, event: dict):
+        '''
+        Função que aplica um evento ao estado da partida em O(1)
+        Args:
+            event (dict): Evento normalizado (colunas de utils.dataprep), em ordem cronológica
+        Returns:
+            dict: Atualização enviada aos assinantes, ou None para eventos repetidos
+        '''
+        from utils.player_stats import STAT_SPECS, event_stats
+        from utils.prompt_encoder import encode_event, LOW_SIGNAL_TYPES, PRIORITY_TYPES
+
+        index = event.get('index')
+        if index is not None and self.last_index is not None and index <= self.last_index:
+            metrics.inc('live_duplicate_events_total')
+            return None
+        self.last_index = index
+        self.seq += 1
+        self.clock = {key: event.get(key) or 0 for key in ('period', 'minute', 'second')}
+        delta = {'type': 'delta', 'seq': self.seq,
+                 'event': {key: event.get(key) for key in DELTA_EVENT_KEYS}}
+
+        team, player, event_type = _text(event.get('team')), _text(event.get('player')), event.get('type')
+        matched = event_stats(event)
+        if team is not None:
+            team_stats = self._team(team)
+            if event_type == 'Starting XI' and self.home_team is None:
+                self.home_team = team
+            for name in matched:
+                team_stats[name] += 1
+            if matched:
+                delta['team_stats'] = {team: {name: team_stats[name] for name in matched}}
+            if event.get('period') == SHOOTOUT_PERIOD:
+                if 'goals' in matched:
+                    self.shootout[team] += 1
+                    delta['shootout'] = dict(self.shootout)
+            elif 'goals' in matched or event_type == 'Own Goal For':
+                self.score[team] += 1
+                delta['score'] = dict(self.score)
+
+        if player is not None and team is not None:
+            stats = self.player_stats.get(player)
+            if stats is None:
+                stats = self.player_stats[player] = dict.fromkeys(STAT_SPECS, 0)
+                stats['minutes_played'] = 0
+                self.player_teams[player] = team
+                self.rosters[team].append(player)
+                delta['roster'] = {'team': team, 'player': player}
+            for name in matched:
+                stats[name] += 1
+            changed = {name: stats[name] for name in matched}
+            if self.clock['minute'] > stats['minutes_played']:
+                stats['minutes_played'] = changed['minutes_played'] = self.clock['minute']
+            if changed:
+                delta['player_stats'] = {player: changed}
+
+        if event_type == 'Pass' and player is not None:
+            delta['pass'] = self._add_pass(player, event)
+
+        if event_type not in LOW_SIGNAL_TYPES:
+            self.event_rows.append(encode_event(event, self.names))
+            self.priority_rows.append(event_type in PRIORITY_TYPES)
+
+        metrics.inc('live_events_total')
+        self._publish(delta)
+        return delta
+
+    def _add_pass(self, player: str, event: dict) -> dict:
+        '''Acrescenta o passe às coordenadas do jogador e à rede de passes concluídos'''
+        completed = _missing(event.get('pass_outcome'))
+        recipient = _text(event.get('pass_recipient'))
+        passes = self.passes.setdefault(player, {'x': [], 'y': [], 'end_x': [], 'end_y': [], 'completed': []})
+        for column in ('x', 'y', 'end_x', 'end_y'):
+            passes[column].append(_coordinate(event.get(column)))
+        passes['completed'].append(completed)
+        if completed and recipient is not None:
+            links = self.pass_links.setdefault(player, {})
+            links[recipient] = links.get(recipient, 0) + 1
+        return {'player': player, 'recipient': recipient, 'completed': completed,
+                'x': passes['x'][-1], 'y': passes['y'][-1],
+                'end_x': passes['end_x'][-1], 'end_y': passes['end_y'][-1]}
+
+    def roster(self) -> dict:
+        '''
+        Times e jogadores que já apareceram, no formato de GetMatchStats.get_roster.
+        O mandante é o time do primeiro 'Starting XI', como em utils.match_index.
+        '''
+        teams = list(self.rosters)
+        home_team = self.home_team or (teams[0] if teams else None)
+        away_team = next((team for team in teams if team != home_team), None)
+        return {
+            'home_team': home_team,
+            'away_team': away_team,
+            'home_players': list(self.rosters.get(home_team, [])),
+            'away_players': list(self.rosters.get(away_team, []))
+        }
+
+    def player_passes(self, player_name: str) -> dict:
+        '''Passes do jogador até agora, no formato de GetMatchStats.get_player_passes'''
+        if player_name not in self.player_stats:
+            raise LiveError(f'Jogador {player_name} ainda não apareceu na partida.')
+        passes = self.passes.get(player_name, {'x': [], 'y': [], 'end_x': [], 'end_y': [], 'completed': []})
+        return {column: list(values) for column, values in passes.items()}
+
+    def snapshot(self) -> dict:
+        '''Estado completo da partida, enviado a cada novo assinante'''
+        return {
+            'type': 'snapshot',
+            'match_id': self.match_id,
+            'status': self.status,
+            'seq': self.seq,
+            'clock': dict(self.clock),
+            'roster': self.roster(),
+            'score': dict(self.score),
+            'shootout': dict(self.shootout),
+            'player_stats': {player: dict(stats) for player, stats in self.player_stats.items()},
+            'team_stats': {team: dict(stats) for team, stats in self.team_stats.items()},
+            'pass_links': {player: dict(links) for player, links in self.pass_links.items()}
+        }
+
+    def encode(self, budget: int = None):
+        '''
+        Função que monta as seções do prompt da partida a partir do estado atual,
+        com as linhas de eventos codificadas na ingestão, sem reprocessar os eventos
+        Args:
+            budget (int, optional): Orçamento de tokens; PROMPT_TOKEN_BUDGET se None
+        Returns:
+            EncodedPrompt: Seções 'lineups', 'player_stats', 'events' e 'legend', como em encode_match
+        '''
+        from utils.player_stats import PLAYER_STATS_KEYS
+        from utils.prompt_encoder import EncodedPrompt, fit_rows, estimate_tokens, PROMPT_TOKEN_BUDGET
+
+        if budget is None:
+            budget = PROMPT_TOKEN_BUDGET
+        names = self.names
+        encoded = EncodedPrompt()
+        encoded.add('lineups', '\n'.join(
+            f"{names.team(team)}: {', '.join(names.player(player) for player in players)}"
+            for team, players in self.rosters.items()))
+
+        lines = ['jogador,time,minutos,' + ','.join(PLAYER_STATS_KEYS)]
+        for player, stats in self.player_stats.items():
+            values = [stats[key] for key in PLAYER_STATS_KEYS]
+            if any(values):
+                lines.append(','.join([names.player(player), names.team(self.player_teams[player]),
+                                       str(stats['minutes_played'])] + [str(value) for value in values]))
+        encoded.add('player_stats', '\n'.join(lines))
+
+        remaining = budget - encoded.total_tokens - estimate_tokens(names.legend()) - 500
+        events_text, encoded.dropped_events = fit_rows(self.event_rows, self.priority_rows, max(remaining, 0))
+        encoded.add('events', events_text)
+        encoded.add('legend', names.legend())
+        return encoded
+
+    def _publish(self, message: dict) -> None:
+        for queue in list(self.subscribers):
+            if not _offer(queue, message, self.snapshot):
+                metrics.inc('live_resyncs_total')
+
+    def subscribe(self) -> asyncio.Queue:
+        '''Fila de mensagens de um novo assinante, começando pelo snapshot do estado atual'''
+        queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        queue.put_nowait(self.snapshot())
+        if self.finished_at is not None:
+            queue.put_nowait({'type': 'end', 'status': self.status, 'seq': self.seq})
+        else:
+            self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    async def updates(self):
+        '''
+        Função geradora com as mensagens de um assinante: o snapshot, as atualizações
+        de cada evento e, ao fim da partida, uma mensagem 'end'
+        Yields:
+            dict: Mensagens 'snapshot', 'delta' ou 'end'
+        '''
+        queue = self.subscribe()
+        try:
+            while True:
+                message = await queue.get()
+                yield message
+                if message['type'] == 'end':
+                    return
+        finally:
+            self.unsubscribe(queue)
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = time.time()
+        self._publish({'type': 'end', 'status': status, 'seq': self.seq})
+        self.subscribers.clear()
+
+    async def replay(self, events: list, speed: float = LIVE_REPLAY_SPEED) -> None:
+        '''
+        Função que reproduz os eventos de uma partida como uma transmissão ao vivo,
+        respeitando o intervalo de jogo entre eventos dividido por speed
+        Args:
+            events (list): Eventos normalizados (dicts) em ordem cronológica
+            speed (float): Segundos de jogo por segundo real; 0 reproduz sem pausas
+        '''
+        self.status = 'running'
+        self.speed = speed
+        self.started_at = time.time()
+        previous = None
+        try:
+            for event in events:
+                if speed > 0 and previous is not None and event.get('period') == previous.get('period'):
+                    delay = ((event['minute'] * 60 + event['second'])
+                             - (previous['minute'] * 60 + previous['second'])) / speed
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif self.seq % 100 == 0:
+                    # Sem pausas, libera o event loop de tempos em tempos
+                    await asyncio.sleep(0)
+                self.ingest(event)
+                previous = event
+        except asyncio.CancelledError:
+            self._finish('stopped')
+            raise
+        except Exception as e:
+            logger.exception(f'Falha na reprodução da partida {self.match_id}: {e}')
+            self._finish('failed')
+            return
+        self._finish('finished')
+
+    def stats(self) -> dict:
+        return {
+            'match_id': self.match_id,
+            'status': self.status,
+            'speed': self.speed,
+            'seq': self.seq,
+            'clock': dict(self.clock),
+            'score': dict(self.score),
+            'shootout': dict(self.shootout),
+            'subscribers': len(self.subscribers)
+        }
+
+
+def load_replay_events(match_id: int) -> list:
+    '''
+    Função que carrega os eventos de uma partida gravada, em ordem, para a reprodução
+    Returns:
+        list: Eventos normalizados como dicts, com ausentes como None
+    '''
+    from utils.dataprep import load_events, frame_records
+
+    events = load_events(match_id)
+    if 'index' in events:
+        events = events.sort_values('index', kind='stable')
+    return frame_records(events)
+
+
+class LiveRegistry:
+    '''
+    Partidas ao vivo desta instância da API. Acima de `max_matches`, a partida
+    encerrada há mais tempo é descartada; se todas estiverem em andamento, novas
+    reproduções são recusadas.
+    '''
+
+    def __init__(self, max_matches: int = LIVE_MAX_MATCHES):
+        self.max_matches = max_matches
+        self.matches = {}
+
+    def get(self, match_id: int):
+        return self.matches.get(int(match_id))
+
+    def _make_room(self) -> None:
+        finished = [live for live in self.matches.values() if live.finished_at is not None]
+        while len(self.matches) >= self.max_matches:
+            if not finished:
+                raise LiveError(f'Limite de {self.max_matches} partidas ao vivo atingido.')
+            oldest = min(finished, key=lambda live: live.finished_at)
+            finished.remove(oldest)
+            del self.matches[oldest.match_id]
+
+    async def start_replay(self, match_id: int, events: list, speed: float = LIVE_REPLAY_SPEED) -> LiveMatch:
+        '''
+        Função que inicia a reprodução de uma partida, reiniciando a anterior se houver
+        Args:
+            match_id (int): ID da partida
+            events (list): Eventos de load_replay_events
+            speed (float): Segundos de jogo por segundo real
+        Returns:
+            LiveMatch: Estado da partida, atualizado em segundo plano
+        '''
+        match_id = int(match_id)
+        await self.stop(match_id)
+        self.matches.pop(match_id, None)
+        self._make_room()
+        live = self.matches[match_id] = LiveMatch(match_id)
+        live.task = asyncio.create_task(live.replay(events, speed))
+        return live
+
+    async def stop(self, match_id: int) -> bool:
+        '''Interrompe a reprodução da partida; retorna False se ela não estava em andamento'''
+        live = self.get(match_id)
+        if live is None or live.task is None or live.task.done():
+            return False
+        live.task.cancel()
+        try:
+            await live.task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    def stats(self) -> list:
+        return [live.stats() for live in self.matches.values()]
+
+
+def collect_live() -> list:
+    samples = []
+    for live in live_matches.matches.values():
+        labels = {'match_id': str(live.match_id)}
+        samples.append(('live_subscribers', labels, len(live.subscribers)))
+        samples.append(('live_seq', labels, live.seq))
+    return samples
+
+
+live_matches = LiveRegistry()
+
+metrics.register_collector(collect_live)
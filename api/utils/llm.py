@@ -0,0 +1,112 @@
+from utils.app_context import app_context
+from utils.concurrency import run_blocking
+from utils.context_cache import context_cache, inline_prompt, CONTEXT_CACHE_MODEL
+from utils.llm_cache import response_cache
+from utils.llm_gateway import LLMResult, LLMCacheError
+from utils.metrics import span
+from utils.singleflight import SingleFlight
+
+MODEL = 'gemini-1.5-flash'
+
+GENERATION_CONFIG = {
+    'temperature': 0.3,
+    'max_output_tokens': 500,
+    'top_p': 0.95,
+    'top_k': 40
+}
+
+# Gerações simultâneas do mesmo prompt compartilham uma única chamada ao modelo
+llm_flight = SingleFlight('llm_generate')
+
+
+def cache_key(prompt: str) -> str:
+    '''Chave do cache de respostas; respostas do backend de teste ficam separadas das do Gemini'''
+    backend = app_context.llm.backend.name
+    model = MODEL if backend == 'gemini' else f'{backend}/{MODEL}'
+    return response_cache.make_key(model, prompt, GENERATION_CONFIG)
+
+
+async def generate_text(prompt: str, context=None) -> str:
+    '''
+    Função que gera o texto do LLM para o prompt, reaproveitando a resposta em cache
+    quando o mesmo prompt já foi enviado com a mesma configuração. A chamada ao modelo
+    passa pelo gateway (utils.llm_gateway), que aplica o limite de taxa e de concorrência,
+    o prazo da requisição e as repetições; chamadas simultâneas com o mesmo prompt
+    esperam a mesma geração. Com um contexto de partida, o contexto é registrado uma
+    única vez no cache do provedor (utils.context_cache) e só a instrução é enviada.
+    Args:
+        prompt (str): Prompt completo ou, com context, apenas a instrução
+        context (MatchContext, optional): Contexto da partida que precede a instrução
+    Returns:
+        str: Texto gerado pelo modelo
+    Raises:
+        LLMError: Quando o modelo não gerou o texto, com o status HTTP adequado
+    '''
+    key = cache_key(prompt if context is None else inline_prompt(context, prompt))
+    with span('llm_cache_lookup'):
+        cached = await run_blocking(response_cache.get, key)
+    if cached is not None:
+        return cached
+
+    return await llm_flight.do(key, lambda: _generate(prompt, key, context))
+
+
+async def _generate(prompt: str, key: str, context) -> str:
+    gateway = app_context.llm
+    result = None
+    if context is not None:
+        name = await context_cache.acquire(gateway, context)
+        if name is not None:
+            try:
+                result = await gateway.generate(CONTEXT_CACHE_MODEL, prompt, GENERATION_CONFIG,
+                                                cached_content=name)
+            except LLMCacheError:
+                context_cache.invalidate(context)
+        prompt = inline_prompt(context, prompt)
+    if result is None:
+        result = await gateway.generate(MODEL, prompt, GENERATION_CONFIG)
+    await run_blocking(response_cache.set, key, result.text)
+    return result.text
+
+
+async def stream_text(prompt: str, context=None):
+    '''
+    Função geradora que devolve o texto do LLM em pedaços à medida que é gerado.
+    Respostas em cache são devolvidas de uma vez; a resposta completa é gravada
+    no cache ao final da geração.
+    Args:
+        prompt (str): Prompt completo ou, com context, apenas a instrução
+        context (MatchContext, optional): Contexto da partida, como em generate_text
+    Yields:
+        str: Pedaços do texto gerado
+    '''
+    key = cache_key(prompt if context is None else inline_prompt(context, prompt))
+    with span('llm_cache_lookup'):
+        cached = await run_blocking(response_cache.get, key)
+    if cached is not None:
+        yield cached
+        return
+
+    gateway = app_context.llm
+    result = LLMResult('')
+    name = None
+    if context is not None:
+        name = await context_cache.acquire(gateway, context)
+    if name is not None:
+        try:
+            async for chunk in gateway.stream(CONTEXT_CACHE_MODEL, prompt, GENERATION_CONFIG, result,
+                                              cached_content=name):
+                yield chunk
+        except LLMCacheError:
+            # O contexto sumiu do provedor antes do primeiro pedaço: volta ao prompt completo
+            if result.text:
+                raise
+            context_cache.invalidate(context)
+            name = None
+    if name is None:
+        if context is not None:
+            prompt = inline_prompt(context, prompt)
+        async for chunk in gateway.stream(MODEL, prompt, GENERATION_CONFIG, result):
+            yield chunk
+
+    await run_blocking(response_cache.set, key, result.text)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from cachetools import TTLCache
+
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.sqlite')
+LLM_CACHE_MAXSIZE = int(os.getenv('LLM_CACHE_MAXSIZE', 256))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+
+
+class ResponseCache:
+    '''
+    Cache das respostas do LLM endereçado pelo conteúdo (modelo, prompt e configuração),
+    com uma camada em memória limitada e uma camada persistente em SQLite.
+    O arquivo do SQLite só é aberto (e criado) na primeira utilização do cache.
+    '''
+
+    def __init__(self, path: str, maxsize: int, ttl: int):
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.path = path
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        '''Conexão com o SQLite, aberta na primeira chamada; deve ser usada com o lock'''
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS responses '
+                '(key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL)')
+            db.commit()
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def make_key(model: str, prompt: str, config: dict) -> str:
+        '''
+        Função que gera a chave do cache a partir do conteúdo da chamada ao LLM
+        Args:
+            model (str): Nome do modelo
+            prompt (str): Prompt enviado
+            config (dict): Configuração de geração
+        Returns:
+            str: Hash SHA-256 da chamada
+        '''
+        payload = json.dumps({'model': model, 'prompt': prompt, 'config': config},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        '''Retorna a resposta em cache para a chave, ou None'''
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self.memory_hits += 1
+                return text
+
+            row = self._connection().execute(
+                'SELECT text FROM responses WHERE key = ? AND created_at > ?',
+                (key, time.time() - self.ttl)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._memory[key] = row[0]
+            return row[0]
+
+    def set(self, key: str, text: str) -> None:
+        '''Grava a resposta nas duas camadas do cache'''
+        with self._lock:
+            self._memory[key] = text
+            db = self._connection()
+            db.execute(
+                'INSERT OR REPLACE INTO responses (key, text, created_at) VALUES (?, ?, ?)',
+                (key, text, time.time()))
+            db.commit()
+
+    def invalidate(self, key: str = None) -> None:
+        '''Remove uma resposta do cache ou, sem argumentos, limpa o cache inteiro'''
+        with self._lock:
+            db = self._connection()
+            if key is None:
+                self._memory.clear()
+                db.execute('DELETE FROM responses')
+            else:
+                self._memory.pop(key, None)
+                db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            db.commit()
+
+    def stats(self) -> dict:
+        '''Retorna os contadores de acertos e falhas de cada camada'''
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            stored = self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return {
+                'memory_size': len(self._memory),
+                'disk_size': stored,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / total if total else 0.0
+            }
+
+
+response_cache = ResponseCache(LLM_CACHE_PATH, LLM_CACHE_MAXSIZE, LLM_CACHE_TTL)
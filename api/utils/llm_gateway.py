@@ -0,0 +1,487 @@
+import asyncio
+import hashlib
+import math
+import os
+import random
+import time
+import weakref
+from dataclasses import dataclass
+from utils.concurrency import llm_semaphore, TokenBucket, LLM_CONCURRENCY, LLM_RATE_PER_MINUTE, LLM_TIMEOUT
+from utils.metrics import metrics, span
+
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+LLM_BURST = int(os.getenv('LLM_BURST', LLM_CONCURRENCY))
+LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', LLM_TIMEOUT))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 3))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', 1.0))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', 20.0))
+LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', 5))
+LLM_BREAKER_COOLDOWN = float(os.getenv('LLM_BREAKER_COOLDOWN', 30.0))
+LLM_STUB_LATENCY = float(os.getenv('LLM_STUB_LATENCY', 0.2))
+LLM_STUB_FAILURE_RATE = float(os.getenv('LLM_STUB_FAILURE_RATE', 0.0))
+
+# Menor contexto aceito pelo cached content do Gemini, em tokens, por família de modelo
+GEMINI_CACHE_MIN_TOKENS = {'gemini-1.5': 32768, 'gemini-2.0': 4096}
+
+
+class LLMError(Exception):
+    '''Falha na geração do LLM, com o status HTTP que a API deve devolver'''
+    status_code = 502
+
+    def __init__(self, message, retry_after: float = None):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+    @property
+    def headers(self):
+        if self.retry_after is None:
+            return None
+        return {'Retry-After': str(max(1, math.ceil(self.retry_after)))}
+
+
+class LLMRateLimitError(LLMError):
+    status_code = 429
+
+
+class LLMUnavailableError(LLMError):
+    status_code = 503
+
+
+class LLMTimeoutError(LLMError):
+    status_code = 504
+
+
+class LLMCacheError(LLMError):
+    '''O contexto em cache não existe mais (expirou ou foi removido) ou foi recusado pelo provedor'''
+
+
+@dataclass
+class LLMResult:
+    text: str
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+
+
+class GeminiBackend:
+    '''Backend do Gemini, usando o cliente assíncrono compartilhado do contexto da aplicação'''
+    name = 'gemini'
+
+    def __init__(self, client_factory):
+        self.client_factory = client_factory
+
+    @staticmethod
+    def min_cache_tokens(model: str) -> int:
+        '''Menor contexto aceito pelo cached content do modelo; modelos desconhecidos usam o maior mínimo'''
+        for family, minimum in GEMINI_CACHE_MIN_TOKENS.items():
+            if model.startswith(family):
+                return minimum
+        return max(GEMINI_CACHE_MIN_TOKENS.values())
+
+    @staticmethod
+    def _config(config: dict, cached_content: str = None):
+        from google.genai import types
+
+        return types.GenerateContentConfig(**config, cached_content=cached_content)
+
+    @staticmethod
+    def _translate(error: Exception, cached: bool = False) -> Exception:
+        '''Converte os erros do SDK do Gemini nos erros do gateway'''
+        from google.genai import errors
+
+        if isinstance(error, OSError):
+            return LLMUnavailableError(f'Falha de conexão com o Gemini: {error}')
+        if not isinstance(error, errors.APIError):
+            return error
+        if error.code == 429:
+            return LLMRateLimitError(f'Limite de requisições do Gemini atingido: {error.message}')
+        if error.code is not None and error.code >= 500:
+            return LLMUnavailableError(f'Gemini indisponível: {error.message}')
+        if cached and error.code in (400, 403, 404):
+            return LLMCacheError(f'Contexto em cache recusado pelo Gemini: {error.message}')
+        return LLMError(f'Requisição recusada pelo Gemini: {error.message}')
+
+    @staticmethod
+    def _usage(response) -> tuple:
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return 0, 0, 0
+        return (usage.prompt_token_count or 0, usage.candidates_token_count or 0,
+                getattr(usage, 'cached_content_token_count', None) or 0)
+
+    async def generate(self, model: str, prompt: str, config: dict, cached_content: str = None) -> LLMResult:
+        try:
+            response = await self.client_factory().aio.models.generate_content(
+                model=model, contents=prompt, config=self._config(config, cached_content))
+        except Exception as e:
+            raise self._translate(e, cached_content is not None) from e
+        return LLMResult(response.text, *self._usage(response))
+
+    async def stream(self, model: str, prompt: str, config: dict, result: LLMResult,
+                     cached_content: str = None):
+        try:
+            async for chunk in self.client_factory().aio.models.generate_content_stream(
+                    model=model, contents=prompt, config=self._config(config, cached_content)):
+                result.prompt_tokens, result.output_tokens, result.cached_tokens = self._usage(chunk)
+                if chunk.text:
+                    result.text += chunk.text
+                    yield chunk.text
+        except Exception as e:
+            raise self._translate(e, cached_content is not None) from e
+
+    async def create_cache(self, model: str, text: str, ttl: int, display_name: str = None) -> str:
+        '''Registra o texto no cached content do Gemini e retorna o nome do cache'''
+        from google.genai import types
+
+        try:
+            cached = await self.client_factory().aio.caches.create(
+                model=model, contents=text,
+                config=types.CreateCachedContentConfig(ttl=f'{ttl}s', display_name=display_name))
+        except Exception as e:
+            raise self._translate(e, cached=True) from e
+        return cached.name
+
+    async def delete_cache(self, name: str) -> None:
+        try:
+            await self.client_factory().aio.caches.delete(name=name)
+        except Exception as e:
+            raise self._translate(e, cached=True) from e
+
+
+class StubBackend:
+    '''
+    Backend local e determinístico para testes de carga sem rede e sem cota:
+    o texto depende só do prompt e a latência é fixa. Com failure_rate > 0,
+    uma fração das chamadas (sequência reproduzível) falha como indisponível.
+    O cache de contexto é simulado em memória, com expiração: o texto gerado com
+    um contexto em cache é o mesmo gerado com o contexto enviado no prompt.
+    '''
+    name = 'stub'
+
+    def __init__(self, latency: float = LLM_STUB_LATENCY, failure_rate: float = LLM_STUB_FAILURE_RATE,
+                 chunks: int = 5, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chunks = chunks
+        self.random = random.Random(seed)
+        self.caches = {}
+
+    @staticmethod
+    def min_cache_tokens(model: str) -> int:
+        return 0
+
+    @staticmethod
+    def _text(prompt: str) -> str:
+        digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]
+        return f'Resumo de teste {digest}: texto gerado localmente, sem chamada ao modelo.'
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            raise LLMUnavailableError('Falha simulada do backend de teste')
+
+    def _context(self, cached_content: str) -> str:
+        '''Texto do contexto em cache; o backend de teste não cobra pela parte em cache'''
+        if cached_content is None:
+            return ''
+        text, expires_at = self.caches.get(cached_content, (None, 0))
+        if time.monotonic() >= expires_at:
+            self.caches.pop(cached_content, None)
+            raise LLMCacheError(f'Contexto {cached_content} não encontrado no backend de teste')
+        return text
+
+    async def generate(self, model: str, prompt: str, config: dict, cached_content: str = None) -> LLMResult:
+        context = self._context(cached_content)
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        text = self._text(f'{context}\n{prompt}' if context else prompt)
+        return LLMResult(text, (len(context) + len(prompt)) // 4, len(text) // 4, len(context) // 4)
+
+    async def stream(self, model: str, prompt: str, config: dict, result: LLMResult,
+                     cached_content: str = None):
+        context = self._context(cached_content)
+        self._maybe_fail()
+        words = self._text(f'{context}\n{prompt}' if context else prompt).split(' ')
+        size = max(1, math.ceil(len(words) / self.chunks))
+        for start in range(0, len(words), size):
+            await asyncio.sleep(self.latency / self.chunks)
+            chunk = ' '.join(words[start:start + size]) + (' ' if start + size < len(words) else '')
+            result.text += chunk
+            yield chunk
+        result.prompt_tokens, result.output_tokens = (len(context) + len(prompt)) // 4, len(result.text) // 4
+        result.cached_tokens = len(context) // 4
+
+    async def create_cache(self, model: str, text: str, ttl: int, display_name: str = None) -> str:
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        name = f'cachedContents/stub-{hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]}'
+        self.caches[name] = (text, time.monotonic() + ttl)
+        return name
+
+    async def delete_cache(self, name: str) -> None:
+        if self.caches.pop(name, None) is None:
+            raise LLMCacheError(f'Contexto {name} não encontrado no backend de teste')
+
+
+class CircuitBreaker:
+    '''
+    Disjuntor: depois de `threshold` falhas seguidas, recusa as chamadas por `cooldown`
+    segundos; passado esse tempo, libera uma chamada de teste que fecha o circuito se der certo
+    '''
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half_open'
+        return 'open'
+
+    def check(self) -> None:
+        '''Recusa a chamada se o circuito estiver aberto ou já houver uma chamada de teste'''
+        state = self.state
+        if state == 'open' or (state == 'half_open' and self.trial):
+            retry_after = self.cooldown - (time.monotonic() - self.opened_at)
+            raise LLMUnavailableError('LLM temporariamente indisponível após falhas seguidas.',
+                                      retry_after=max(retry_after, 1))
+        if state == 'half_open':
+            self.trial = True
+
+    def release(self) -> None:
+        '''Libera a chamada de teste ao fim da tentativa, qualquer que seja o resultado'''
+        self.trial = False
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        self.trial = False
+        if self.state == 'half_open' or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            metrics.inc('llm_breaker_opened_total')
+
+
+class LLMGateway:
+    '''
+    Ponto único de acesso ao LLM: limita a taxa (token bucket ajustado à cota),
+    a concorrência e o tempo total de cada requisição, repete com backoff e jitter
+    as falhas temporárias (429 e 5xx) e abre o disjuntor quando elas se acumulam
+    '''
+
+    # Só para as métricas: o gateway descartado sai do conjunto sozinho
+    instances = weakref.WeakSet()
+
+    def __init__(self, backend, rate_per_minute: float = LLM_RATE_PER_MINUTE, burst: int = LLM_BURST,
+                 deadline: float = LLM_DEADLINE, max_retries: int = LLM_MAX_RETRIES):
+        self.backend = backend
+        self.limiter = TokenBucket(rate_per_minute, capacity=burst)
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+        LLMGateway.instances.add(self)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        return llm_semaphore()
+
+    def _remaining(self, started: float) -> float:
+        remaining = self.deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            raise LLMTimeoutError(f'O LLM não respondeu em {self.deadline:.0f} s.')
+        return remaining
+
+    async def _admit(self, started: float) -> None:
+        '''Aguarda o limitador de taxa dentro do prazo da requisição'''
+        self.breaker.check()
+        try:
+            with span('llm_rate_limit'):
+                try:
+                    await asyncio.wait_for(self.limiter.acquire(), self._remaining(started))
+                except asyncio.TimeoutError:
+                    raise LLMRateLimitError('Limite de requisições ao LLM atingido. Tente novamente em instantes.',
+                                            retry_after=1 / self.limiter.rate)
+        except BaseException:
+            # A chamada não chegou ao LLM: a chamada de teste do disjuntor fica livre para a próxima
+            self.breaker.release()
+            raise
+
+    async def _backoff(self, attempt: int, started: float, error: LLMError) -> None:
+        '''Espera antes de repetir: backoff exponencial com jitter completo, limitado pelo prazo'''
+        metrics.inc('llm_retries_total', backend=self.backend.name, error=type(error).__name__)
+        delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+        if error.retry_after:
+            delay = max(delay, error.retry_after)
+        if delay >= self._remaining(started):
+            raise error
+        await asyncio.sleep(delay)
+
+    def _record(self, result: LLMResult, model: str) -> None:
+        metrics.inc('llm_prompt_tokens_total', result.prompt_tokens, model=model)
+        metrics.inc('llm_output_tokens_total', result.output_tokens, model=model)
+        metrics.inc('llm_cached_tokens_total', result.cached_tokens, model=model)
+
+    def _failed(self, error: LLMError) -> None:
+        metrics.inc('llm_errors_total', backend=self.backend.name, error=type(error).__name__)
+        if isinstance(error, (LLMUnavailableError, LLMRateLimitError, LLMTimeoutError)):
+            self.breaker.failure()
+
+    async def generate(self, model: str, prompt: str, config: dict, cached_content: str = None) -> LLMResult:
+        '''
+        Função que gera o texto do prompt com limite de taxa, concorrência,
+        prazo total, repetições e disjuntor
+        Args:
+            cached_content (str, optional): Nome do contexto em cache (create_cache) que precede o prompt
+        Returns:
+            LLMResult: Texto gerado e tokens consumidos
+        Raises:
+            LLMError: Com o status HTTP adequado (429, 503, 504 ou 502)
+        '''
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            await self._admit(started)
+            try:
+                with span('llm_queue'):
+                    await self.semaphore.acquire()
+                try:
+                    with span('llm_generate'):
+                        result = await asyncio.wait_for(
+                            self.backend.generate(model, prompt, config, cached_content),
+                            self._remaining(started))
+                finally:
+                    self.semaphore.release()
+            except asyncio.TimeoutError:
+                error = LLMTimeoutError(f'O LLM não respondeu em {self.deadline:.0f} s.')
+                self._failed(error)
+                raise error
+            except (LLMRateLimitError, LLMUnavailableError) as error:
+                self._failed(error)
+                if attempt >= self.max_retries:
+                    raise
+                await self._backoff(attempt, started, error)
+                attempt += 1
+                continue
+            except LLMError as error:
+                self._failed(error)
+                raise
+            finally:
+                self.breaker.release()
+
+            self.breaker.success()
+            self._record(result, model)
+            return result
+
+    async def stream(self, model: str, prompt: str, config: dict, result: LLMResult,
+                     cached_content: str = None):
+        '''
+        Função geradora com as mesmas garantias de generate. As repetições só
+        acontecem antes do primeiro pedaço de texto ser enviado ao cliente.
+        Yields:
+            str: Pedaços do texto gerado; o texto completo fica em result
+        '''
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            await self._admit(started)
+            sent = False
+            try:
+                async with self.semaphore:
+                    with span('llm_stream'):
+                        async with asyncio.timeout(self._remaining(started)):
+                            async for chunk in self.backend.stream(model, prompt, config, result,
+                                                                   cached_content):
+                                sent = True
+                                yield chunk
+            except TimeoutError:
+                error = LLMTimeoutError(f'O LLM não respondeu em {self.deadline:.0f} s.')
+                self._failed(error)
+                raise error
+            except (LLMRateLimitError, LLMUnavailableError) as error:
+                self._failed(error)
+                if sent or attempt >= self.max_retries:
+                    raise
+                await self._backoff(attempt, started, error)
+                attempt += 1
+                continue
+            except LLMError as error:
+                self._failed(error)
+                raise
+            finally:
+                self.breaker.release()
+
+            self.breaker.success()
+            self._record(result, model)
+            return
+
+    async def create_cache(self, model: str, text: str, ttl: int, display_name: str = None) -> str:
+        '''
+        Função que registra um contexto no cache do provedor, dentro do prazo e
+        do limite de concorrência, sem repetições: quem chama volta ao prompt completo
+        Returns:
+            str: Nome do contexto em cache, usado em cached_content
+        '''
+        started = time.monotonic()
+        self.breaker.check()
+        try:
+            async with self.semaphore:
+                with span('llm_cache_create'):
+                    name = await asyncio.wait_for(
+                        self.backend.create_cache(model, text, ttl, display_name), self._remaining(started))
+        except asyncio.TimeoutError:
+            error = LLMTimeoutError(f'O LLM não respondeu em {self.deadline:.0f} s.')
+            self._failed(error)
+            raise error
+        except LLMError as error:
+            self._failed(error)
+            raise
+        finally:
+            self.breaker.release()
+
+        self.breaker.success()
+        return name
+
+    async def delete_cache(self, name: str) -> None:
+        '''Função que remove um contexto do cache do provedor antes do fim do TTL'''
+        await asyncio.wait_for(self.backend.delete_cache(name), self.deadline)
+
+    def stats(self) -> dict:
+        return {
+            'backend': self.backend.name,
+            'breaker_state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'rate_tokens': round(self.limiter.tokens, 3)
+        }
+
+
+BREAKER_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+def collect_gateways() -> list:
+    samples = []
+    for gateway in list(LLMGateway.instances):
+        labels = {'backend': gateway.backend.name}
+        samples.append(('llm_breaker_state', labels, BREAKER_STATES[gateway.breaker.state]))
+        samples.append(('llm_consecutive_failures', labels, gateway.breaker.failures))
+    return samples
+
+
+def create_backend(name: str, client_factory):
+    '''Cria o backend configurado em LLM_BACKEND: 'gemini' ou 'stub' '''
+    if name == 'gemini':
+        return GeminiBackend(client_factory)
+    if name == 'stub':
+        return StubBackend()
+    raise ValueError(f'LLM_BACKEND desconhecido: {name}')
+
+
+metrics.register_collector(collect_gateways)
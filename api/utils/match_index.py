@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from utils.event_cache import MatchCache, EVENT_CACHE_MAXSIZE, EVENT_CACHE_TTL
+
+
+class MatchIndexError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class MatchIndex:
+    '''
+    Índice de uma partida, construído uma única vez: times da casa e visitante,
+    elencos na ordem em que aparecem e os eventos ordenados por jogador e tipo,
+    com os intervalos de linhas de cada jogador e de cada (jogador, tipo).
+    As fatias por jogador são feitas por posição, sem varrer a partida inteira.
+    '''
+
+    def __init__(self, events: pd.DataFrame):
+        try:
+            home_team = events[events['type'] == 'Starting XI'].iloc[0]['team']
+            away_team = [team for team in events['team'].unique()
+                         if team != home_team][0]
+        except Exception as e:
+            raise MatchIndexError(f"Error getting teams: {str(e)}")
+
+        if 'index' in events:
+            events = events.sort_values('index', kind='stable')
+        played = events[events['player'].notna()]
+
+        self.home_team = home_team
+        self.away_team = away_team
+        self.home_players = played.loc[played['team'] == home_team, 'player'].unique().tolist()
+        self.away_players = played.loc[played['team'] == away_team, 'player'].unique().tolist()
+
+        players = pd.Categorical(played['player'],
+                                 categories=played['player'].unique().tolist())
+        types = pd.Categorical(played['type'])
+        order = np.lexsort((types.codes, players.codes))
+        self.events = played.iloc[order].reset_index(drop=True)
+
+        player_codes = players.codes[order].astype(np.int64)
+        type_codes = types.codes[order].astype(np.int64)
+        keys = player_codes * (len(types.categories) + 1) + type_codes
+        bounds = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], bounds))
+        stops = np.concatenate((bounds, [len(keys)]))
+
+        self.offsets = {}
+        self.type_offsets = {}
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            player = players.categories[player_codes[start]]
+            event_type = types.categories[type_codes[start]]
+            self.type_offsets[(player, event_type)] = (start, stop)
+            first, _ = self.offsets.get(player, (start, stop))
+            self.offsets[player] = (first, stop)
+
+    @property
+    def players(self) -> list:
+        return self.home_players + self.away_players
+
+    def roster(self) -> dict:
+        '''Retorna os times e os jogadores de cada time'''
+        return {
+            'home_team': self.home_team,
+            'away_team': self.away_team,
+            'home_players': self.home_players,
+            'away_players': self.away_players
+        }
+
+    def player_events(self, player_name: str, event_type: str = None) -> pd.DataFrame:
+        '''
+        Função que retorna os eventos de um jogador, opcionalmente de um único tipo
+        Args:
+            player_name (str): Nome completo do jogador
+            event_type (str, optional): Tipo do evento, ex: 'Pass'
+        Returns:
+            pd.DataFrame: Fatia do índice com os eventos, em ordem cronológica dentro de cada tipo
+        '''
+        if event_type is None:
+            start, stop = self.offsets.get(player_name, (0, 0))
+        else:
+            start, stop = self.type_offsets.get((player_name, event_type), (0, 0))
+        return self.events.iloc[start:stop]
+
+
+match_index_cache = MatchCache(maxsize=EVENT_CACHE_MAXSIZE, ttl=EVENT_CACHE_TTL)
+
@@ -0,0 +1,38 @@
+def _get(data: dict, *keys):
+    '''Percorre dicionários aninhados, retornando 'N/A' se algum nível não existir'''
+    for key in keys:
+        if not isinstance(data, dict) or data.get(key) is None:
+            return 'N/A'
+        data = data[key]
+    return data
+
+
+def _manager(team: dict) -> str:
+    managers = team.get('managers') if isinstance(team, dict) else None
+    return managers[0].get('name', 'N/A') if managers else 'N/A'
+
+
+def build_match_info(match: dict) -> dict:
+    '''
+    Função que monta as informações gerais de uma partida enviadas ao LLM
+    Args:
+        match (dict): Partida no formato retornado por sb.matches(fmt='dict')
+    Returns:
+        dict: Data, competição, times, técnicos, placar, estádio e fase da partida
+    '''
+    return {
+        'match_date': _get(match, 'match_date'),
+        'competition_country': _get(match, 'competition', 'country_name'),
+        'competition_name': _get(match, 'competition', 'competition_name'),
+        'home_team_country': _get(match, 'home_team', 'country', 'name'),
+        'away_team_country': _get(match, 'away_team', 'country', 'name'),
+        'stadium_name': _get(match, 'stadium', 'name'),
+        'season_name': _get(match, 'season', 'season_name'),
+        'home_team_name': _get(match, 'home_team', 'home_team_name'),
+        'away_team_name': _get(match, 'away_team', 'away_team_name'),
+        'home_team_manager': _manager(match.get('home_team', {})),
+        'away_team_manager': _manager(match.get('away_team', {})),
+        'home_score': _get(match, 'home_score'),
+        'away_score': _get(match, 'away_score'),
+        'competition_stage': _get(match, 'competition_stage', 'name')
+    }
@@ -0,0 +1,179 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_LOG = os.getenv('TRACE_LOG', '0') == '1'
+RESERVOIR_SIZE = int(os.getenv('METRICS_RESERVOIR_SIZE', 2048))
+QUANTILES = (0.5, 0.95, 0.99)
+
+trace_logger = logging.getLogger('api.trace')
+
+# Trace da requisição atual: lista de etapas (nome, duração) preenchida pelos spans
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class Summary:
+    '''
+    Série de observações com contagem, soma e quantis calculados
+    sobre as observações mais recentes (reservatório limitado)
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.values = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.values.append(value)
+
+    def quantiles(self) -> dict:
+        ordered = sorted(self.values)
+        if not ordered:
+            return {quantile: 0.0 for quantile in QUANTILES}
+        return {quantile: ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+                for quantile in QUANTILES}
+
+
+class MetricsRegistry:
+    '''
+    Registro de métricas da API (contadores, resumos com p50/p95/p99 e
+    coletores de gauges) exportado no formato texto do Prometheus
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._summaries = {}
+        self._collectors = []
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        '''Incrementa um contador'''
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        '''Registra uma observação em um resumo (latência, tamanho de prompt, ...)'''
+        key = self._key(name, labels)
+        with self._lock:
+            self._summaries.setdefault(key, Summary()).observe(value)
+
+    def register_collector(self, collector) -> None:
+        '''
+        Registra uma função chamada a cada coleta, que retorna uma lista
+        de tuplas (nome, labels, valor) exportadas como gauges
+        '''
+        self._collectors.append(collector)
+
+    @staticmethod
+    def _escape(value) -> str:
+        '''Escapa o valor do label como exige o formato texto do Prometheus'''
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @classmethod
+    def _labels(cls, labels, **extra) -> str:
+        items = list(labels) + list(extra.items())
+        if not items:
+            return ''
+        return '{' + ','.join(f'{key}="{cls._escape(value)}"' for key, value in items) + '}'
+
+    def render(self) -> str:
+        '''Exporta todas as métricas no formato texto do Prometheus'''
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items(), key=lambda item: item[0])
+            summaries = [(key, summary.count, summary.total, summary.quantiles())
+                         for key, summary in summaries]
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f'# TYPE {name} counter')
+                typed.add(name)
+            lines.append(f'{name}{self._labels(labels)} {value}')
+
+        for (name, labels), count, total, quantiles in summaries:
+            if name not in typed:
+                lines.append(f'# TYPE {name} summary')
+                typed.add(name)
+            for quantile, value in quantiles.items():
+                lines.append(f'{name}{self._labels(labels, quantile=quantile)} {value}')
+            lines.append(f'{name}_sum{self._labels(labels)} {total}')
+            lines.append(f'{name}_count{self._labels(labels)} {count}')
+
+        # Agrupa os gauges por nome, já que vários coletores exportam as mesmas métricas
+        gauges = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                gauges.setdefault(name, []).append((sorted(labels.items()), value))
+        for name, samples in gauges.items():
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in samples:
+                lines.append(f'{name}{self._labels(labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def span(stage: str):
+    '''
+    Mede a duração de uma etapa, registrando-a no resumo stage_duration_seconds
+    e no trace da requisição atual
+    '''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe('stage_duration_seconds', elapsed, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.append({'stage': stage, 'seconds': round(elapsed, 6)})
+
+
+def start_trace() -> contextvars.Token:
+    '''Inicia o trace da requisição atual'''
+    return _current_trace.set([])
+
+
+def finish_trace(token: contextvars.Token, method: str, path: str, status: int, elapsed: float) -> None:
+    '''Encerra o trace da requisição atual e, se TRACE_LOG=1, registra-o como uma linha JSON'''
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if TRACE_LOG:
+        trace_logger.info(json.dumps({
+            'method': method,
+            'path': path,
+            'status': status,
+            'seconds': round(elapsed, 6),
+            'stages': trace
+        }, ensure_ascii=False))
+
+
+def cache_collector(stats):
+    '''
+    Cria um coletor que exporta as estatísticas numéricas dos caches como gauges
+    cache_<estatística>{cache="<nome>"}
+    Args:
+        stats (callable): Função que retorna um dicionário nome do cache -> estatísticas
+    '''
+    def collect():
+        return [(f'cache_{key}', {'cache': name}, value)
+                for name, cache_stats in stats().items()
+                for key, value in cache_stats.items() if isinstance(value, (int, float))]
+    return collect
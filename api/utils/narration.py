@@ -0,0 +1,110 @@
+import asyncio
+import math
+import os
+from dataclasses import dataclass
+from utils.llm import generate_text
+from utils.metrics import metrics
+
+WINDOW_MINUTES = int(os.getenv('WINDOW_MINUTES', 15))
+WINDOW_CONCURRENCY = int(os.getenv('WINDOW_CONCURRENCY', 4))
+WINDOW_TOKEN_BUDGET = int(os.getenv('WINDOW_TOKEN_BUDGET', 6000))
+
+# Duração regulamentar de cada período; os acréscimos entram na última janela do período
+PERIOD_LENGTHS = {1: 45, 2: 45, 3: 15, 4: 15}
+
+PERIOD_LABELS = {
+    1: '1º tempo',
+    2: '2º tempo',
+    3: '1º tempo da prorrogação',
+    4: '2º tempo da prorrogação',
+    5: 'disputa de pênaltis'
+}
+
+
+@dataclass
+class MatchWindow:
+    '''Trecho da partida narrado separadamente: um período ou parte dele'''
+    period: int
+    start: int
+    end: int
+    events: object
+
+    @property
+    def label(self) -> str:
+        period = PERIOD_LABELS.get(self.period, f'período {self.period}')
+        if self.period not in PERIOD_LENGTHS:
+            return period
+        return f'{period}, minutos {self.start} a {self.end}'
+
+
+def split_windows(events, window_minutes: int = WINDOW_MINUTES) -> list:
+    '''
+    Função que divide os eventos em janelas de tempo dentro de cada período.
+    Cada período regulamentar é dividido em janelas de window_minutes minutos,
+    com os acréscimos na última janela; a disputa de pênaltis é uma janela só.
+    Args:
+        events (pd.DataFrame): Eventos da partida, com as colunas period e minute
+        window_minutes (int): Duração de cada janela
+    Returns:
+        list: Janelas (MatchWindow) em ordem cronológica, sem janelas vazias
+    '''
+    windows = []
+    for period, period_events in events.groupby('period', sort=True, observed=True):
+        period = int(period)
+        first = int(period_events['minute'].min())
+        last = int(period_events['minute'].max())
+        if period not in PERIOD_LENGTHS:
+            windows.append(MatchWindow(period, first, last, period_events))
+            continue
+
+        last_window = max(0, math.ceil(PERIOD_LENGTHS[period] / window_minutes) - 1)
+        positions = ((period_events['minute'] - first) // window_minutes).clip(upper=last_window)
+        for position, window_events in period_events.groupby(positions, sort=True):
+            start = first + int(position) * window_minutes
+            end = last if position == last_window else start + window_minutes - 1
+            windows.append(MatchWindow(period, start, end, window_events))
+    return windows
+
+
+def encode_window(window: MatchWindow, budget: int = WINDOW_TOKEN_BUDGET) -> tuple:
+    '''
+    Função que codifica os eventos de uma janela com um dicionário de nomes próprio,
+    para que o prompt da janela dependa apenas dos eventos dela e a resposta em cache
+    seja reaproveitada enquanto a janela não mudar
+    Returns:
+        tuple: Eventos codificados e legenda de nomes
+    '''
+    from utils.prompt_encoder import NameDictionary, encode_events
+
+    names = NameDictionary()
+    events_text, _ = encode_events(window.events, names, budget)
+    return events_text, names.legend()
+
+
+def needs_windows(events, encoded) -> bool:
+    '''
+    Função que decide, no modo automático, se a partida deve ser narrada por janelas:
+    quando os eventos não couberam no orçamento do prompt único ou houve prorrogação
+    '''
+    return encoded.dropped_events > 0 or int(events['period'].max()) > 2
+
+
+async def map_windows(prompts: list, concurrency: int = WINDOW_CONCURRENCY) -> list:
+    '''
+    Função que gera o resumo de cada janela em paralelo, com no máximo `concurrency`
+    janelas em andamento. Cada resumo passa pelo cache de respostas, então numa nova
+    narração apenas as janelas que mudaram (ou que falharam) são geradas de novo.
+    Args:
+        prompts (list): Prompt de cada janela
+        concurrency (int): Janelas geradas ao mesmo tempo
+    Returns:
+        list: Resumo de cada janela, na mesma ordem dos prompts
+    '''
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarize(prompt: str) -> str:
+        async with semaphore:
+            return await generate_text(prompt)
+
+    metrics.inc('narration_windows_total', len(prompts))
+    return await asyncio.gather(*(summarize(prompt) for prompt in prompts))
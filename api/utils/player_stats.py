@@ -0,0 +1,135 @@
+import math
+import pandas as pd
+
+# Especificação de cada contador: lista de condições (coluna, operador, valor)
+# que um evento precisa satisfazer para ser contado para o jogador
+STAT_SPECS = {
+    'passes_completed': (('type', 'eq', 'Pass'), ('pass_outcome', 'isna', None)),
+    'passes_attempted': (('type', 'eq', 'Pass'),),
+    'shots': (('type', 'eq', 'Shot'),),
+    'shots_on_target': (('type', 'eq', 'Shot'), ('shot_outcome', 'eq', 'On Target')),
+    'goals': (('type', 'eq', 'Shot'), ('shot_outcome', 'eq', 'Goal')),
+    'non_penalty_goals': (('type', 'eq', 'Shot'), ('shot_outcome', 'eq', 'Goal'),
+                          ('shot_type', 'ne', 'Penalty')),
+    'penalty_goals': (('type', 'eq', 'Shot'), ('shot_outcome', 'eq', 'Goal'),
+                      ('shot_type', 'eq', 'Penalty')),
+    'assists': (('pass_goal_assist', 'eq', True),),
+    'fouls_committed': (('type', 'eq', 'Foul Committed'),),
+    'fouls_won': (('type', 'eq', 'Foul Won'),),
+    'tackles': (('type', 'eq', 'Tackle'),),
+    'interceptions': (('type', 'eq', 'Interception'),),
+    'dribbles_completed': (('type', 'eq', 'Dribble'), ('dribble_outcome', 'eq', 'Complete')),
+    'dribbles_attempted': (('type', 'eq', 'Dribble'),),
+    'ball_recoveries': (('type', 'eq', 'Ball Recovery'),),
+    'blocks': (('type', 'eq', 'Block'),),
+    'injury_stoppages': (('type', 'eq', 'Injury Stoppage'),),
+    'miscontrols': (('type', 'eq', 'Miscontrol'),),
+    'yellow_cards': (('type', 'eq', 'Foul Committed'), ('foul_committed_card', 'eq', 'Yellow Card')),
+    'red_cards': (('type', 'eq', 'Foul Committed'), ('foul_committed_card', 'eq', 'Red Card')),
+}
+
+# Estatísticas retornadas por GetMatchStats.get_player_stats, na ordem original
+PLAYER_STATS_KEYS = [
+    'passes_completed', 'passes_attempted', 'shots', 'shots_on_target', 'goals',
+    'assists', 'fouls_committed', 'fouls_won', 'tackles', 'interceptions'
+]
+
+# Colunas dos eventos necessárias para calcular os contadores
+COUNTER_COLUMNS = ['player', 'team', 'minute'] + sorted(
+    {column for conditions in STAT_SPECS.values() for column, _, _ in conditions})
+
+
+def _condition_mask(events: pd.DataFrame, column: str, op: str, value) -> pd.Series:
+    '''
+    Função que avalia uma condição sobre todos os eventos de uma vez.
+    Colunas ausentes no DataFrame são tratadas como valores nulos.
+    '''
+    if column in events:
+        series = events[column]
+    else:
+        series = pd.Series(None, index=events.index, dtype=object)
+
+    if op == 'eq':
+        return series.eq(value).fillna(False).astype(bool)
+    if op == 'ne':
+        return series.ne(value).fillna(True).astype(bool)
+    if op == 'isna':
+        return series.isna()
+    raise ValueError(f'Operador desconhecido: {op}')
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _condition_matches(event: dict, column: str, op: str, value) -> bool:
+    '''Versão escalar de _condition_mask, para um único evento'''
+    actual = event.get(column)
+    if op == 'eq':
+        return not _is_missing(actual) and actual == value
+    if op == 'ne':
+        return _is_missing(actual) or actual != value
+    if op == 'isna':
+        return _is_missing(actual)
+    raise ValueError(f'Operador desconhecido: {op}')
+
+
+def event_stats(event: dict) -> list:
+    '''
+    Função que retorna os contadores de STAT_SPECS incrementados por um único evento,
+    com as mesmas regras de compute_player_counters. O custo não depende do tamanho
+    da partida, o que permite atualizar os contadores evento a evento.
+    Args:
+        event (dict): Evento normalizado (colunas de utils.dataprep), ausentes como None ou NaN
+    Returns:
+        list: Nomes dos contadores incrementados
+    '''
+    return [name for name, conditions in STAT_SPECS.items()
+            if all(_condition_matches(event, *condition) for condition in conditions)]
+
+
+def compute_player_counters(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Função que calcula todos os contadores de todos os jogadores em uma única passada:
+    cada condição vira uma máscara vetorizada sobre a partida inteira e os contadores
+    são somados com um único groupby por jogador.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+    Returns:
+        pd.DataFrame: DataFrame indexado pelo jogador com as colunas team, minutes_played
+        e uma coluna por contador de STAT_SPECS
+    '''
+    masks = {}
+    flags = {}
+    for name, conditions in STAT_SPECS.items():
+        mask = None
+        for condition in conditions:
+            if condition not in masks:
+                masks[condition] = _condition_mask(events, *condition)
+            mask = masks[condition] if mask is None else mask & masks[condition]
+        flags[name] = mask.astype('int32')
+
+    has_player = events['player'].notna()
+    frame = pd.DataFrame(flags, index=events.index)[has_player]
+    grouped = frame.groupby(events.loc[has_player, 'player'], sort=False, observed=True)
+
+    counters = grouped.sum()
+    by_player = events[has_player].groupby('player', sort=False, observed=True)
+    counters.insert(0, 'team', by_player['team'].first())
+    counters.insert(1, 'minutes_played', by_player['minute'].max().astype('int32'))
+    return counters
+
+
+def player_counters(counters: pd.DataFrame, player_name: str) -> dict:
+    '''
+    Função que retorna os contadores de um jogador como dicionário
+    Args:
+        counters (pd.DataFrame): Resultado de compute_player_counters
+        player_name (str): Nome completo do jogador
+    Returns:
+        dict: Contadores do jogador, zerados se ele não tiver eventos na partida
+    '''
+    if player_name in counters.index:
+        row = counters.loc[player_name]
+        return {name: int(row[name]) for name in STAT_SPECS}
+    return {name: 0 for name in STAT_SPECS}
@@ -0,0 +1,224 @@
+import math
+import os
+from dataclasses import dataclass, field
+import pandas as pd
+
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 24000))
+
+# Aproximação de caracteres por token para textos em português/CSV
+CHARS_PER_TOKEN = 4
+
+# Eventos de baixo valor para a narração, descartados antes de montar o prompt
+LOW_SIGNAL_TYPES = {
+    'Ball Receipt*', 'Carry', 'Pressure', 'Starting XI', 'Half Start', 'Half End',
+    'Camera On', 'Camera off', 'Player On', 'Player Off', 'Referee Ball-Drop'
+}
+
+# Eventos que nunca são descartados ao ajustar o prompt ao orçamento de tokens
+PRIORITY_TYPES = {
+    'Shot', 'Own Goal For', 'Own Goal Against', 'Foul Committed', 'Bad Behaviour',
+    'Substitution', 'Injury Stoppage', 'Goal Keeper', 'Tactical Shift'
+}
+
+EVENT_HEADER = 'min,time,jogador,tipo,x,y,x_fim,y_fim'
+
+
+def estimate_tokens(text: str) -> int:
+    '''Estimativa do número de tokens de um texto'''
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class EncodedPrompt:
+    '''Seções do prompt já codificadas e a contagem de tokens de cada uma'''
+    sections: dict = field(default_factory=dict)
+    token_counts: dict = field(default_factory=dict)
+    dropped_events: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.token_counts.values())
+
+    def add(self, name: str, text: str) -> None:
+        self.sections[name] = text
+        self.token_counts[name] = estimate_tokens(text)
+
+
+class NameDictionary:
+    '''
+    Dicionário que troca nomes de times e jogadores por códigos curtos (T1, P1, ...),
+    compartilhado entre todas as seções de um mesmo prompt
+    '''
+
+    def __init__(self):
+        self.teams = {}
+        self.players = {}
+
+    def team(self, name) -> str:
+        if not isinstance(name, str):
+            return ''
+        return self.teams.setdefault(name, f'T{len(self.teams) + 1}')
+
+    def player(self, name) -> str:
+        if not isinstance(name, str):
+            return ''
+        return self.players.setdefault(name, f'P{len(self.players) + 1}')
+
+    def legend(self) -> str:
+        teams = ';'.join(f'{code}={name}' for name, code in self.teams.items())
+        players = ';'.join(f'{code}={name}' for name, code in self.players.items())
+        return f'Times: {teams}\nJogadores: {players}'
+
+
+def _coordinate(value) -> str:
+    return '' if pd.isna(value) else str(round(value))
+
+
+def encode_event(event: dict, names: NameDictionary) -> str:
+    '''Linha CSV de um único evento, no formato de EVENT_HEADER'''
+    return ','.join((
+        str(event.get('minute')), names.team(event.get('team')), names.player(event.get('player')),
+        event.get('type'), _coordinate(event.get('x')), _coordinate(event.get('y')),
+        _coordinate(event.get('end_x')), _coordinate(event.get('end_y'))
+    ))
+
+
+def _event_rows(events: pd.DataFrame, names: NameDictionary) -> list:
+    return [encode_event(event._asdict(), names) for event in events.itertuples(index=False)]
+
+
+def _fit_events(events: pd.DataFrame, names: NameDictionary, budget: int) -> tuple:
+    '''
+    Função que reduz os eventos até caberem no orçamento de tokens, mantendo
+    sempre os eventos prioritários e amostrando os demais de forma uniforme
+    '''
+    rows = _event_rows(events, names)
+    return fit_rows(rows, events['type'].isin(PRIORITY_TYPES).to_numpy(), budget)
+
+
+def fit_rows(rows: list, is_priority, budget: int) -> tuple:
+    '''
+    Função que ajusta linhas de eventos já codificadas ao orçamento de tokens
+    Args:
+        rows (list): Linhas CSV dos eventos, em ordem cronológica
+        is_priority (list): Se cada linha é de um evento de PRIORITY_TYPES
+        budget (int): Máximo de tokens da seção de eventos
+    Returns:
+        tuple: Texto com o cabeçalho e número de eventos descartados
+    '''
+    text = '\n'.join([EVENT_HEADER] + rows)
+    if estimate_tokens(text) <= budget:
+        return text, 0
+    # Sem orçamento não sobra nenhum evento, só o cabeçalho
+    if budget <= 0:
+        return EVENT_HEADER, len(rows)
+
+    def sample(step: int) -> list:
+        return [row for position, row in enumerate(rows)
+                if is_priority[position] or position % step == 0]
+
+    max_chars = budget * CHARS_PER_TOKEN
+    ratio = budget / estimate_tokens(text)
+    step = max(2, math.ceil(1 / ratio))
+    kept = sample(step)
+    text = '\n'.join([EVENT_HEADER] + kept)
+    # A amostragem só alcança os eventos comuns: aumenta o intervalo até caber
+    while len(text) > max_chars and step <= len(rows):
+        step = max(step + 1, math.ceil(step * 1.25))
+        kept = sample(step)
+        text = '\n'.join([EVENT_HEADER] + kept)
+
+    if len(text) > max_chars:
+        # Nem os eventos prioritários cabem: último recurso, ficam só os primeiros deles
+        kept = [row for position, row in enumerate(rows) if is_priority[position]]
+        text = '\n'.join([EVENT_HEADER] + kept)
+        if len(text) > max_chars:
+            cut = text.rfind('\n', 0, max_chars)
+            if cut < 0:
+                return EVENT_HEADER, len(rows)
+            text = text[:cut]
+            kept = text.split('\n')[1:]
+    return text, len(rows) - len(kept)
+
+
+def encode_lineups(lineups: dict, names: NameDictionary) -> str:
+    '''
+    Função que codifica as escalações como uma linha por time
+    Args:
+        lineups (dict): Escalações retornadas por sb.lineups, time -> DataFrame
+        names (NameDictionary): Dicionário de nomes do prompt
+    Returns:
+        str: Escalações no formato "T1: 10 P3, 9 P4, ..."
+    '''
+    lines = []
+    for team, lineup in lineups.items():
+        players = ', '.join(f'{row.jersey_number} {names.player(row.player_name)}'
+                            for row in lineup.itertuples(index=False))
+        lines.append(f'{names.team(team)}: {players}')
+    return '\n'.join(lines)
+
+
+def encode_player_stats(counters: pd.DataFrame, columns: list, names: NameDictionary) -> str:
+    '''
+    Função que codifica os contadores dos jogadores como CSV, omitindo jogadores sem ações
+    Args:
+        counters (pd.DataFrame): Resultado de utils.player_stats.compute_player_counters
+        columns (list): Contadores a incluir
+        names (NameDictionary): Dicionário de nomes do prompt
+    Returns:
+        str: CSV com uma linha por jogador
+    '''
+    lines = ['jogador,time,minutos,' + ','.join(columns)]
+    for player, row in counters.iterrows():
+        values = [int(row[column]) for column in columns]
+        if not any(values):
+            continue
+        lines.append(','.join([names.player(player), names.team(row['team']),
+                               str(int(row['minutes_played']))] + [str(value) for value in values]))
+    return '\n'.join(lines)
+
+
+def encode_events(events: pd.DataFrame, names: NameDictionary, budget: int) -> tuple:
+    '''
+    Função que codifica os eventos como CSV compacto: ordenados, sem os tipos de baixo valor,
+    com coordenadas arredondadas e nomes substituídos por códigos
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+        names (NameDictionary): Dicionário de nomes do prompt
+        budget (int): Máximo de tokens para a seção de eventos
+    Returns:
+        tuple: Texto codificado e número de eventos descartados pelo orçamento
+    '''
+    events = events[~events['type'].isin(LOW_SIGNAL_TYPES)]
+    events = events.sort_values(['minute', 'timestamp'], kind='stable')
+    return _fit_events(events, names, budget)
+
+
+def encode_match(events: pd.DataFrame, lineups: dict = None, counters: pd.DataFrame = None,
+                 stat_columns: list = None, budget: int = PROMPT_TOKEN_BUDGET) -> EncodedPrompt:
+    '''
+    Função que monta as seções compactas do prompt de uma partida respeitando o orçamento
+    de tokens. Escalações e estatísticas entram inteiras; os eventos usam o restante.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+        lineups (dict, optional): Escalações retornadas por sb.lineups
+        counters (pd.DataFrame, optional): Contadores dos jogadores
+        stat_columns (list, optional): Contadores a incluir nas estatísticas
+        budget (int): Orçamento total de tokens
+    Returns:
+        EncodedPrompt: Seções 'lineups', 'player_stats', 'events' e 'legend' com suas contagens de tokens
+    '''
+    names = NameDictionary()
+    encoded = EncodedPrompt()
+
+    if lineups is not None:
+        encoded.add('lineups', encode_lineups(lineups, names))
+    if counters is not None:
+        encoded.add('player_stats', encode_player_stats(counters, stat_columns, names))
+
+    # Reserva uma margem para a legenda de nomes, gerada ao final
+    remaining = budget - encoded.total_tokens - estimate_tokens(names.legend()) - 500
+    events_text, encoded.dropped_events = encode_events(events, names, max(remaining, 0))
+    encoded.add('events', events_text)
+    encoded.add('legend', names.legend())
+    return encoded
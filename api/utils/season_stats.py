@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from utils.event_cache import MatchCache
+
+SEASON_WORKERS = int(os.getenv('SEASON_WORKERS', min(4, os.cpu_count() or 1)))
+SEASON_PARTIALS_MAXSIZE = int(os.getenv('SEASON_PARTIALS_MAXSIZE', 1024))
+SEASON_PARTIALS_TTL = int(os.getenv('SEASON_PARTIALS_TTL', 7 * 24 * 3600))
+
+# Contadores de todos os jogadores de cada partida, indexados pelo match_id.
+# Partidas históricas não mudam, então cada partida é processada uma única vez
+# e serve para o perfil de temporada de qualquer jogador
+partial_cache = MatchCache(maxsize=SEASON_PARTIALS_MAXSIZE, ttl=SEASON_PARTIALS_TTL)
+
+# Agregados de temporada já montados, indexados pelo jogador
+aggregate_cache = MatchCache(maxsize=SEASON_PARTIALS_MAXSIZE, ttl=SEASON_PARTIALS_TTL)
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    '''
+    Pool de processos para a leitura e o processamento dos eventos (parsing do JSON,
+    pandas), criado na primeira utilização. Usa 'spawn' porque o processo da API
+    tem threads em execução.
+    '''
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=SEASON_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    '''Encerra o pool de processos, se foi criado'''
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(cancel_futures=True)
+            _process_pool = None
+
+
+def compute_match_partial(match_id: int):
+    '''
+    Função executada no pool de processos: carrega apenas as colunas necessárias
+    dos eventos da partida e calcula os contadores de todos os jogadores
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        pd.DataFrame: Contadores da partida, ver utils.player_stats.compute_player_counters
+    '''
+    from utils.dataprep import load_events
+    from utils.player_stats import compute_player_counters, COUNTER_COLUMNS
+
+    return compute_player_counters(load_events(match_id, columns=COUNTER_COLUMNS))
+
+
+async def load_partials(match_ids: list) -> dict:
+    '''
+    Função que retorna os contadores de cada partida, processando em paralelo,
+    no pool de processos, apenas as partidas que ainda não estão em cache
+    Args:
+        match_ids (list): IDs das partidas
+    Returns:
+        dict: match_id -> contadores da partida
+    '''
+    partials = {}
+    missing = []
+    for match_id in dict.fromkeys(int(match_id) for match_id in match_ids):
+        partial = partial_cache.get(match_id)
+        if partial is None:
+            missing.append(match_id)
+        else:
+            partials[match_id] = partial
+
+    if missing:
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        loaded = await asyncio.gather(*(loop.run_in_executor(pool, compute_match_partial, match_id)
+                                        for match_id in missing))
+        for match_id, partial in zip(missing, loaded):
+            partial_cache.set(match_id, partial)
+            partials[match_id] = partial
+    return partials
+
+
+class PlayerSeasonAggregate:
+    '''
+    Estatísticas de um jogador somadas sobre várias partidas. Cada partida é
+    somada uma única vez, então incluir uma nova partida custa só essa partida.
+    '''
+
+    def __init__(self, player_name: str):
+        from utils.player_stats import STAT_SPECS
+
+        self.player_name = player_name
+        self.team = None
+        self.match_ids = set()
+        self.per_match = {}
+        self.totals = dict.fromkeys(['minutes_played'] + list(STAT_SPECS), 0)
+
+    @property
+    def matches_played(self) -> int:
+        return len(self.per_match)
+
+    def merge(self, match_id: int, counters) -> None:
+        '''
+        Função que soma ao agregado os contadores do jogador em uma partida
+        Args:
+            match_id (int): ID da partida
+            counters (pd.DataFrame): Contadores de todos os jogadores da partida
+        '''
+        if match_id in self.match_ids:
+            return
+        self.match_ids.add(match_id)
+        if self.player_name not in counters.index:
+            return
+
+        row = counters.loc[self.player_name]
+        self.team = row['team']
+        values = {name: int(row[name]) for name in self.totals}
+        self.per_match[match_id] = values
+        for name, value in values.items():
+            self.totals[name] += value
+
+    def copy(self) -> 'PlayerSeasonAggregate':
+        '''Cópia independente, estendida sem alterar o agregado compartilhado no cache'''
+        aggregate = PlayerSeasonAggregate.__new__(PlayerSeasonAggregate)
+        aggregate.player_name = self.player_name
+        aggregate.team = self.team
+        aggregate.match_ids = set(self.match_ids)
+        aggregate.per_match = dict(self.per_match)
+        aggregate.totals = dict(self.totals)
+        return aggregate
+
+    def rates(self) -> dict:
+        '''Aproveitamento de passes e dribles e ações por 90 minutos'''
+        totals = self.totals
+        per_90 = 90 / totals['minutes_played'] if totals['minutes_played'] else 0.0
+        return {
+            'pass_completion': round(totals['passes_completed'] / totals['passes_attempted'], 3)
+            if totals['passes_attempted'] else 0.0,
+            'dribble_success': round(totals['dribbles_completed'] / totals['dribbles_attempted'], 3)
+            if totals['dribbles_attempted'] else 0.0,
+            'shots_per_90': round(totals['shots'] * per_90, 2),
+            'goals_per_90': round(totals['goals'] * per_90, 2),
+            'passes_per_90': round(totals['passes_attempted'] * per_90, 2),
+            'tackles_interceptions_per_90': round(
+                (totals['tackles'] + totals['interceptions']) * per_90, 2)
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'player_name': self.player_name,
+            'team': self.team,
+            'matches': len(self.match_ids),
+            'matches_played': self.matches_played,
+            'totals': dict(self.totals),
+            'rates': self.rates(),
+            'per_match': dict(self.per_match)
+        }
+
+
+async def aggregate_player_season(player_name: str, match_ids: list) -> PlayerSeasonAggregate:
+    '''
+    Função que agrega as estatísticas de um jogador sobre as partidas pedidas.
+    Um agregado em cache é estendido com as partidas que faltam quando as partidas
+    dele estão entre as pedidas; caso contrário, é remontado a partir dos
+    contadores por partida, também em cache. A extensão é feita em uma cópia,
+    publicada no cache já completa, para que requisições simultâneas do mesmo
+    jogador com outras partidas não vejam partidas que não pediram.
+    Args:
+        player_name (str): Nome completo do jogador
+        match_ids (list): IDs das partidas
+    Returns:
+        PlayerSeasonAggregate: Estatísticas agregadas do jogador
+    '''
+    match_ids = [int(match_id) for match_id in match_ids]
+    aggregate = aggregate_cache.peek(player_name)
+    if aggregate is None or not aggregate.match_ids <= set(match_ids):
+        aggregate = PlayerSeasonAggregate(player_name)
+    else:
+        aggregate = aggregate.copy()
+
+    missing = [match_id for match_id in match_ids if match_id not in aggregate.match_ids]
+    partials = await load_partials(missing)
+    for match_id in missing:
+        aggregate.merge(match_id, partials[match_id])
+
+    aggregate_cache.set(player_name, aggregate)
+    return aggregate
@@ -0,0 +1,139 @@
+import gzip
+import json
+import math
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Corpos menores que isso não são comprimidos: o ganho não paga o custo
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 5))
+ZSTD_LEVEL = int(os.getenv('ZSTD_LEVEL', 3))
+
+JSON_MEDIA_TYPE = 'application/json'
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+def _default(value):
+    '''Converte tipos do NumPy e do pandas que os serializadores não conhecem'''
+    # Arrays e escalares do NumPy são reconhecidos pelo módulo, sem importar o NumPy
+    if type(value).__module__ == 'numpy':
+        return value.tolist()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _clean_floats(value):
+    '''NaN e infinito viram null, como no orjson, para que o JSON seja válido'''
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _clean_floats(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clean_floats(item) for item in value]
+    return value
+
+
+def dumps_json(payload) -> bytes:
+    '''
+    Função que serializa o payload em JSON compacto (UTF-8), com o orjson quando instalado
+    Args:
+        payload: Dados com tipos nativos, do NumPy ou do pandas
+    Returns:
+        bytes: JSON compacto
+    '''
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    try:
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':'),
+                          default=_default, allow_nan=False).encode('utf-8')
+    except ValueError:
+        return json.dumps(_clean_floats(payload), ensure_ascii=False, separators=(',', ':'),
+                          default=_default).encode('utf-8')
+
+
+def dumps_msgpack(payload) -> bytes:
+    '''Função que serializa o payload em MessagePack'''
+    return msgpack.packb(payload, default=_default, use_bin_type=True)
+
+
+def available_media_types() -> list:
+    '''Formatos de resposta disponíveis, em ordem de preferência do servidor'''
+    return [JSON_MEDIA_TYPE] + (list(MSGPACK_MEDIA_TYPES) if msgpack is not None else [])
+
+
+def available_encodings() -> list:
+    '''Compressões disponíveis, em ordem de preferência do servidor'''
+    return (['zstd'] if zstandard is not None else []) + ['gzip']
+
+
+def _parse_header(header: str) -> dict:
+    '''Valores de um cabeçalho Accept/Accept-Encoding com o peso (q) de cada um'''
+    weights = {}
+    for item in (header or '').split(','):
+        value, *params = [part.strip() for part in item.split(';')]
+        if not value:
+            continue
+        weight = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    weight = float(param[2:])
+                except ValueError:
+                    weight = 0.0
+        weights[value.lower()] = weight
+    return weights
+
+
+def negotiate_media_type(accept: str) -> str:
+    '''
+    Função que escolhe o formato da resposta a partir do cabeçalho Accept.
+    JSON é o padrão, inclusive para */* e para formatos não disponíveis.
+    '''
+    weights = _parse_header(accept)
+    best, best_weight = JSON_MEDIA_TYPE, weights.get(JSON_MEDIA_TYPE, 0.0)
+    for media_type in available_media_types():
+        if weights.get(media_type, 0.0) > best_weight:
+            best, best_weight = media_type, weights[media_type]
+    return best
+
+
+def negotiate_encoding(accept_encoding: str):
+    '''Função que escolhe a compressão a partir do cabeçalho Accept-Encoding, ou None'''
+    weights = _parse_header(accept_encoding)
+    candidates = [encoding for encoding in available_encodings()
+                  if weights.get(encoding, weights.get('*', 0.0)) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda encoding: weights.get(encoding, weights.get('*', 0.0)))
+
+
+def encode(payload, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    '''Função que serializa o payload no formato pedido'''
+    if media_type in MSGPACK_MEDIA_TYPES:
+        return dumps_msgpack(payload)
+    return dumps_json(payload)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    '''Função que comprime o corpo da resposta com gzip ou zstd'''
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f'Compressão desconhecida: {encoding}')
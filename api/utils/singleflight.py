@@ -0,0 +1,71 @@
+import asyncio
+from utils.metrics import metrics
+
+
+class SingleFlight:
+    '''
+    Deduplicação de chamadas assíncronas simultâneas: enquanto uma chamada com
+    a mesma chave está em andamento, as novas chamadas aguardam o mesmo resultado
+    em vez de repetir o trabalho (carregamento de dados, geração no LLM).
+    A chamada roda em uma task própria, então o cancelamento de uma requisição
+    não cancela o trabalho das demais que aguardam o mesmo resultado.
+    '''
+
+    groups = []
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks = {}
+        self._waiters = {}
+        SingleFlight.groups.append(self)
+
+    async def do(self, key, func):
+        '''
+        Função que executa func() uma única vez por chave entre as chamadas simultâneas
+        Args:
+            key: Chave que identifica chamadas equivalentes
+            func (callable): Função sem argumentos que retorna uma corrotina
+        Returns:
+            O resultado de func(), compartilhado por todas as chamadas com a mesma chave
+        '''
+        task = self._tasks.get(key)
+        if task is None:
+            metrics.inc('singleflight_calls_total', group=self.name)
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            metrics.inc('singleflight_coalesced_total', group=self.name)
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _finish(self, key, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Marca a exceção como lida caso todos os que aguardavam tenham sido cancelados
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        '''Chamadas em andamento e número de requisições aguardando cada uma'''
+        return {
+            'in_flight': len(self._tasks),
+            'waiters': sum(self._waiters.values())
+        }
+
+
+def collect_singleflight() -> list:
+    samples = []
+    for group in SingleFlight.groups:
+        for key, value in group.stats().items():
+            samples.append((f'singleflight_{key}', {'group': group.name}, value))
+    return samples
+
+
+metrics.register_collector(collect_singleflight)
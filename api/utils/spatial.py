@@ -0,0 +1,226 @@
+import os
+import threading
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from scipy.stats import binned_statistic_dd
+from utils.event_cache import MatchCache, EVENT_CACHE_MAXSIZE, EVENT_CACHE_TTL
+
+SPATIAL_CACHE_DIR = os.getenv('SPATIAL_CACHE_DIR', 'spatial_cache')
+HEATMAP_BINS_X = int(os.getenv('HEATMAP_BINS_X', 12))
+HEATMAP_BINS_Y = int(os.getenv('HEATMAP_BINS_Y', 8))
+
+# Dimensões do campo no sistema de coordenadas do StatsBomb
+PITCH_LENGTH = 120
+PITCH_WIDTH = 80
+
+X_EDGES = np.linspace(0, PITCH_LENGTH, HEATMAP_BINS_X + 1)
+Y_EDGES = np.linspace(0, PITCH_WIDTH, HEATMAP_BINS_Y + 1)
+
+# Colunas dos eventos usadas nos mapas de calor e na rede de passes
+SPATIAL_COLUMNS = ['team', 'type', 'player', 'x', 'y', 'end_x', 'end_y',
+                   'pass_recipient', 'pass_outcome']
+
+# Mapas de calor e redes de passes já calculados, indexados pelo match_id
+spatial_cache = MatchCache(maxsize=EVENT_CACHE_MAXSIZE, ttl=EVENT_CACHE_TTL)
+
+
+class SpatialError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def _codes(values: pd.Series, categories: list) -> np.ndarray:
+    '''Código de cada valor na lista de categorias, -1 quando ausente'''
+    return pd.Categorical(values, categories=categories).codes.astype(np.int64)
+
+
+def _count_bins(x: np.ndarray, y: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    '''
+    Conta os eventos de cada grupo em cada célula do campo com uma única chamada
+    Returns:
+        np.ndarray: Contagens int32 (n_groups, HEATMAP_BINS_X, HEATMAP_BINS_Y)
+    '''
+    if not len(x) or not n_groups:
+        return np.zeros((n_groups, HEATMAP_BINS_X, HEATMAP_BINS_Y), dtype=np.int32)
+    sample = np.column_stack((np.clip(x, 0, PITCH_LENGTH), np.clip(y, 0, PITCH_WIDTH), groups))
+    counts = binned_statistic_dd(sample, None, statistic='count',
+                                 bins=[X_EDGES, Y_EDGES, np.arange(n_groups + 1) - 0.5]).statistic
+    return np.moveaxis(counts, 2, 0).astype(np.int32)
+
+
+@dataclass
+class MatchSpatial:
+    '''
+    Dados espaciais de uma partida em arrays compactos: contagens de eventos por
+    célula do campo (por time e tipo e por jogador) e a rede de passes concluídos
+    (passador -> recebedor) com a posição média de cada jogador
+    '''
+    teams: list
+    types: list
+    players: list
+    player_teams: np.ndarray
+    heatmaps: np.ndarray
+    player_heatmaps: np.ndarray
+    pass_matrix: np.ndarray
+    pass_positions: np.ndarray
+
+    def _team_code(self, team: str) -> int:
+        if team not in self.teams:
+            raise SpatialError(f'Time {team} não encontrado na partida.')
+        return self.teams.index(team)
+
+    def heatmap(self, team: str = None, event_type: str = None, player: str = None) -> dict:
+        '''
+        Função que retorna o mapa de calor de um time, tipo de evento ou jogador
+        Args:
+            team (str, optional): Time. Os dois, se None
+            event_type (str, optional): Tipo do evento, ex: 'Pass'. Todos, se None
+            player (str, optional): Jogador, com todos os eventos dele; ignora team e event_type
+        Returns:
+            dict: Limites das células (x_edges, y_edges), contagens (x, y) e total de eventos
+        '''
+        if player is not None:
+            if player not in self.players:
+                raise SpatialError(f'Jogador {player} não encontrado na partida.')
+            counts = self.player_heatmaps[self.players.index(player)]
+        else:
+            counts = self.heatmaps
+            if team is not None:
+                counts = counts[[self._team_code(team)]]
+            if event_type is not None:
+                if event_type not in self.types:
+                    raise SpatialError(f'Tipo de evento {event_type} não encontrado na partida.')
+                counts = counts[:, self.types.index(event_type)]
+            counts = counts.reshape(-1, HEATMAP_BINS_X, HEATMAP_BINS_Y).sum(axis=0)
+        return {
+            'x_edges': X_EDGES.tolist(),
+            'y_edges': Y_EDGES.tolist(),
+            'counts': counts.tolist(),
+            'total': int(counts.sum())
+        }
+
+    def pass_network(self, team: str) -> dict:
+        '''
+        Função que retorna a rede de passes concluídos de um time
+        Args:
+            team (str): Time
+        Returns:
+            dict: Jogadores, posição média (x, y), passes dados e a matriz passador -> recebedor
+        '''
+        members = np.flatnonzero(self.player_teams == self._team_code(team))
+        matrix = self.pass_matrix[np.ix_(members, members)]
+        involved = (matrix.sum(axis=0) + matrix.sum(axis=1)) > 0
+        members, matrix = members[involved], matrix[np.ix_(involved, involved)]
+        positions = self.pass_positions[members].astype(float).round(1)
+        return {
+            'team': team,
+            'players': [self.players[member] for member in members],
+            'x': positions[:, 0].tolist(),
+            'y': positions[:, 1].tolist(),
+            'passes': matrix.sum(axis=1).tolist(),
+            'matrix': matrix.tolist()
+        }
+
+    def save(self, path: str) -> None:
+        '''Grava os arrays em um arquivo .npz comprimido'''
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz'
+        np.savez_compressed(tmp_path, teams=np.array(self.teams, dtype=str),
+                            types=np.array(self.types, dtype=str),
+                            players=np.array(self.players, dtype=str),
+                            player_teams=self.player_teams, heatmaps=self.heatmaps,
+                            player_heatmaps=self.player_heatmaps, pass_matrix=self.pass_matrix,
+                            pass_positions=self.pass_positions)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'MatchSpatial':
+        with np.load(path) as stored:
+            return cls(teams=stored['teams'].tolist(), types=stored['types'].tolist(),
+                       players=stored['players'].tolist(), player_teams=stored['player_teams'],
+                       heatmaps=stored['heatmaps'], player_heatmaps=stored['player_heatmaps'],
+                       pass_matrix=stored['pass_matrix'], pass_positions=stored['pass_positions'])
+
+
+def compute_match_spatial(events: pd.DataFrame) -> MatchSpatial:
+    '''
+    Função que calcula, de uma vez, os mapas de calor e a rede de passes da partida
+    Args:
+        events (pd.DataFrame): Eventos normalizados, com as colunas de SPATIAL_COLUMNS
+    Returns:
+        MatchSpatial: Dados espaciais da partida
+    '''
+    if events.empty:
+        raise SpatialError('Partida sem eventos.')
+    located = events[events['x'].notna()]
+    teams = events['team'].dropna().unique().tolist()
+    types = sorted(located['type'].dropna().unique().tolist())
+    first_events = events[events['player'].notna()].drop_duplicates('player')
+    players = first_events['player'].tolist()
+    player_teams = _codes(first_events['team'], teams).astype(np.int16)
+
+    x = located['x'].to_numpy(dtype=np.float64)
+    y = located['y'].to_numpy(dtype=np.float64)
+    team_codes = _codes(located['team'], teams)
+    type_codes = _codes(located['type'], types)
+    valid = (team_codes >= 0) & (type_codes >= 0)
+    heatmaps = _count_bins(x[valid], y[valid], (team_codes * len(types) + type_codes)[valid],
+                           len(teams) * len(types))
+    heatmaps = heatmaps.reshape(len(teams), len(types), HEATMAP_BINS_X, HEATMAP_BINS_Y)
+
+    player_codes = _codes(located['player'], players)
+    has_player = player_codes >= 0
+    player_heatmaps = _count_bins(x[has_player], y[has_player], player_codes[has_player], len(players))
+
+    # Passes concluídos: sem outcome e com recebedor
+    passes = located[(located['type'] == 'Pass') & located['pass_outcome'].isna()
+                     & located['pass_recipient'].notna()]
+    passers = _codes(passes['player'], players)
+    recipients = _codes(passes['pass_recipient'], players)
+    linked = (passers >= 0) & (recipients >= 0)
+    passers, recipients = passers[linked], recipients[linked]
+    n = len(players)
+    pass_matrix = np.bincount(passers * n + recipients, minlength=n * n).reshape(n, n).astype(np.int32)
+
+    # Posição média de cada jogador na rede: origem dos passes dados e destino dos recebidos
+    codes = np.concatenate((passers, recipients))
+    pass_x = np.concatenate((passes['x'].to_numpy(dtype=np.float64)[linked],
+                             passes['end_x'].to_numpy(dtype=np.float64)[linked]))
+    pass_y = np.concatenate((passes['y'].to_numpy(dtype=np.float64)[linked],
+                             passes['end_y'].to_numpy(dtype=np.float64)[linked]))
+    known = ~(np.isnan(pass_x) | np.isnan(pass_y))
+    touches = np.bincount(codes[known], minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pass_positions = np.column_stack((
+            np.bincount(codes[known], weights=pass_x[known], minlength=n) / touches,
+            np.bincount(codes[known], weights=pass_y[known], minlength=n) / touches)).astype(np.float32)
+
+    return MatchSpatial(teams, types, players, player_teams, heatmaps, player_heatmaps,
+                        pass_matrix, pass_positions)
+
+
+def load_match_spatial(match_id: int) -> MatchSpatial:
+    '''
+    Função que retorna os dados espaciais da partida a partir do cache em memória
+    ou do arquivo .npz, calculando-os a partir dos eventos apenas na primeira vez
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        MatchSpatial: Dados espaciais da partida
+    '''
+    match_id = int(match_id)
+
+    def load() -> MatchSpatial:
+        # A grade faz parte do nome: arquivos de outra configuração de bins não são reaproveitados
+        path = os.path.join(SPATIAL_CACHE_DIR, f'{match_id}_{HEATMAP_BINS_X}x{HEATMAP_BINS_Y}.npz')
+        if os.path.exists(path):
+            return MatchSpatial.load(path)
+        from utils.dataprep import load_events
+
+        spatial = compute_match_spatial(load_events(match_id, columns=SPATIAL_COLUMNS))
+        os.makedirs(SPATIAL_CACHE_DIR, exist_ok=True)
+        spatial.save(path)
+        return spatial
+
+    return spatial_cache.get_or_load(match_id, load)
@@ -0,0 +1,50 @@
+def format_sse(data: str, event: str = None) -> str:
+    '''
+    Função que formata uma mensagem no padrão Server-Sent Events.
+    Quebras de linha viram várias linhas "data:", que o cliente junta de volta.
+    '''
+    lines = [f'event: {event}'] if event else []
+    lines += [f'data: {line}' for line in data.split('\n')]
+    return '\n'.join(lines) + '\n\n'
+
+
+async def sse_stream(chunks):
+    '''
+    Função geradora que converte os pedaços de texto do LLM em eventos SSE,
+    terminando com um evento "done" ou, em caso de falha, um evento "error"
+    Args:
+        chunks (AsyncIterator[str]): Pedaços de texto
+    Yields:
+        str: Mensagens SSE
+    '''
+    try:
+        async for chunk in chunks:
+            yield format_sse(chunk)
+        yield format_sse('', event='done')
+    except Exception as e:
+        yield format_sse(str(e), event='error')
+
+
+async def prime_stream(chunks):
+    '''
+    Função que aguarda o primeiro pedaço de texto antes de a resposta começar,
+    para que falhas do LLM antes da geração (limite de taxa, indisponibilidade,
+    prazo) virem o status HTTP adequado em vez de um evento "error"
+    Args:
+        chunks (AsyncIterator[str]): Pedaços de texto
+    Returns:
+        AsyncIterator[str]: Os mesmos pedaços, começando pelo primeiro
+    '''
+    try:
+        first = await anext(chunks)
+    except StopAsyncIteration:
+        first = None
+
+    async def replay():
+        if first is None:
+            return
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return replay()
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import threading
+import time
+
+SUMMARY_STORE_PATH = os.getenv('SUMMARY_STORE_PATH', 'summaries.sqlite')
+
+
+class SummaryStore:
+    '''
+    Armazenamento persistente dos resumos de partidas pré-calculados,
+    para que o caminho interativo seja apenas uma consulta
+    '''
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS summaries ('
+            'match_id INTEGER PRIMARY KEY, competition_id INTEGER, season_id INTEGER, '
+            'summary TEXT NOT NULL, data_seconds REAL, llm_seconds REAL, created_at REAL NOT NULL)')
+        self._db.commit()
+
+    def get(self, match_id: int):
+        '''Retorna o resumo armazenado da partida, ou None'''
+        with self._lock:
+            row = self._db.execute('SELECT summary FROM summaries WHERE match_id = ?',
+                                   (int(match_id),)).fetchone()
+        return row[0] if row else None
+
+    def set(self, match_id: int, summary: str, competition_id: int = None, season_id: int = None,
+            data_seconds: float = None, llm_seconds: float = None) -> None:
+        '''Grava o resumo da partida e o tempo gasto em cada etapa'''
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (int(match_id), competition_id, season_id, summary,
+                 data_seconds, llm_seconds, time.time()))
+            self._db.commit()
+
+    def stored_ids(self, competition_id: int, season_id: int) -> set:
+        '''Retorna os IDs das partidas da competição/temporada que já têm resumo'''
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT match_id FROM summaries WHERE competition_id = ? AND season_id = ?',
+                (competition_id, season_id)).fetchall()
+        return {row[0] for row in rows}
+
+
+summary_store = SummaryStore(SUMMARY_STORE_PATH)
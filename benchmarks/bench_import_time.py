@@ -0,0 +1,53 @@
+'''
+Benchmark do tempo de importação da API (o que cada worker do uvicorn e cada
+reinício do --reload paga antes de atender), medido com python -X importtime
+em processos novos. Lista também os módulos de maior custo cumulativo.
+
+Uso, da raíz do projeto:
+    python benchmarks/bench_import_time.py --repeat 5
+'''
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api')
+
+
+def import_times(module: str) -> dict:
+    '''Tempo cumulativo de importação, em ms, de cada módulo carregado ao importar `module`'''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=API_DIR, capture_output=True, text=True,
+                            env={**os.environ, 'GEMINI_API_KEY': os.getenv('GEMINI_API_KEY', 'benchmark')})
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    totals = [run[args.module] for run in runs]
+    print(f'import {args.module}: mediana {statistics.median(totals):.0f} ms '
+          f'(min {min(totals):.0f} ms, {args.repeat} execuções)')
+
+    last = runs[-1]
+    top_level = [name for name in last if '.' not in name and name != args.module]
+    for name in sorted(top_level, key=last.get, reverse=True)[:args.top]:
+        print(f'  {name}: {last[name]:.0f} ms')
+    heavy = [name for name in ('pandas', 'numpy', 'statsbombpy', 'google.genai', 'matplotlib')
+             if name in last]
+    print(f"Bibliotecas pesadas importadas: {', '.join(heavy) or 'nenhuma'}")
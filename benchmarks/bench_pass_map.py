@@ -0,0 +1,82 @@
+'''
+Benchmark do mapa de passes: uma chamada de pitch.arrows por passe (implementação
+antiga de tabs.pass_map_tab) contra o desenho vetorizado de pass_map.draw_pass_map.
+Os passes são sintéticos, então o benchmark roda sem acesso à rede.
+
+Uso, da raíz do projeto:
+    python benchmarks/bench_pass_map.py --passes 120 --repeat 5
+'''
+import argparse
+import io
+import os
+import sys
+import time
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from mplsoccer import Pitch  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pass_map import draw_pass_map  # noqa: E402
+
+
+def synthetic_passes(count: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        'x': rng.uniform(0, 120, count).round(1).tolist(),
+        'y': rng.uniform(0, 80, count).round(1).tolist(),
+        'end_x': rng.uniform(0, 120, count).round(1).tolist(),
+        'end_y': rng.uniform(0, 80, count).round(1).tolist(),
+        'completed': (rng.random(count) < 0.8).tolist()
+    }
+
+
+def legacy_pass_map(passes: dict):
+    '''Implementação anterior: um artista (e um rótulo de legenda) por passe.'''
+    pitch = Pitch(pitch_color='grass', line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+    for x, y, x_end, y_end, completed in zip(
+            passes['x'], passes['y'], passes['end_x'], passes['end_y'], passes['completed']):
+        if completed:
+            color, alpha, label = 'blue', 0.7, 'Passes Concluídos'
+        else:
+            color, alpha, label = 'red', 0.5, 'Passes Incompletos'
+        pitch.arrows(x, y, x_end, y_end, color=color,
+                     alpha=alpha, ax=ax, width=2, label=label)
+    handles, labels = ax.get_legend_handles_labels()
+    by_label = dict(zip(labels, handles))
+    ax.legend(by_label.values(), by_label.keys(), loc='upper left', fontsize='small')
+    return fig
+
+
+def best_of(draw, passes, repeat):
+    '''Menor tempo para desenhar e renderizar a figura em PNG'''
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = draw(passes)
+        fig.savefig(io.BytesIO(), format='png')
+        plt.close(fig)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--passes', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    passes = synthetic_passes(args.passes)
+    empty = best_of(draw_pass_map, synthetic_passes(0), args.repeat)
+    legacy = best_of(legacy_pass_map, passes, args.repeat)
+    vectorized = best_of(draw_pass_map, passes, args.repeat)
+
+    print(f'Passes: {args.passes}')
+    print(f'Campo sem passes:      {empty * 1000:.1f} ms (custo fixo do desenho do campo)')
+    print(f'Uma chamada por passe: {legacy * 1000:.1f} ms')
+    print(f'Vetorizado:            {vectorized * 1000:.1f} ms')
+    print(f'Speedup:               {legacy / vectorized:.1f}x '
+          f'({(legacy - empty) / max(vectorized - empty, 1e-6):.1f}x sem o custo fixo)')
@@ -0,0 +1,64 @@
+'''
+Benchmark do cálculo de estatísticas dos jogadores: loop por jogador (implementação
+antiga de GetMatchStats.get_player_stats) contra o motor vetorizado de utils.player_stats.
+
+Uso, da raíz do projeto:
+    python benchmarks/bench_player_stats.py --match-id 3788741 --repeat 5
+'''
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from utils.dataprep import load_events  # noqa: E402
+from utils.player_stats import compute_player_counters  # noqa: E402
+from utils.dataprep import GetMatchStats  # noqa: E402
+
+
+def legacy_player_stats(events):
+    '''Implementação anterior: uma série de filtros booleanos por jogador.'''
+    all_stats = []
+    for player_name in GetMatchStats.get_all_players(events):
+        player_events = events[events['player'] == player_name]
+        all_stats.append({
+            "player": player_name,
+            "passes_completed": int(player_events[(player_events['type'] == 'Pass') & (player_events['pass_outcome'].isna())].shape[0]),
+            "passes_attempted": int(player_events[player_events['type'] == 'Pass'].shape[0]),
+            "shots": int(player_events[player_events['type'] == 'Shot'].shape[0]),
+            "shots_on_target": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'On Target')].shape[0]),
+            "goals": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'Goal')].shape[0]),
+            "assists": int(player_events[player_events['pass_goal_assist'] == True].shape[0]),
+            "fouls_committed": int(player_events[player_events['type'] == 'Foul Committed'].shape[0]),
+            "fouls_won": int(player_events[player_events['type'] == 'Foul Won'].shape[0]),
+            "tackles": int(player_events[player_events['type'] == 'Tackle'].shape[0]),
+            "interceptions": int(player_events[player_events['type'] == 'Interception'].shape[0]),
+            "minutes_played": int(player_events['minute'].max() if not player_events.empty else 0)
+        })
+    return all_stats
+
+
+def best_of(func, events, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(events)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--match-id', type=int, default=3788741)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    events = load_events(args.match_id)
+    legacy = best_of(legacy_player_stats, events, args.repeat)
+    vectorized = best_of(compute_player_counters, events, args.repeat)
+
+    print(f'Eventos: {len(events)} | Jogadores: {events["player"].nunique()}')
+    print(f'Loop por jogador: {legacy * 1000:.1f} ms')
+    print(f'Vetorizado:       {vectorized * 1000:.1f} ms')
+    print(f'Speedup:          {legacy / vectorized:.1f}x')
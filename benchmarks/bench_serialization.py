@@ -0,0 +1,136 @@
+'''
+Benchmark da serialização dos payloads da API: bytes enviados e tempo de CPU para
+codificar e decodificar cada formato (JSON com indent=4, como no GetMatchStats
+antigo, JSON compacto, orjson e MessagePack), sem compressão e com gzip/zstd.
+
+Usa as partidas gravadas em benchmarks/fixtures, que precisam ser gravadas antes com record_fixtures.py.
+Formatos cujos pacotes não estão instalados são pulados.
+
+Uso, da raíz do projeto:
+    python benchmarks/bench_serialization.py --repeat 20
+'''
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+WORK_DIR = tempfile.mkdtemp(prefix='benchmarks-')
+os.environ.setdefault('EVENT_STORE_PATH', os.path.join(WORK_DIR, 'event_store'))
+os.environ.setdefault('SPATIAL_CACHE_DIR', os.path.join(WORK_DIR, 'spatial_cache'))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+from utils.dataprep import GetMatchStats, frame_records  # noqa: E402
+from utils.serialization import orjson, msgpack, zstandard, compress, GZIP_LEVEL  # noqa: E402
+from utils.spatial import load_match_spatial  # noqa: E402
+from fixtures import install_fixtures  # noqa: E402
+
+
+def serializers() -> dict:
+    '''Formato -> (codificar, decodificar), apenas os disponíveis'''
+    formats = {
+        'json_indent': (lambda payload: json.dumps(payload, indent=4, default=str).encode('utf-8'),
+                        json.loads),
+        'json_compact': (lambda payload: json.dumps(payload, ensure_ascii=False, separators=(',', ':'),
+                                                    default=str).encode('utf-8'),
+                         json.loads)
+    }
+    if orjson is not None:
+        formats['orjson'] = (lambda payload: orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                             orjson.loads)
+    if msgpack is not None:
+        formats['msgpack'] = (lambda payload: msgpack.packb(payload, use_bin_type=True, default=str),
+                              msgpack.unpackb)
+    return formats
+
+
+def decompressors() -> dict:
+    '''Compressão -> descompressão, apenas as disponíveis'''
+    codecs = {'identity': None, 'gzip': gzip.decompress}
+    if zstandard is not None:
+        codecs['zstd'] = zstandard.ZstdDecompressor().decompress
+    return codecs
+
+
+def cpu_ms(func, repeat: int) -> float:
+    '''Menor tempo de CPU, em ms, de `repeat` chamadas'''
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        timings.append(time.process_time() - start)
+    return min(timings) * 1000
+
+
+def match_payloads(match_id: int) -> dict:
+    '''Payloads servidos pela API para uma partida'''
+    match_stats = GetMatchStats(match_id)
+    roster = match_stats.get_roster()
+    spatial = load_match_spatial(match_id)
+    return {
+        'events': frame_records(match_stats.get_events_frame()),
+        'player_stats': match_stats.get_player_stats(),
+        'roster': roster,
+        'player_passes': match_stats.get_player_passes(roster['home_players'][0]),
+        'heatmap': spatial.heatmap(team=roster['home_team']),
+        'pass_network': spatial.pass_network(roster['home_team'])
+    }
+
+
+def bench_payload(name: str, payload, repeat: int) -> list:
+    rows = []
+    for format_name, (dumps, loads) in serializers().items():
+        body = dumps(payload)
+        encode_ms = cpu_ms(lambda: dumps(payload), repeat)
+        decode_ms = cpu_ms(lambda: loads(body), repeat)
+        for encoding, decompress in decompressors().items():
+            if decompress is None:
+                wire, compress_ms, decompress_ms = body, 0.0, 0.0
+            else:
+                wire = compress(body, encoding)
+                compress_ms = cpu_ms(lambda: compress(body, encoding), repeat)
+                decompress_ms = cpu_ms(lambda: decompress(wire), repeat)
+            rows.append({
+                'payload': name,
+                'format': format_name,
+                'encoding': encoding,
+                'bytes': len(wire),
+                'server_cpu_ms': round(encode_ms + compress_ms, 3),
+                'client_cpu_ms': round(decode_ms + decompress_ms, 3)
+            })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--match-id', type=int, help='Partida das fixtures. A primeira, se omitido')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    try:
+        manifest = install_fixtures()
+    except FileNotFoundError as e:
+        sys.exit(str(e))
+    match_id = args.match_id or manifest['match_ids'][0]
+
+    rows = []
+    try:
+        for name, payload in match_payloads(match_id).items():
+            rows += bench_payload(name, payload, args.repeat)
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    print(f'Partida {match_id} | gzip nível {GZIP_LEVEL}')
+    print(f"{'payload':<14}{'formato':<14}{'compressão':<12}{'bytes':>10}{'CPU servidor':>15}{'CPU cliente':>14}")
+    for row in rows:
+        print(f"{row['payload']:<14}{row['format']:<14}{row['encoding']:<12}{row['bytes']:>10}"
+              f"{row['server_cpu_ms']:>12.2f} ms{row['client_cpu_ms']:>11.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'match_id': match_id, 'results': rows}, file, indent=4, ensure_ascii=False)
@@ -0,0 +1,88 @@
+'''
+Cliente falso do Gemini para os benchmarks: mesma interface usada pela API
+(client.aio.models.generate_content e generate_content_stream, client.aio.caches),
+com latência configurável e texto determinístico, sem chamadas à rede.
+'''
+import asyncio
+import hashlib
+import random
+from types import SimpleNamespace
+
+
+def _response(text: str, prompt: str, cached: str = '') -> SimpleNamespace:
+    usage = SimpleNamespace(prompt_token_count=(len(cached) + len(prompt)) // 4,
+                            candidates_token_count=len(text) // 4,
+                            cached_content_token_count=len(cached) // 4 or None)
+    return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FakeCaches:
+    '''Cached content em memória: o texto registrado é usado antes do prompt'''
+
+    def __init__(self):
+        self.contents = {}
+
+    async def create(self, model, contents, config=None):
+        name = f'cachedContents/{len(self.contents) + 1}'
+        self.contents[name] = contents
+        return SimpleNamespace(name=name)
+
+    async def delete(self, name):
+        self.contents.pop(name, None)
+
+
+class FakeModels:
+    def __init__(self, caches: FakeCaches, latency: float, jitter: float, chunks: int, seed: int):
+        self.caches = caches
+        self.latency = latency
+        self.jitter = jitter
+        self.chunks = chunks
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    @staticmethod
+    def _text(prompt: str) -> str:
+        digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]
+        return f'Resumo simulado {digest}. ' * 20
+
+    def _cached(self, config) -> str:
+        name = getattr(config, 'cached_content', None)
+        return self.caches.contents[name] + '\n' if name else ''
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        cached = self._cached(config)
+        await asyncio.sleep(self._delay())
+        return _response(self._text(cached + contents), contents, cached)
+
+    async def generate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        cached = self._cached(config)
+        text = self._text(cached + contents)
+        size = max(1, len(text) // self.chunks)
+        delay = self._delay() / self.chunks
+        for start in range(0, len(text), size):
+            await asyncio.sleep(delay)
+            yield _response(text[start:start + size], contents, cached)
+
+
+class FakeGenaiClient:
+    '''
+    Substituto de genai.Client com latência configurável
+    Args:
+        latency (float): Segundos de cada geração
+        jitter (float): Variação máxima, para mais ou para menos, da latência
+        chunks (int): Pedaços devolvidos pelo streaming
+        seed (int): Semente da variação da latência
+    '''
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, chunks: int = 10, seed: int = 0):
+        caches = FakeCaches()
+        self.aio = SimpleNamespace(models=FakeModels(caches, latency, jitter, chunks, seed), caches=caches)
+
+    @property
+    def calls(self) -> int:
+        return self.aio.models.calls
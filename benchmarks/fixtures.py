@@ -0,0 +1,62 @@
+'''
+Fixtures gravadas do StatsBomb open-data para rodar os benchmarks sem rede.
+As fixtures não são versionadas: grave-as uma vez com record_fixtures.py, que
+precisa de acesso ao open-data.
+
+Os arquivos ficam em benchmarks/fixtures/data com a mesma estrutura do repositório
+open-data (competitions.json, matches/, events/, lineups/), e o manifest.json indica
+a competição, a temporada e as partidas gravadas. Para gravar, ver record_fixtures.py.
+'''
+import json
+import os
+
+FIXTURES_DIR = os.getenv('BENCHMARK_FIXTURES_DIR',
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'))
+MANIFEST_PATH = os.path.join(FIXTURES_DIR, 'manifest.json')
+
+# Prefixo das URLs do statsbombpy, substituído pelo diretório das fixtures
+OPEN_DATA_PREFIX = 'https://raw.githubusercontent.com/statsbomb/open-data/master/'
+
+
+def fixture_path(url: str) -> str:
+    '''Caminho local da fixture correspondente a uma URL do open-data'''
+    if not url.startswith(OPEN_DATA_PREFIX):
+        raise ValueError(f'URL fora do open-data: {url}')
+    return os.path.join(FIXTURES_DIR, *url[len(OPEN_DATA_PREFIX):].split('/'))
+
+
+def read_fixture(url: str):
+    '''
+    Função que substitui statsbombpy.public.get_response, lendo o JSON gravado
+    em vez de fazer a requisição HTTP
+    '''
+    path = fixture_path(url)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f'Fixture {path} não encontrada. Grave as fixtures com benchmarks/record_fixtures.py')
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def load_manifest() -> dict:
+    '''Retorna o manifesto das fixtures: competition_id, season_id e match_ids'''
+    if not os.path.exists(MANIFEST_PATH):
+        raise FileNotFoundError(
+            f'{MANIFEST_PATH} não encontrado. Grave as fixtures com benchmarks/record_fixtures.py')
+    with open(MANIFEST_PATH, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def install_fixtures() -> dict:
+    '''
+    Função que faz o statsbombpy ler as fixtures gravadas em vez da rede.
+    Deve ser chamada depois de importar utils.cache_manager, que também
+    substitui statsbombpy.public.get_response.
+    Returns:
+        dict: Manifesto das fixtures
+    '''
+    from statsbombpy import public
+
+    manifest = load_manifest()
+    public.get_response = read_fixture
+    return manifest
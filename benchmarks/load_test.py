@@ -0,0 +1,40 @@
+'''
+Teste de carga do endpoint de resumo: dispara N requisições simultâneas contra a API
+em execução e compara o tempo total com o de uma única requisição.
+Use match_ids diferentes (ou limpe o cache com DELETE /cache/llm) para medir o LLM de fato.
+
+Uso, com a API no ar:
+    python benchmarks/load_test.py --match-ids 3788741 3788742 3788743 3788744
+'''
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+SUMMARY_URL = 'http://localhost:8000/summary/match_summary'
+
+
+def post_summary(url, match_id):
+    start = time.perf_counter()
+    response = requests.post(url, json={'match_id': match_id, 'match_info': '{}'})
+    return match_id, response.status_code, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default=SUMMARY_URL)
+    parser.add_argument('--match-ids', type=int, nargs='+', required=True)
+    args = parser.parse_args()
+
+    _, _, single = post_summary(args.url, args.match_ids[0])
+    requests.delete(args.url.split('/summary')[0] + '/cache/llm')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(args.match_ids)) as pool:
+        results = list(pool.map(lambda match_id: post_summary(args.url, match_id), args.match_ids))
+    total = time.perf_counter() - start
+
+    for match_id, status, elapsed in results:
+        print(f'Partida {match_id}: HTTP {status} em {elapsed:.2f} s')
+    print(f'Uma requisição: {single:.2f} s')
+    print(f'{len(args.match_ids)} simultâneas: {total:.2f} s ({total / single:.1f}x uma requisição)')
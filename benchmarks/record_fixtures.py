@@ -0,0 +1,55 @@
+'''
+Grava partidas do StatsBomb open-data como fixtures dos benchmarks: a lista de partidas
+da competição/temporada e os eventos e escalações das primeiras partidas.
+
+Uso, da raíz do projeto:
+    python benchmarks/record_fixtures.py --competition-id 43 --season-id 106 --matches 3
+'''
+import argparse
+import json
+import os
+import requests
+from fixtures import FIXTURES_DIR, MANIFEST_PATH, OPEN_DATA_PREFIX, fixture_path
+
+MATCHES_URL = OPEN_DATA_PREFIX + 'data/matches/{competition_id}/{season_id}.json'
+EVENTS_URL = OPEN_DATA_PREFIX + 'data/events/{match_id}.json'
+LINEUPS_URL = OPEN_DATA_PREFIX + 'data/lineups/{match_id}.json'
+
+
+def record(url: str):
+    '''Baixa o JSON de uma URL do open-data e o grava como fixture'''
+    response = requests.get(url)
+    response.raise_for_status()
+    data = response.json()
+
+    path = fixture_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+    print(f'{path}: {os.path.getsize(path) / 1e6:.2f} MB')
+    return data
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--competition-id', type=int, default=43)
+    parser.add_argument('--season-id', type=int, default=106)
+    parser.add_argument('--matches', type=int, default=3)
+    parser.add_argument('--match-ids', type=int, nargs='*',
+                        help='Partidas a gravar. Se omitido, as primeiras --matches da temporada')
+    args = parser.parse_args()
+
+    matches = record(MATCHES_URL.format(competition_id=args.competition_id,
+                                        season_id=args.season_id))
+    match_ids = args.match_ids or sorted(match['match_id'] for match in matches)[:args.matches]
+
+    for match_id in match_ids:
+        record(EVENTS_URL.format(match_id=match_id))
+        record(LINEUPS_URL.format(match_id=match_id))
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as file:
+        json.dump({'competition_id': args.competition_id,
+                   'season_id': args.season_id,
+                   'match_ids': match_ids}, file, indent=4)
+    print(f'{len(match_ids)} partidas gravadas em {FIXTURES_DIR}')
@@ -0,0 +1,278 @@
+'''
+Suíte de benchmarks da API: usa partidas do StatsBomb gravadas localmente e um
+cliente falso do Gemini com latência configurável. As fixtures não fazem parte
+do repositório: grave-as antes, uma vez, com record_fixtures.py (que baixa os
+dados do open-data); depois disso a suíte roda sem rede.
+
+Mede, por partida, os métodos de GetMatchStats, a montagem dos prompts e a
+renderização do mapa de passes, e os endpoints da API via TestClient com
+requisições simultâneas. O resultado é gravado em JSON; com --compare, cada
+benchmark é comparado com uma execução anterior.
+
+Uso, da raíz do projeto:
+    python benchmarks/record_fixtures.py --competition-id 43 --season-id 106 --matches 3
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --output new.json --compare results.json
+'''
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Armazenamentos em disco isolados, para que cada execução parta do mesmo estado
+WORK_DIR = tempfile.mkdtemp(prefix='benchmarks-')
+os.environ['EVENT_STORE_PATH'] = os.path.join(WORK_DIR, 'event_store')
+os.environ['LLM_CACHE_PATH'] = os.path.join(WORK_DIR, 'llm_cache.sqlite')
+os.environ['SUMMARY_STORE_PATH'] = os.path.join(WORK_DIR, 'summaries.sqlite')
+os.environ['CATALOG_PATH'] = os.path.join(WORK_DIR, 'catalog.json')
+os.environ['SPATIAL_CACHE_DIR'] = os.path.join(WORK_DIR, 'spatial_cache')
+os.environ['PASS_MAP_CACHE_DIR'] = os.path.join(WORK_DIR, 'pass_map_cache')
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+# O cliente falso não tem cota: o limite de taxa do gateway só mediria a espera pelas fichas
+os.environ.setdefault('LLM_RATE_PER_MINUTE', '100000')
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+import matplotlib  # noqa: E402
+matplotlib.use('Agg')
+
+from fastapi.testclient import TestClient  # noqa: E402
+from statsbombpy import sb  # noqa: E402
+import main  # noqa: E402
+from routers.match_summary import build_match_summary_prompt  # noqa: E402
+from routers.player_profile import build_player_profile_prompt  # noqa: E402
+from utils.dataprep import GetMatchStats, load_events  # noqa: E402
+from utils.event_cache import event_cache, projection_cache  # noqa: E402
+from utils.context_cache import match_contexts  # noqa: E402
+from utils.match_index import match_index_cache  # noqa: E402
+from utils.llm_cache import response_cache  # noqa: E402
+from utils.match_info import build_match_info  # noqa: E402
+from utils.app_context import app_context  # noqa: E402
+from pass_map import render_pass_map, PASS_MAP_CACHE_DIR  # noqa: E402
+from fake_genai import FakeGenaiClient  # noqa: E402
+from fixtures import install_fixtures  # noqa: E402
+
+
+def clear_memory_caches() -> None:
+    event_cache.invalidate()
+    projection_cache.invalidate()
+    match_index_cache.invalidate()
+
+
+def clear_pass_maps() -> None:
+    shutil.rmtree(PASS_MAP_CACHE_DIR, ignore_errors=True)
+
+
+def summarize(timings: list) -> dict:
+    '''Estatísticas, em ms, de uma lista de tempos em segundos'''
+    ordered = sorted(timings)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3)
+    }
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    '''
+    Mede uma função: a primeira chamada (caches vazios, ou após setup) é reportada
+    em first_ms e as seguintes em min/mediana/p95/média
+    '''
+    timings = []
+    for _ in range(repeat + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    result = {'first_ms': round(timings[0] * 1000, 3)}
+    result.update(summarize(timings[1:]))
+    return result
+
+
+def bench_match(match_id: int, match_info: str, repeat: int) -> list:
+    '''Benchmarks de dados, prompts e mapa de passes de uma partida'''
+    match_stats = GetMatchStats(match_id)
+    clear_memory_caches()
+    results = [
+        ('get_events', measure(match_stats.get_events, repeat)),
+        ('load_events_from_store', measure(lambda: load_events(match_id), repeat,
+                                           setup=clear_memory_caches)),
+        ('get_lineups', measure(match_stats.get_lineups, repeat)),
+        ('get_player_stats', measure(match_stats.get_player_stats, repeat)),
+        ('get_all_players', measure(
+            lambda: GetMatchStats.get_all_players(load_events(match_id)), repeat)),
+        ('build_match_summary_prompt', measure(
+            lambda: build_match_summary_prompt(match_id, match_info), repeat,
+            setup=match_contexts.invalidate))
+    ]
+
+    roster = match_stats.get_roster()
+    player = roster['home_players'][0]
+    passes = match_stats.get_player_passes(player)
+    results += [
+        ('build_player_profile_prompt', measure(
+            lambda: build_player_profile_prompt(match_id, player), repeat,
+            setup=match_contexts.invalidate)),
+        ('pass_map_render', measure(
+            lambda: render_pass_map(match_id, player, passes), repeat, setup=clear_pass_maps)),
+        ('pass_map_cached', measure(lambda: render_pass_map(match_id, player, passes), repeat))
+    ]
+    return [dict(name=name, match_id=match_id, **stats) for name, stats in results]
+
+
+def bench_endpoint(client: TestClient, name: str, requests: list, concurrency: int,
+                   setup=None) -> dict:
+    '''
+    Dispara as requisições com `concurrency` threads sobre o mesmo TestClient
+    Args:
+        requests (list): Tuplas (método, url, json)
+    '''
+    if setup is not None:
+        setup()
+
+    def send(request):
+        method, url, payload = request
+        start = time.perf_counter()
+        response = client.request(method, url, json=payload)
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        responses = list(pool.map(send, requests))
+    total = time.perf_counter() - start
+
+    statuses = {}
+    for status, _ in responses:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    result = dict(name=name, concurrency=concurrency, requests=len(requests),
+                  total_ms=round(total * 1000, 3),
+                  throughput_rps=round(len(requests) / total, 3), statuses=statuses)
+    result.update(summarize([elapsed for _, elapsed in responses]))
+    return result
+
+
+def bench_endpoints(matches: dict, fake: FakeGenaiClient, concurrency: int, rounds: int) -> list:
+    '''Benchmarks ponta a ponta dos endpoints, com o cache do LLM limpo antes de cada rodada'''
+    app_context.client = fake
+
+    summary_requests = [('POST', '/summary/match_summary',
+                         {'match_id': match_id, 'match_info': info})
+                        for match_id, info in matches.items()] * rounds
+    profile_requests = []
+    roster_requests = []
+    passes_requests = []
+    for match_id in matches:
+        roster = GetMatchStats(match_id).get_roster()
+        player = roster['home_players'][0]
+        profile_requests.append(('POST', '/profile/player_profile',
+                                 {'match_id': match_id, 'player_name': player}))
+        roster_requests.append(('GET', f'/data/matches/{match_id}/roster', None))
+        passes_requests.append(('GET', f'/data/matches/{match_id}/players/{player}/passes', None))
+
+    with TestClient(main.app) as client:
+        return [
+            bench_endpoint(client, 'endpoint_match_summary', summary_requests, concurrency,
+                           setup=response_cache.invalidate),
+            bench_endpoint(client, 'endpoint_match_summary_cached', summary_requests, concurrency),
+            bench_endpoint(client, 'endpoint_player_profile', profile_requests * rounds, concurrency,
+                           setup=response_cache.invalidate),
+            bench_endpoint(client, 'endpoint_roster', roster_requests * rounds, concurrency),
+            bench_endpoint(client, 'endpoint_player_passes', passes_requests * rounds, concurrency)
+        ]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def result_key(result: dict) -> tuple:
+    return result['name'], result.get('match_id')
+
+
+def compare(results: list, previous_path: str, threshold: float) -> None:
+    '''Compara a mediana de cada benchmark com a de uma execução anterior'''
+    with open(previous_path, encoding='utf-8') as file:
+        previous = {result_key(result): result for result in json.load(file)['results']}
+
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or not old['median_ms']:
+            continue
+        ratio = result['median_ms'] / old['median_ms']
+        flag = '  <-- regressão' if ratio > threshold else ''
+        match = f" [{result['match_id']}]" if result.get('match_id') else ''
+        print(f"{result['name']}{match}: {old['median_ms']:.1f} -> "
+              f"{result['median_ms']:.1f} ms ({ratio:.2f}x){flag}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=2,
+                        help='Vezes que cada partida é requisitada nos benchmarks de endpoints')
+    parser.add_argument('--llm-latency', type=float, default=0.5)
+    parser.add_argument('--llm-jitter', type=float, default=0.1)
+    parser.add_argument('--output', help='Arquivo JSON de saída. Se omitido, imprime na tela')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Razão da mediana acima da qual o benchmark é marcado como regressão')
+    args = parser.parse_args()
+
+    try:
+        manifest = install_fixtures()
+    except FileNotFoundError as e:
+        sys.exit(str(e))
+    season = sb.matches(competition_id=manifest['competition_id'],
+                        season_id=manifest['season_id'], fmt='dict')
+    matches = {match_id: str(build_match_info(season[match_id]))
+               for match_id in manifest['match_ids']}
+
+    results = []
+    try:
+        for match_id, match_info in matches.items():
+            results += bench_match(match_id, match_info, args.repeat)
+        fake = FakeGenaiClient(latency=args.llm_latency, jitter=args.llm_jitter)
+        results += bench_endpoints(matches, fake, args.concurrency, args.rounds)
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'match_ids': manifest['match_ids'],
+            'args': vars(args)
+        },
+        'results': results
+    }
+
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+    output = json.dumps(report, indent=4, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+    else:
+        print(output)
@@ -1,77 +1,63 @@
 import streamlit as st
 import json
 import tabs
-from statsbombpy import sb
-from api.utils.cache_manager import cache_manager
 
+CATALOG_URL = tabs.API_URL + '/data/catalog'
+MATCHES_URL = tabs.API_URL + '/data/matches'
 
-@st.cache_data
-def load_data() -> dict:
+
+@st.cache_data(ttl=600)
+def load_catalog() -> dict:
     '''
-    Função que carrega os dados das competições da API StatsBomb
-    e os armazena em cache para evitar múltiplas requisições.
+    Função que carrega da API o índice de competições e temporadas
+    e o armazena em cache para evitar múltiplas requisições.
     Args:
         None
     Returns:
-        dict: Dicionário com as informações das competições.
+        dict: Nome da competição -> {'competition_id', 'seasons': {nome da temporada: season_id}}
     '''
-    competitions = sb.competitions(fmt='dict')
+    return tabs.get_json(CATALOG_URL)
 
-    return competitions
+
+@st.cache_data(ttl=600)
+def load_matches(competition_id: int, season_id: int) -> list:
+    '''
+    Função que carrega as partidas de uma competição/temporada pela API,
+    já com o texto da barra lateral e as informações gerais de cada partida.
+    Args:
+        competition_id (int): ID da competição
+        season_id (int): ID da temporada
+    Returns:
+        list: Lista de partidas com match_id, match_display e match_info.
+    '''
+    return tabs.get_json(MATCHES_URL, {'competition_id': competition_id,
+                                       'season_id': season_id})
 
 
-data = load_data()
+catalog = load_catalog()
 
 # Sidebar para seleção da competição
 st.sidebar.title('Selecione uma competição')
-unique_competitions = list({entry['competition_name']
-                           for entry in data.values()})
 selected_competition = st.sidebar.selectbox(
-    'Selecione competição', unique_competitions, key='competition_name'
+    'Selecione competição', list(catalog), key='competition_name'
 )
 
-selected_competition_id = None
-for entry in data.values():
-    if entry['competition_name'] == selected_competition:
-        selected_competition_id = entry['competition_id']
-        break
+selected_competition_id = catalog[selected_competition]['competition_id']
 
 # Sidebar para seleção da temporada e filtro das partidas
-filtered_seasons = [
-    (entry['season_name'], entry['season_id'])
-    for entry in data.values()
-    if entry['competition_name'] == selected_competition
-]
-
-season_names = [season[0] for season in filtered_seasons]
-season_ids = {season[0]: season[1] for season in filtered_seasons}
+season_ids = catalog[selected_competition]['seasons']
 
 selected_season_name = st.sidebar.selectbox(
-    'Selecione temporada', season_names, key='season_name'
+    'Selecione temporada', list(season_ids), key='season_name'
 )
 
 
 selected_season_id = season_ids[selected_season_name]
 
-matches = sb.matches(
-    competition_id=selected_competition_id,
-    season_id=selected_season_id,
-    fmt='dict'
-)
-
-filtered_matches = [
-    {
-        "match_id": match['match_id'],
-        "match_display": f"{match['home_team']['home_team_name']} vs {match['away_team']['away_team_name']}"
-    }
-    for match in matches.values()
-    if match['competition']['competition_id'] == selected_competition_id and match['season']['season_id'] == selected_season_id
-]
+matches = load_matches(selected_competition_id, selected_season_id)
 
-
-match_names = [match['match_display'] for match in filtered_matches]
-match_ids = {match['match_display']: match['match_id']
-             for match in filtered_matches}
+match_names = [match['match_display'] for match in matches]
+matches_by_display = {match['match_display']: match for match in matches}
 
 # Sidebar para seleção da partida
 selected_match_display = st.sidebar.selectbox(
@@ -81,26 +67,11 @@ selected_match_display = st.sidebar.selectbox(
 # Ao selecionar uma partida, exibir as abas de visão geral, perfil do jogador, mapa de passe e perguntas e respostas
 if selected_match_display is not None:
 
-    selected_match_id = match_ids[selected_match_display]
-
-    selected_match = matches[selected_match_id]
-
-    selected_match_info = {
-        'match_date': selected_match.get('match_date') if selected_match.get('match_date') is not None else 'N/A',
-        'competition_country': selected_match.get('competition', {}).get('country_name') if selected_match.get('competition', {}).get('country_name') is not None else 'N/A',
-        'competition_name': selected_match.get('competition', {}).get('competition_name') if selected_match.get('competition', {}).get('competition_name') is not None else 'N/A',
-        'home_team_country': selected_match.get('home_team', {}).get('country', {}).get('name') if selected_match.get('home_team', {}).get('country', {}).get('name') is not None else 'N/A',
-        'away_team_country': selected_match.get('away_team', {}).get('country', {}).get('name') if selected_match.get('away_team', {}).get('country', {}).get('name') is not None else 'N/A',
-        'stadium_name': selected_match.get('stadium', {}).get('name') if selected_match.get('stadium', {}).get('name') is not None else 'N/A',
-        'season_name': selected_match.get('season', {}).get('season_name') if selected_match.get('season', {}).get('season_name') is not None else 'N/A',
-        'home_team_name': selected_match.get('home_team', {}).get('home_team_name') if selected_match.get('home_team', {}).get('home_team_name') is not None else 'N/A',
-        'away_team_name': selected_match.get('away_team', {}).get('away_team_name') if selected_match.get('away_team', {}).get('away_team_name') is not None else 'N/A',
-        'home_team_manager': selected_match.get('home_team', {}).get('managers', [{}])[0].get('name') if selected_match.get('home_team', {}).get('managers') else 'N/A',
-        'away_team_manager': selected_match.get('away_team', {}).get('managers', [{}])[0].get('name') if selected_match.get('away_team', {}).get('managers') else 'N/A',
-        'home_score': selected_match.get('home_score') if selected_match.get('home_score') is not None else 'N/A',
-        'away_score': selected_match.get('away_score') if selected_match.get('away_score') is not None else 'N/A',
-        'competition_stage': selected_match.get('competition_stage', {}).get('name') if selected_match.get('competition_stage', {}).get('name') is not None else 'N/A'
-    }
+    selected_match = matches_by_display[selected_match_display]
+
+    selected_match_id = selected_match['match_id']
+
+    selected_match_info = selected_match['match_info']
 
     json_selected_match_info = json.dumps(selected_match_info, indent=4)
 
@@ -108,11 +79,15 @@ if selected_match_display is not None:
 
     st.session_state['selected_match_id'] = selected_match_id
 
-    (overview_tab, player_stats_tab, pass_map_tab) = st.tabs(
-        ("Visão Geral da Partida", "Perfil do Jogador", "Mapa de Passe"))
+    (overview_tab, player_stats_tab, pass_map_tab, heatmap_tab, pass_network_tab) = st.tabs(
+        ("Visão Geral da Partida", "Perfil do Jogador", "Mapa de Passe", "Mapa de Calor", "Rede de Passes"))
 
     tabs.tab_overview(overview_tab)
 
     tabs.player_stats_tab(player_stats_tab)
 
     tabs.pass_map_tab(pass_map_tab)
+
+    tabs.heatmap_tab(heatmap_tab)
+
+    tabs.pass_network_tab(pass_network_tab)
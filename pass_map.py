@@ -0,0 +1,153 @@
+import hashlib
+import io
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from mplsoccer import Pitch
+
+PASS_MAP_CACHE_DIR = os.getenv('PASS_MAP_CACHE_DIR', 'pass_map_cache')
+
+
+def draw_pass_map(passes: dict):
+    '''
+    Função que desenha o mapa de passes de um jogador com uma única chamada
+    vetorizada de arrows para os passes concluídos e outra para os incompletos.
+    Args:
+        passes (dict): Listas x, y, end_x, end_y e completed, como servido pela API
+    Returns:
+        matplotlib.figure.Figure: Figura com o mapa de passes
+    '''
+    x = np.asarray(passes['x'], dtype=float)
+    y = np.asarray(passes['y'], dtype=float)
+    end_x = np.asarray(passes['end_x'], dtype=float)
+    end_y = np.asarray(passes['end_y'], dtype=float)
+    completed = np.asarray(passes['completed'], dtype=bool)
+
+    pitch = Pitch(pitch_color='grass', line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+
+    for mask, color, alpha, label in ((completed, 'blue', 0.7, 'Passes Concluídos'),
+                                      (~completed, 'red', 0.5, 'Passes Incompletos')):
+        if mask.any():
+            pitch.arrows(x[mask], y[mask], end_x[mask], end_y[mask], color=color,
+                         alpha=alpha, ax=ax, width=2, label=label)
+
+    if completed.size:
+        ax.legend(loc='upper left', fontsize='small')
+    return fig
+
+
+def draw_heatmap(heatmap: dict):
+    '''
+    Função que desenha o mapa de calor já agregado pela API sobre o campo
+    Args:
+        heatmap (dict): x_edges, y_edges e counts (x, y), como servido pela API
+    Returns:
+        matplotlib.figure.Figure: Figura com o mapa de calor
+    '''
+    x_grid, y_grid = np.meshgrid(heatmap['x_edges'], heatmap['y_edges'])
+    statistic = np.asarray(heatmap['counts'], dtype=float).T
+    stats = {'statistic': statistic, 'x_grid': x_grid, 'y_grid': y_grid,
+             'cx': (x_grid[:-1, :-1] + x_grid[1:, 1:]) / 2,
+             'cy': (y_grid[:-1, :-1] + y_grid[1:, 1:]) / 2}
+
+    pitch = Pitch(pitch_color='grass', line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+    pitch.heatmap(stats, ax=ax, cmap='hot', edgecolors='#22312b', alpha=0.7)
+    return fig
+
+
+def draw_pass_network(network: dict, min_passes: int = 2):
+    '''
+    Função que desenha a rede de passes de um time: cada jogador na posição média
+    e linhas, mais grossas quanto mais passes, entre os pares com ao menos min_passes
+    Args:
+        network (dict): players, x, y, passes e matrix, como servido pela API
+        min_passes (int): Passes mínimos entre dois jogadores para desenhar a ligação
+    Returns:
+        matplotlib.figure.Figure: Figura com a rede de passes
+    '''
+    x = np.asarray(network['x'], dtype=float)
+    y = np.asarray(network['y'], dtype=float)
+    matrix = np.asarray(network['matrix'], dtype=float).reshape(len(x), len(x))
+    passes = np.asarray(network['passes'], dtype=float)
+
+    pitch = Pitch(pitch_color='grass', line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+
+    # Passes nos dois sentidos somados, uma linha por par de jogadores
+    pairs = np.triu(matrix + matrix.T, k=1)
+    passers, recipients = np.nonzero(pairs >= min_passes)
+    if passers.size:
+        counts = pairs[passers, recipients]
+        pitch.lines(x[passers], y[passers], x[recipients], y[recipients],
+                    lw=1 + 9 * counts / counts.max(), color='white', alpha=0.6, zorder=2, ax=ax)
+
+    sizes = 200 + 1000 * passes / passes.max() if passes.size and passes.max() else 200
+    pitch.scatter(x, y, s=sizes, color='blue', edgecolors='white', zorder=3, ax=ax)
+    for player, player_x, player_y in zip(network['players'], x, y):
+        pitch.annotate(player.split()[-1], (player_x, player_y - 3), ha='center', va='center',
+                       fontsize=8, color='white', zorder=4, ax=ax)
+    return fig
+
+
+def render_cached(key: str, draw, fmt: str = 'png') -> bytes:
+    '''
+    Função que retorna uma figura renderizada (PNG ou SVG), guardando o arquivo
+    em disco pela chave para as próximas visualizações.
+    Args:
+        key (str): Identificação da figura, ex: match_id e jogador
+        draw (callable): Função sem argumentos que desenha a figura
+        fmt (str): 'png' ou 'svg'
+    Returns:
+        bytes: Imagem renderizada
+    '''
+    path = os.path.join(PASS_MAP_CACHE_DIR, f'{key}.{fmt}')
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            return file.read()
+
+    fig = draw()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches='tight')
+    plt.close(fig)
+    image = buffer.getvalue()
+
+    os.makedirs(PASS_MAP_CACHE_DIR, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(image)
+    os.replace(tmp_path, path)
+    return image
+
+
+def _name_key(*names) -> str:
+    return hashlib.sha1('|'.join(str(name) for name in names).encode('utf-8')).hexdigest()[:16]
+
+
+def render_pass_map(match_id: int, player_name: str, passes: dict, fmt: str = 'png') -> bytes:
+    '''
+    Função que retorna o mapa de passes renderizado (PNG ou SVG), guardando
+    o arquivo em disco por (match_id, jogador) para as próximas visualizações.
+    Args:
+        match_id (int): ID da partida
+        player_name (str): Nome completo do jogador
+        passes (dict): Passes do jogador, como servido pela API
+        fmt (str): 'png' ou 'svg'
+    Returns:
+        bytes: Imagem renderizada
+    '''
+    return render_cached(f'{int(match_id)}_{_name_key(player_name)}', lambda: draw_pass_map(passes), fmt)
+
+
+def render_heatmap(match_id: int, team: str, event_type: str, heatmap: dict, fmt: str = 'png') -> bytes:
+    '''Mapa de calor renderizado, guardado em disco por (match_id, time, tipo de evento)'''
+    return render_cached(f'heatmap_{int(match_id)}_{_name_key(team, event_type)}',
+                         lambda: draw_heatmap(heatmap), fmt)
+
+
+def render_pass_network(match_id: int, team: str, network: dict, min_passes: int = 2,
+                        fmt: str = 'png') -> bytes:
+    '''Rede de passes renderizada, guardada em disco por (match_id, time, passes mínimos)'''
+    return render_cached(f'network_{int(match_id)}_{_name_key(team, min_passes)}',
+                         lambda: draw_pass_network(network, min_passes), fmt)
@@ -1,15 +1,132 @@
 import streamlit as st
-import pandas as pd
 import requests
-from statsbombpy import sb
-from mplsoccer import Pitch
+from pass_map import render_pass_map, render_heatmap, render_pass_network
 from requests.exceptions import RequestException
-
-SUMMARY_URL = 'http://localhost:8000/summary/match_summary'
-PROFILE_URL = 'http://localhost:8000/profile/player_profile'
+from urllib.parse import quote
+
+SUMMARY_STREAM_URL = 'http://localhost:8000/summary/match_summary/stream'
+PROFILE_STREAM_URL = 'http://localhost:8000/profile/player_profile/stream'
+API_URL = 'http://localhost:8000'
+ROSTER_URL = API_URL + '/data/matches/{match_id}/roster'
+PASSES_URL = API_URL + '/data/matches/{match_id}/players/{player_name}/passes'
+HEATMAP_URL = API_URL + '/data/matches/{match_id}/heatmap'
+PASS_NETWORK_URL = API_URL + '/data/matches/{match_id}/teams/{team}/pass_network'
+HEATMAP_EVENT_TYPES = {'Todos os eventos': None, 'Passes': 'Pass', 'Conduções': 'Carry',
+                       'Pressões': 'Pressure', 'Recuperações': 'Ball Recovery', 'Chutes': 'Shot'}
 ERROR_MESSAGE = 'Desculpe, ocorreu um erro ao processar sua pergunta. Por favor, tente novamente.'
 
 
+# MessagePack é mais compacto e rápido de decodificar; sem o pacote, a API responde em JSON
+try:
+    import msgpack
+    ACCEPT = 'application/msgpack, application/json;q=0.9'
+except ImportError:
+    msgpack = None
+    ACCEPT = 'application/json'
+
+# Última versão recebida de cada URL, revalidada com If-None-Match
+_etag_cache = {}
+
+
+def get_json(url: str, params: dict = None):
+    '''
+    Função que busca dados na API, reaproveitando a última resposta quando
+    o servidor indica com 304 que ela não mudou
+    Args:
+        url (str): URL do endpoint
+        params (dict, optional): Parâmetros da query string
+    Returns:
+        Payload JSON da resposta
+    '''
+    key = (url, tuple(sorted((params or {}).items())))
+    headers = {'Accept': ACCEPT}
+    if key in _etag_cache:
+        headers['If-None-Match'] = _etag_cache[key][0]
+
+    response = requests.get(url, params=params, headers=headers)
+    if response.status_code == 304:
+        return _etag_cache[key][1]
+    response.raise_for_status()
+
+    if msgpack is not None and response.headers.get('Content-Type', '').endswith('msgpack'):
+        payload = msgpack.unpackb(response.content)
+    else:
+        payload = response.json()
+    if 'ETag' in response.headers:
+        _etag_cache[key] = (response.headers['ETag'], payload)
+    return payload
+
+
+@st.cache_data(ttl=300)
+def load_roster(match_id: int) -> dict:
+    '''Times e jogadores da partida, servidos pela API'''
+    return get_json(ROSTER_URL.format(match_id=match_id))
+
+
+@st.cache_data(ttl=300)
+def load_player_passes(match_id: int, player_name: str) -> dict:
+    '''Passes do jogador na partida, servidos pela API'''
+    return get_json(PASSES_URL.format(match_id=match_id, player_name=quote(player_name, safe='')))
+
+
+@st.cache_data(ttl=300)
+def load_heatmap(match_id: int, team: str, event_type: str = None) -> dict:
+    '''Mapa de calor do time na partida, já agregado pela API'''
+    params = {'team': team}
+    if event_type is not None:
+        params['event_type'] = event_type
+    return get_json(HEATMAP_URL.format(match_id=match_id), params)
+
+
+@st.cache_data(ttl=300)
+def load_pass_network(match_id: int, team: str) -> dict:
+    '''Rede de passes do time na partida, servida pela API'''
+    return get_json(PASS_NETWORK_URL.format(match_id=match_id, team=quote(team, safe='')))
+
+
+def stream_sse(url: str, payload: dict):
+    '''
+    Função geradora que lê a resposta Server-Sent Events da API e devolve o texto
+    em pedaços à medida que chega.
+    Args:
+        url (str): URL do endpoint de streaming
+        payload (dict): Corpo JSON da requisição
+    Yields:
+        str: Pedaços do texto gerado
+    '''
+    with requests.post(url, json=payload, stream=True) as response:
+        response.raise_for_status()
+        event, data = None, []
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith('event: '):
+                event = line[len('event: '):]
+            elif line.startswith('data: '):
+                data.append(line[len('data: '):])
+            elif line == '':
+                text = '\n'.join(data)
+                if event == 'error':
+                    raise RequestException(text)
+                if event == 'done':
+                    return
+                if data:
+                    yield text
+                event, data = None, []
+
+
+def render_stream(url: str, payload: dict):
+    '''
+    Função que exibe o texto gerado pelo LLM à medida que ele chega da API.
+    '''
+    placeholder = st.empty()
+    text = ''
+    for chunk in stream_sse(url, payload):
+        text += chunk
+        placeholder.markdown(
+            f'<div style="text-align: justify;">{text}</div>', unsafe_allow_html=True)
+    if not text:
+        placeholder.markdown(ERROR_MESSAGE)
+
+
 def tab_overview(mytab):
     '''
     Função que cria a aba de visão geral da partida e narração.
@@ -42,17 +159,11 @@ def tab_overview(mytab):
             if (json_selected_match_info and st.session_state['selected_match_id']) is not None:
                 with st.spinner('Gerando narração sensacional...'):
                     try:
-                        response = requests.post(
-                            SUMMARY_URL,
-                            json={'match_id': int(st.session_state['selected_match_id']),
-                                  'match_info': str(json_selected_match_info)}
+                        render_stream(
+                            SUMMARY_STREAM_URL,
+                            {'match_id': int(st.session_state['selected_match_id']),
+                             'match_info': str(json_selected_match_info)}
                         )
-                        response.raise_for_status()
-
-                        summary = response.json().get('assistant', ERROR_MESSAGE)
-
-                        st.markdown(
-                            f'<div style="text-align: justify;">{summary}</div>', unsafe_allow_html=True)
                     except RequestException as e:
                         error_message = f'Erro de conexão: {str(e)}'
                         st.error(error_message)
@@ -68,20 +179,9 @@ def player_stats_tab(mytab):
 
         match_id = st.session_state['selected_match_id']
 
-        events = sb.events(match_id=int(match_id))
+        roster = load_roster(int(match_id))
 
-        home_team = events[events['type'] == 'Starting XI'].iloc[0]['team']
-        away_team = [team for team in events['team'].unique()
-                     if team != home_team][0]
-
-        home_team_events = events[events['team'] == home_team]
-        away_team_events = events[events['team'] == away_team]
-
-        home_team_players = home_team_events['player'].dropna().unique()
-        away_team_players = away_team_events['player'].dropna().unique()
-
-        all_players = list(
-            set(home_team_players).union(set(away_team_players)))
+        all_players = roster['home_players'] + roster['away_players']
 
         selected_player = st.selectbox(
             'Selecione um jogador', all_players, index=None)
@@ -90,17 +190,11 @@ def player_stats_tab(mytab):
             if (selected_player and match_id) is not None:
                 with st.spinner('Gerando um perfil impecável...'):
                     try:
-                        response = requests.post(
-                            PROFILE_URL,
-                            json={'match_id': match_id,
-                                  'player_name': selected_player}
+                        render_stream(
+                            PROFILE_STREAM_URL,
+                            {'match_id': match_id,
+                             'player_name': selected_player}
                         )
-                        response.raise_for_status()
-
-                        profile = response.json().get('assistant', ERROR_MESSAGE)
-
-                        st.markdown(
-                            f'<div style="text-align: justify;">{profile}</div>', unsafe_allow_html=True)
                     except RequestException as e:
                         error_message = f'Erro de conexão: {str(e)}'
                         st.error(error_message)
@@ -116,58 +210,78 @@ def pass_map_tab(mytab):
             'Selecione um jogador para visualizar o mapa de passe dele na partida')
 
         match_id = st.session_state['selected_match_id']
-        events = sb.events(match_id=match_id)
+        roster = load_roster(int(match_id))
 
-        home_team = events[events['type'] == 'Starting XI'].iloc[0]['team']
-        away_team = [team for team in events['team'].unique()
-                     if team != home_team][0]
+        home_team = roster['home_team']
+        away_team = roster['away_team']
 
         selected_team = st.selectbox(
             'Selecione time', [home_team, away_team], key='pass_team_selectbox', index=None)
 
         if selected_team is not None:
 
-            events = sb.events(match_id=match_id)
-            team_events = events[events['team'] == selected_team]
-            players = team_events['player'].unique()
-            players = players[~pd.isna(players)]
+            players = roster['home_players'] if selected_team == home_team else roster['away_players']
             selected_player = st.selectbox(
                 'Selecione jogador', players, key='pass_player_selectbox', index=None)
 
             if selected_player is not None:
                 with st.spinner('Carregando mapa de passes...'):
-                    player_events = team_events[team_events['player']
-                                                == selected_player]
-
-                    pitch = Pitch(pitch_color='grass',
-                                  line_color='white', line_zorder=2)
-                    fig, ax = pitch.draw()
-
-                    pass_events = player_events[player_events['type'] == 'Pass']
-
-                    for _, event in pass_events.iterrows():
-                        x = event['location'][0]
-                        y = event['location'][1]
-                        pass_end_location = event['pass_end_location']
-                        x_end = pass_end_location[0]
-                        y_end = pass_end_location[1]
-                        pass_outcome = event['pass_outcome']
-
-                        if pd.isna(pass_outcome):
-                            color = 'blue'
-                            alpha = 0.7
-                            label = 'Passes Concluídos'
-                        else:
-                            color = 'red'
-                            alpha = 0.5
-                            label = 'Passes Incompletos'
-
-                        pitch.arrows(x, y, x_end, y_end, color=color,
-                                     alpha=alpha, ax=ax, width=2, label=label)
-
-                    handles, labels = ax.get_legend_handles_labels()
-                    by_label = dict(zip(labels, handles))
-                    ax.legend(by_label.values(), by_label.keys(),
-                              loc='upper left', fontsize='small')
-
-                    st.pyplot(fig)
+                    passes = load_player_passes(int(match_id), selected_player)
+
+                    st.image(render_pass_map(int(match_id), selected_player, passes))
+
+
+def heatmap_tab(mytab):
+    '''
+    Criação da aba de mapa de calor.
+    '''
+    with mytab:
+        st.title('Mapa de Calor:fire:')
+        st.write('Selecione um time e um tipo de evento para visualizar onde eles aconteceram')
+
+        match_id = st.session_state['selected_match_id']
+        roster = load_roster(int(match_id))
+
+        selected_team = st.selectbox(
+            'Selecione time', [roster['home_team'], roster['away_team']],
+            key='heatmap_team_selectbox', index=None)
+        selected_type = st.selectbox(
+            'Selecione tipo de evento', list(HEATMAP_EVENT_TYPES), key='heatmap_type_selectbox')
+
+        if selected_team is not None:
+            event_type = HEATMAP_EVENT_TYPES[selected_type]
+            with st.spinner('Carregando mapa de calor...'):
+                try:
+                    heatmap = load_heatmap(int(match_id), selected_team, event_type)
+                except RequestException as e:
+                    st.error(f'Erro de conexão: {str(e)}')
+                    return
+                st.image(render_heatmap(int(match_id), selected_team, event_type, heatmap))
+                st.caption(f"{heatmap['total']} eventos")
+
+
+def pass_network_tab(mytab):
+    '''
+    Criação da aba de rede de passes.
+    '''
+    with mytab:
+        st.title('Rede de Passes:handshake:')
+        st.write('Selecione um time para visualizar a posição média dos jogadores e os passes entre eles')
+
+        match_id = st.session_state['selected_match_id']
+        roster = load_roster(int(match_id))
+
+        selected_team = st.selectbox(
+            'Selecione time', [roster['home_team'], roster['away_team']],
+            key='network_team_selectbox', index=None)
+        min_passes = st.slider('Passes mínimos entre dois jogadores', 1, 10, 3,
+                               key='network_min_passes')
+
+        if selected_team is not None:
+            with st.spinner('Carregando rede de passes...'):
+                try:
+                    network = load_pass_network(int(match_id), selected_team)
+                except RequestException as e:
+                    st.error(f'Erro de conexão: {str(e)}')
+                    return
+                st.image(render_pass_network(int(match_id), selected_team, network, min_passes))
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Armazenamentos em disco isolados e LLM local, sem rede nem cota
+WORK_DIR = tempfile.mkdtemp(prefix='tests-')
+os.environ['EVENT_STORE_PATH'] = os.path.join(WORK_DIR, 'event_store')
+os.environ['LLM_CACHE_PATH'] = os.path.join(WORK_DIR, 'llm_cache.sqlite')
+os.environ['SUMMARY_STORE_PATH'] = os.path.join(WORK_DIR, 'summaries.sqlite')
+os.environ['CATALOG_PATH'] = os.path.join(WORK_DIR, 'catalog.json')
+os.environ['SPATIAL_CACHE_DIR'] = os.path.join(WORK_DIR, 'spatial_cache')
+os.environ['LLM_BACKEND'] = 'stub'
+
+sys.path.insert(0, os.path.join(ROOT, 'api'))
@@ -0,0 +1,59 @@
+import time
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+import jobs.precompute_summaries as precompute_summaries
+import routers.batch as batch
+from main import app
+
+
+def unavailable_matches(**kwargs):
+    raise OSError('sem rede')
+
+
+@pytest.fixture
+def client(monkeypatch):
+    '''API com o StatsBomb fora do ar, para que os jobs falhem ao listar as partidas'''
+    monkeypatch.setattr(precompute_summaries, 'app_context',
+                        SimpleNamespace(sb=SimpleNamespace(matches=unavailable_matches)))
+    batch.jobs.clear()
+    with TestClient(app) as client:
+        yield client
+    batch.jobs.clear()
+
+
+def wait_finished(client, job_id: str) -> dict:
+    for _ in range(100):
+        progress = client.get(f'/batch/jobs/{job_id}').json()
+        if progress['status'] not in ('pending', 'running'):
+            return progress
+        time.sleep(0.01)
+    raise AssertionError('O job não terminou')
+
+
+@pytest.mark.parametrize('params', [{'concurrency': 0}, {'concurrency': -1},
+                                    {'rate_per_minute': 0}, {'rate_per_minute': -5},
+                                    {'rate_per_minute': 1e6}])
+def test_invalid_limits_are_rejected(client, params):
+    response = client.post('/batch/season_summaries', json={'competition_id': 43, 'season_id': 106, **params})
+    assert response.status_code == 422
+    assert not batch.jobs
+
+
+def test_failed_job_records_the_error(client, caplog):
+    response = client.post('/batch/season_summaries', json={'competition_id': 43, 'season_id': 106})
+    progress = wait_finished(client, response.json()['job_id'])
+    assert progress['status'] == 'failed'
+    assert progress['error'] == 'sem rede'
+    assert 'Task exception was never retrieved' not in caplog.text
+
+
+def test_finished_jobs_are_discarded(client, monkeypatch):
+    monkeypatch.setattr(batch, 'BATCH_MAX_JOBS', 2)
+    job_ids = []
+    for _ in range(3):
+        response = client.post('/batch/season_summaries', json={'competition_id': 43, 'season_id': 106})
+        job_ids.append(response.json()['job_id'])
+        wait_finished(client, job_ids[-1])
+    assert list(batch.jobs) == job_ids[1:]
+    assert client.get(f'/batch/jobs/{job_ids[0]}').status_code == 404
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import utils.llm as llm
+from utils.context_cache import ContextCache, MatchContext, CONTEXT_CACHE_MODEL, inline_prompt
+from utils.llm_gateway import LLMGateway, GeminiBackend
+from utils.prompt_encoder import PROMPT_TOKEN_BUDGET, CHARS_PER_TOKEN
+
+
+class FakeGemini:
+    '''Cliente do Gemini em memória, com o cached content usado antes do prompt'''
+
+    def __init__(self):
+        self.contents = {}
+        self.calls = []
+        self.aio = SimpleNamespace(models=self, caches=self)
+
+    async def create(self, model, contents, config=None):
+        name = f'cachedContents/{len(self.contents) + 1}'
+        self.contents[name] = contents
+        return SimpleNamespace(name=name)
+
+    async def delete(self, name):
+        self.contents.pop(name, None)
+
+    async def generate_content(self, model, contents, config=None):
+        cached = self.contents.get(config.cached_content)
+        prompt = contents if cached is None else f'{cached}\n{contents}'
+        self.calls.append((model, config.cached_content))
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // CHARS_PER_TOKEN,
+                                candidates_token_count=1,
+                                cached_content_token_count=len(cached or '') // CHARS_PER_TOKEN)
+        return SimpleNamespace(text=f'resumo {len(prompt)}', usage_metadata=usage)
+
+
+def make_context(tokens: int, key: str = 'match:1:abc') -> MatchContext:
+    return MatchContext(key, 'x' * tokens * CHARS_PER_TOKEN, tokens)
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    client = FakeGemini()
+    gateway = LLMGateway(GeminiBackend(lambda: client), rate_per_minute=60000, burst=10)
+    monkeypatch.setattr(llm, 'app_context', SimpleNamespace(llm=gateway))
+    monkeypatch.setattr(llm, 'context_cache', ContextCache(ttl=3600, maxsize=4, enabled=True))
+    return client
+
+
+def test_default_model_accepts_a_match_context():
+    minimum = GeminiBackend.min_cache_tokens(CONTEXT_CACHE_MODEL)
+    assert minimum < PROMPT_TOKEN_BUDGET
+    assert GeminiBackend.min_cache_tokens('gemini-1.5-flash-002') > PROMPT_TOKEN_BUDGET
+    assert GeminiBackend.min_cache_tokens('outro-modelo') == max(
+        GeminiBackend.min_cache_tokens(model) for model in ('gemini-1.5-flash', 'gemini-2.0-flash'))
+
+
+def test_context_at_the_gemini_minimum_is_cached(gemini):
+    context = make_context(GeminiBackend.min_cache_tokens(CONTEXT_CACHE_MODEL))
+
+    async def run():
+        first = await llm.generate_text('resumo da partida', context=context)
+        second = await llm.generate_text('perfil do jogador', context=context)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(gemini.contents) == 1
+    name = next(iter(gemini.contents))
+    assert gemini.calls == [(CONTEXT_CACHE_MODEL, name), (CONTEXT_CACHE_MODEL, name)]
+    # O texto é o mesmo que o modelo geraria com o contexto no prompt
+    assert first == f"resumo {len(inline_prompt(context, 'resumo da partida'))}"
+    stats = llm.context_cache.stats()
+    assert (stats['creates'], stats['hits'], stats['inline']) == (1, 1, 0)
+
+
+def test_context_below_the_gemini_minimum_goes_inline(gemini):
+    context = make_context(GeminiBackend.min_cache_tokens(CONTEXT_CACHE_MODEL) - 1)
+    asyncio.run(llm.generate_text('resumo da partida', context=context))
+    assert not gemini.contents
+    assert gemini.calls == [(llm.MODEL, None)]
+    assert llm.context_cache.stats()['inline'] == 1
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+import utils.dataprep as dataprep
+from utils.event_cache import event_cache, projection_cache
+
+
+class FakeEventStore:
+    '''Armazenamento de eventos em memória que conta as leituras'''
+
+    def __init__(self):
+        self.loads = []
+
+    def load(self, match_id, columns=None):
+        self.loads.append((match_id, columns))
+        events = pd.DataFrame({'type': ['Pass', 'Shot'], 'player': ['Ana', 'Bia'],
+                               'team': ['Brasil', 'Brasil'], 'minute': [1, 2]})
+        return events if columns is None else events[[column for column in columns if column in events]]
+
+
+@pytest.fixture(autouse=True)
+def fake_store(monkeypatch):
+    store = FakeEventStore()
+    monkeypatch.setattr(dataprep, 'event_store', store)
+    monkeypatch.setattr(dataprep, 'normalize_events', lambda events: events)
+    event_cache.invalidate()
+    projection_cache.invalidate()
+    yield store
+    event_cache.invalidate()
+    projection_cache.invalidate()
+
+
+def test_projections_do_not_use_the_event_cache(fake_store):
+    for match_id in range(3):
+        dataprep.load_events(match_id, columns=['type', 'player'])
+    assert event_cache.stats()['size'] == 0
+    assert projection_cache.stats()['size'] == 3
+
+
+def test_projection_is_cached_by_columns(fake_store):
+    first = dataprep.load_events(1, columns=['type', 'player'])
+    second = dataprep.load_events(1, columns=['type', 'player'])
+    assert first is second
+    assert list(first.columns) == ['type', 'player']
+    assert len(fake_store.loads) == 1
+
+
+def test_projection_comes_from_the_cached_full_frame(fake_store):
+    events = dataprep.load_events(1)
+    projected = dataprep.load_events(1, columns=['minute', 'missing'])
+    assert list(projected.columns) == ['minute']
+    assert projected['minute'].tolist() == events['minute'].tolist()
+    assert len(fake_store.loads) == 1
+    assert projection_cache.stats()['size'] == 0
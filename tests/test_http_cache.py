@@ -0,0 +1,101 @@
+import json
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from utils import serialization
+from utils.http_cache import etag_response
+from utils.serialization import negotiate_media_type, negotiate_encoding, dumps_json
+
+SMALL = {'player': 'Ana', 'passes': 3}
+LARGE = {'x': np.arange(2000, dtype=np.float64), 'completed': [True] * 2000}
+
+app = FastAPI()
+
+
+@app.get('/small')
+async def small(request: Request):
+    return etag_response(request, SMALL)
+
+
+@app.get('/large')
+async def large(request: Request):
+    return etag_response(request, LARGE)
+
+
+client = TestClient(app)
+
+
+def test_json_is_the_default_media_type():
+    assert negotiate_media_type(None) == 'application/json'
+    assert negotiate_media_type('*/*') == 'application/json'
+    assert negotiate_media_type('text/html, application/xml;q=0.9') == 'application/json'
+
+
+def test_msgpack_is_chosen_only_when_available(monkeypatch):
+    monkeypatch.setattr(serialization, 'msgpack', None)
+    assert negotiate_media_type('application/msgpack') == 'application/json'
+    monkeypatch.setattr(serialization, 'msgpack', object())
+    assert negotiate_media_type('application/msgpack') == 'application/msgpack'
+    assert negotiate_media_type('application/json, application/msgpack;q=0.5') == 'application/json'
+
+
+def test_encoding_follows_weights(monkeypatch):
+    monkeypatch.setattr(serialization, 'zstandard', None)
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding('gzip, deflate, br') == 'gzip'
+    assert negotiate_encoding('gzip;q=0') is None
+    assert negotiate_encoding('*') == 'gzip'
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_numpy_values_are_serialized(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    body = dumps_json({'array': np.arange(3), 'float': np.float32(1.5), 'int': np.int64(2),
+                       'nan': float('nan'), 'tuple': (1, 2)})
+    assert json.loads(body) == {'array': [0, 1, 2], 'float': 1.5, 'int': 2, 'nan': None, 'tuple': [1, 2]}
+
+
+def test_small_bodies_are_not_compressed():
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+    assert response.json() == SMALL
+    assert response.headers['vary'] == 'Accept, Accept-Encoding'
+
+
+def test_large_bodies_are_compressed():
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert len(response.content) > 0
+    assert response.json()['x'][:3] == [0.0, 1.0, 2.0]
+
+
+def test_matching_etag_returns_304():
+    first = client.get('/small')
+    etag = first.headers['etag']
+    second = client.get('/small', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.content == b''
+    assert second.headers['etag'] == etag
+    assert client.get('/small', headers={'If-None-Match': '"outro"'}).status_code == 200
+
+
+def test_each_representation_has_its_own_etag():
+    plain = client.get('/large', headers={'Accept-Encoding': 'identity'})
+    compressed = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in plain.headers
+    assert plain.headers['etag'] != compressed.headers['etag']
+    revalidated = client.get('/large', headers={'Accept-Encoding': 'gzip',
+                                                'If-None-Match': compressed.headers['etag']})
+    assert revalidated.status_code == 304
+
+
+def test_msgpack_response():
+    msgpack = pytest.importorskip('msgpack')
+    response = client.get('/small', headers={'Accept': 'application/msgpack'})
+    assert response.headers['content-type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.content) == SMALL
+
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+from conftest import ROOT
+
+
+def test_importing_the_api_is_lazy(tmp_path):
+    '''Importar a API não abre arquivos nem carrega pandas, numpy ou o SDK do Gemini'''
+    env = dict(os.environ, LLM_CACHE_PATH=str(tmp_path / 'llm_cache.sqlite'),
+               SUMMARY_STORE_PATH=str(tmp_path / 'summaries.sqlite'),
+               EVENT_STORE_PATH=str(tmp_path / 'event_store'),
+               CATALOG_PATH=str(tmp_path / 'catalog.json'),
+               SPATIAL_CACHE_DIR=str(tmp_path / 'spatial_cache'))
+    code = ('import sys, main; '
+            "print(sorted(m for m in ('pandas', 'numpy', 'pyarrow', 'google.genai') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.join(ROOT, 'api'), env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
+    assert os.listdir(tmp_path) == []
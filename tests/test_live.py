@@ -0,0 +1,126 @@
+import asyncio
+import pandas as pd
+import pytest
+import utils.live as live_module
+from utils.live import LiveMatch
+from utils.player_stats import STAT_SPECS, compute_player_counters
+
+
+def event(index, team, player, event_type, minute=1, period=1, **columns):
+    row = {'index': index, 'period': period, 'minute': minute, 'second': 0,
+           'team': team, 'player': player, 'type': event_type, 'x': 60.0, 'y': 40.0}
+    row.update(columns)
+    return row
+
+
+def match_events() -> list:
+    '''Partida curta com passes, chutes, faltas e gols no tempo normal e nos pênaltis'''
+    return [
+        event(1, 'Brasil', None, 'Starting XI'),
+        event(2, 'Argentina', None, 'Starting XI'),
+        event(3, 'Brasil', 'Ana', 'Pass', pass_recipient='Bia', end_x=70.0, end_y=30.0),
+        event(4, 'Brasil', 'Bia', 'Pass', minute=5, pass_outcome='Incomplete', end_x=90.0, end_y=20.0),
+        event(5, 'Argentina', 'Carla', 'Ball Recovery', minute=6),
+        event(6, 'Argentina', 'Carla', 'Foul Committed', minute=10, foul_committed_card='Yellow Card'),
+        event(7, 'Brasil', 'Bia', 'Foul Won', minute=10),
+        event(8, 'Brasil', 'Ana', 'Pass', minute=20, pass_recipient='Bia', pass_goal_assist=True,
+              end_x=110.0, end_y=40.0),
+        event(9, 'Brasil', 'Bia', 'Shot', minute=20, shot_outcome='Goal', shot_type='Open Play'),
+        event(10, 'Argentina', 'Carla', 'Shot', minute=70, period=2, shot_outcome='Goal', shot_type='Open Play'),
+        event(11, 'Argentina', 'Dora', 'Shot', minute=120, period=5, shot_outcome='Goal', shot_type='Penalty'),
+        event(12, 'Brasil', 'Ana', 'Shot', minute=120, period=5, shot_outcome='Saved', shot_type='Penalty'),
+        event(13, 'Argentina', 'Carla', 'Shot', minute=121, period=5, shot_outcome='Goal', shot_type='Penalty'),
+    ]
+
+
+def ingest_all(events: list) -> LiveMatch:
+    live = LiveMatch(1)
+    for row in events:
+        live.ingest(row)
+    return live
+
+
+def test_counters_match_batch_computation():
+    events = match_events()
+    live = ingest_all(events)
+    batch = compute_player_counters(pd.DataFrame(events))
+    assert set(live.player_stats) == set(batch.index)
+    for player in batch.index:
+        for name in STAT_SPECS:
+            assert live.player_stats[player][name] == int(batch.loc[player, name]), (player, name)
+        assert live.player_stats[player]['minutes_played'] == int(batch.loc[player, 'minutes_played'])
+
+
+def test_roster_and_passes():
+    live = ingest_all(match_events())
+    assert live.roster() == {'home_team': 'Brasil', 'away_team': 'Argentina',
+                             'home_players': ['Ana', 'Bia'], 'away_players': ['Carla', 'Dora']}
+    assert live.player_passes('Ana')['completed'] == [True, True]
+    assert live.player_passes('Bia')['completed'] == [False]
+    assert live.pass_links == {'Ana': {'Bia': 2}}
+
+
+def test_repeated_events_are_ignored():
+    events = match_events()
+    live = ingest_all(events)
+    seq = live.seq
+    assert live.ingest(events[4]) is None
+    assert live.seq == seq
+    assert live.player_stats['Carla']['ball_recoveries'] == 1
+
+
+def test_shootout_goals_are_kept_out_of_the_score():
+    live = ingest_all(match_events())
+    assert live.score == {'Brasil': 1, 'Argentina': 1}
+    assert live.shootout == {'Brasil': 0, 'Argentina': 2}
+    assert live.snapshot()['shootout'] == {'Brasil': 0, 'Argentina': 2}
+
+
+def test_delta_reports_changes():
+    live = LiveMatch(1)
+    events = match_events()
+    for row in events[:8]:
+        live.ingest(row)
+    delta = live.ingest(events[8])
+    assert delta['score'] == {'Brasil': 1, 'Argentina': 0}
+    assert delta['player_stats']['Bia']['goals'] == 1
+    assert delta['team_stats']['Brasil']['shots'] == 1
+
+
+def test_encode_uses_ingested_rows():
+    live = ingest_all(match_events())
+    encoded = live.encode()
+    assert list(encoded.sections) == ['lineups', 'player_stats', 'events', 'legend']
+    assert encoded.dropped_events == 0
+
+
+def test_lagging_subscriber_gets_a_new_snapshot(monkeypatch):
+    monkeypatch.setattr(live_module, 'LIVE_QUEUE_SIZE', 2)
+
+    async def scenario():
+        live = LiveMatch(1)
+        queue = live.subscribe()
+        for row in match_events():
+            live.ingest(row)
+        messages = [queue.get_nowait() for _ in range(queue.qsize())]
+        return live, messages
+
+    live, messages = asyncio.run(scenario())
+    assert any(message['type'] == 'snapshot' and message['seq'] > 0 for message in messages)
+    assert messages[-1]['seq'] == live.seq
+
+
+@pytest.mark.parametrize('speed', [0, 6000])
+def test_replay_finishes_and_notifies_subscribers(speed):
+    async def scenario():
+        live = LiveMatch(1)
+        task = asyncio.create_task(live.replay(match_events(), speed))
+        messages = [message async for message in live.updates()]
+        await task
+        return live, messages
+
+    live, messages = asyncio.run(scenario())
+    assert live.status == 'finished'
+    assert messages[0]['type'] == 'snapshot'
+    assert messages[-1] == {'type': 'end', 'status': 'finished', 'seq': live.seq}
+    assert [message['seq'] for message in messages if message['type'] == 'delta'] == list(range(1, 14))
@@ -0,0 +1,18 @@
+import os
+from utils.llm_cache import ResponseCache
+
+
+def test_sqlite_is_opened_on_first_use(tmp_path):
+    path = str(tmp_path / 'llm_cache.sqlite')
+    cache = ResponseCache(path, maxsize=4, ttl=60)
+    assert not os.path.exists(path)
+    assert cache.get('chave') is None
+    assert os.path.exists(path)
+
+
+def test_responses_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'llm_cache.sqlite')
+    ResponseCache(path, maxsize=4, ttl=60).set('chave', 'texto')
+    cache = ResponseCache(path, maxsize=4, ttl=60)
+    assert cache.get('chave') == 'texto'
+    assert cache.stats()['disk_hits'] == 1
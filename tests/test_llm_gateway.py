@@ -0,0 +1,186 @@
+import asyncio
+import gc
+import time
+import pytest
+from utils.concurrency import TokenBucket, LLM_CONCURRENCY
+from utils.llm_gateway import (LLMGateway, CircuitBreaker, LLMResult, LLMUnavailableError,
+                               LLMRateLimitError, LLMError, collect_gateways)
+
+
+class ScriptedBackend:
+    '''Backend que falha com os erros da lista, na ordem, e depois responde'''
+    name = 'scripted'
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = 0
+
+    @staticmethod
+    def min_cache_tokens(model):
+        return 0
+
+    async def generate(self, model, prompt, config, cached_content=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return LLMResult(f'ok {prompt}', 1, 1)
+
+    async def stream(self, model, prompt, config, result, cached_content=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        result.text += 'ok'
+        yield 'ok'
+
+
+def make_gateway(backend, max_retries=0, deadline=1.0, threshold=1, cooldown=0.05):
+    gateway = LLMGateway(backend, rate_per_minute=60000, burst=10, deadline=deadline,
+                         max_retries=max_retries)
+    gateway.breaker = CircuitBreaker(threshold, cooldown)
+    return gateway
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr('utils.llm_gateway.LLM_BACKOFF_BASE', 0.001)
+
+
+def test_retries_transient_errors():
+    async def run():
+        backend = ScriptedBackend([LLMRateLimitError('429'), LLMUnavailableError('503')])
+        gateway = make_gateway(backend, max_retries=3, threshold=5)
+        result = await gateway.generate('model', 'prompt', {})
+        return result, backend.calls, gateway.breaker.state
+
+    result, calls, state = asyncio.run(run())
+    assert result.text == 'ok prompt'
+    assert calls == 3
+    assert state == 'closed'
+
+
+def test_non_transient_error_does_not_open_breaker():
+    async def run():
+        gateway = make_gateway(ScriptedBackend([LLMError('400')]))
+        with pytest.raises(LLMError):
+            await gateway.generate('model', 'prompt', {})
+        return gateway.breaker.state
+
+    assert asyncio.run(run()) == 'closed'
+
+
+def test_breaker_opens_and_refuses():
+    async def run():
+        gateway = make_gateway(ScriptedBackend([LLMUnavailableError('503')]), cooldown=60)
+        with pytest.raises(LLMUnavailableError):
+            await gateway.generate('model', 'prompt', {})
+        with pytest.raises(LLMUnavailableError) as refused:
+            await gateway.generate('model', 'prompt', {})
+        return gateway, refused.value
+
+    gateway, refused = asyncio.run(run())
+    assert gateway.breaker.state == 'open'
+    assert gateway.backend.calls == 1
+    assert refused.headers['Retry-After']
+
+
+def test_breaker_recovers_after_half_open_trial_times_out_in_rate_limiter():
+    async def run():
+        backend = ScriptedBackend([LLMUnavailableError('503')])
+        gateway = make_gateway(backend, deadline=0.1)
+        with pytest.raises(LLMUnavailableError):
+            await gateway.generate('model', 'prompt', {})
+        assert gateway.breaker.state == 'open'
+
+        # Meio aberto, com o limitador sem fichas: a chamada de teste esgota o prazo na fila
+        await asyncio.sleep(0.06)
+        assert gateway.breaker.state == 'half_open'
+        gateway.limiter = TokenBucket(6, capacity=1)
+        gateway.limiter.tokens = 0
+        with pytest.raises(LLMRateLimitError):
+            await gateway.generate('model', 'prompt', {})
+        assert not gateway.breaker.trial
+
+        # Com fichas de novo, a chamada de teste passa e fecha o circuito
+        gateway.limiter = TokenBucket(60000, capacity=10)
+        result = await gateway.generate('model', 'prompt', {})
+        return gateway, result
+
+    gateway, result = asyncio.run(run())
+    assert result.text == 'ok prompt'
+    assert gateway.breaker.state == 'closed'
+
+
+def test_half_open_trial_released_when_cancelled_in_rate_limiter():
+    async def run():
+        gateway = make_gateway(ScriptedBackend([LLMUnavailableError('503')]), deadline=5)
+        with pytest.raises(LLMUnavailableError):
+            await gateway.generate('model', 'prompt', {})
+        await asyncio.sleep(0.06)
+        gateway.limiter = TokenBucket(6, capacity=1)
+        gateway.limiter.tokens = 0
+        task = asyncio.ensure_future(gateway.generate('model', 'prompt', {}))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return gateway.breaker
+
+    breaker = asyncio.run(run())
+    assert breaker.state == 'half_open'
+    assert not breaker.trial
+
+
+def test_stream_retries_before_first_chunk():
+    async def run():
+        gateway = make_gateway(ScriptedBackend([LLMUnavailableError('503')]), max_retries=1, threshold=5)
+        result = LLMResult('')
+        chunks = [chunk async for chunk in gateway.stream('model', 'prompt', {}, result)]
+        return chunks, result
+
+    chunks, result = asyncio.run(run())
+    assert chunks == ['ok']
+    assert result.text == 'ok'
+
+
+def test_breaker_half_open_after_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.01)
+    breaker.failure()
+    assert breaker.state == 'closed'
+    breaker.failure()
+    assert breaker.state == 'open'
+    time.sleep(0.02)
+    breaker.check()
+    assert breaker.trial
+    with pytest.raises(LLMUnavailableError):
+        breaker.check()
+    breaker.success()
+    assert breaker.state == 'closed'
+
+
+class SlowBackend(ScriptedBackend):
+    async def generate(self, model, prompt, config, cached_content=None):
+        await asyncio.sleep(0.01)
+        return await super().generate(model, prompt, config, cached_content)
+
+
+def test_concurrency_limit_works_in_every_event_loop():
+    gateway = make_gateway(SlowBackend())
+
+    async def run():
+        # Mais chamadas que o limite, para que as excedentes esperem no semáforo
+        results = await asyncio.gather(*(gateway.generate('model', str(i), {})
+                                         for i in range(LLM_CONCURRENCY + 2)))
+        return [result.text for result in results]
+
+    expected = [f'ok {i}' for i in range(LLM_CONCURRENCY + 2)]
+    assert asyncio.run(run()) == expected
+    assert asyncio.run(run()) == expected
+
+
+def test_discarded_gateways_leave_the_metrics():
+    gateway = make_gateway(ScriptedBackend())
+    assert gateway in LLMGateway.instances
+    before = len(collect_gateways())
+    del gateway
+    gc.collect()
+    assert len(collect_gateways()) == before - 2
@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+from main import app, UNMATCHED_PATH
+from utils.metrics import MetricsRegistry
+
+
+def test_label_values_are_escaped():
+    metrics = MetricsRegistry()
+    metrics.inc('llm_errors_total', error='Erro "grave"\nem C:\\tmp')
+    assert 'llm_errors_total{error="Erro \\"grave\\"\\nem C:\\\\tmp"} 1' in metrics.render()
+
+
+def test_unmatched_paths_share_one_series():
+    client = TestClient(app)
+    series = f'http_requests_total{{method="GET",path="{UNMATCHED_PATH}",status="404"}} '
+
+    def unmatched_count() -> float:
+        lines = [line for line in client.get('/metrics').text.splitlines() if line.startswith(series)]
+        return float(lines[0][len(series):]) if lines else 0
+
+    before = unmatched_count()
+    for path in ('/nao-existe/1', '/nao-existe/2', '/nao-existe/3'):
+        assert client.get(path).status_code == 404
+    assert unmatched_count() == before + 3
+    assert 'nao-existe' not in client.get('/metrics').text
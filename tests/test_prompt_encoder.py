@@ -0,0 +1,48 @@
+import pytest
+from utils.prompt_encoder import fit_rows, estimate_tokens, EVENT_HEADER
+
+ROWS = [f'{minute},T1,P{minute % 11},Pass,60,40,70,30' for minute in range(90)]
+PRIORITY = [minute % 30 == 0 for minute in range(90)]
+
+
+def test_rows_within_budget_are_kept():
+    text, dropped = fit_rows(ROWS, PRIORITY, 10000)
+    assert dropped == 0
+    assert text.split('\n') == [EVENT_HEADER] + ROWS
+
+
+@pytest.mark.parametrize('budget', [0, -10, 1])
+def test_no_budget_keeps_only_the_header(budget):
+    assert fit_rows(ROWS, PRIORITY, budget) == (EVENT_HEADER, len(ROWS))
+
+
+def test_reduced_budget_keeps_priority_rows():
+    budget = estimate_tokens('\n'.join([EVENT_HEADER] + ROWS)) // 2
+    text, dropped = fit_rows(ROWS, PRIORITY, budget)
+    kept = text.split('\n')[1:]
+    assert estimate_tokens(text) <= budget
+    assert dropped == len(ROWS) - len(kept) > 0
+    assert all(row in kept for row, priority in zip(ROWS, PRIORITY) if priority)
+
+
+def test_late_priority_rows_survive_a_tight_budget():
+    rows = [f'{minute // 40},T1,P{minute % 11},Pass,60.5,40.5,70.5,30.5' for minute in range(3600)]
+    is_priority = [False] * len(rows)
+    for position in (3590, 3595, 3599):
+        rows[position] = f'{position // 40},T1,P1,Shot,110.0,40.0,120.0,38.0'
+        is_priority[position] = True
+    budget = 300
+    text, dropped = fit_rows(rows, is_priority, budget)
+    kept = text.split('\n')[1:]
+    assert estimate_tokens(text) <= budget
+    assert [rows[position] for position in (3590, 3595, 3599)] == [row for row in kept if ',Shot,' in row]
+    assert dropped == len(rows) - len(kept)
+
+
+def test_priority_rows_are_truncated_only_as_a_last_resort():
+    rows = [f'{minute},T1,P1,Shot,110.0,40.0,120.0,38.0' for minute in range(200)]
+    text, dropped = fit_rows(rows, [True] * len(rows), 100)
+    kept = text.split('\n')[1:]
+    assert estimate_tokens(text) <= 100
+    assert kept == rows[:len(kept)]
+    assert dropped == len(rows) - len(kept) > 0
@@ -0,0 +1,61 @@
+import asyncio
+import pandas as pd
+import pytest
+import utils.season_stats as season_stats
+from utils.player_stats import STAT_SPECS
+from utils.season_stats import aggregate_player_season, aggregate_cache
+
+PLAYER = 'Jogador Teste'
+
+
+def match_counters(match_id: int) -> pd.DataFrame:
+    '''Contadores de uma partida em que o jogador tem match_id passes'''
+    row = dict.fromkeys(STAT_SPECS, 0)
+    row.update(team='Time', minutes_played=90, passes_attempted=match_id, passes_completed=match_id)
+    return pd.DataFrame([row], index=pd.Index([PLAYER], name='player'))
+
+
+@pytest.fixture(autouse=True)
+def fake_partials(monkeypatch):
+    '''Contadores por partida sem eventos, com uma espera para que as requisições se sobreponham'''
+    async def load_partials(match_ids):
+        await asyncio.sleep(0.01)
+        return {match_id: match_counters(match_id) for match_id in match_ids}
+
+    monkeypatch.setattr(season_stats, 'load_partials', load_partials)
+    aggregate_cache.invalidate()
+    yield
+    aggregate_cache.invalidate()
+
+
+def test_aggregate_sums_matches():
+    aggregate = asyncio.run(aggregate_player_season(PLAYER, [1, 2, 3])).to_dict()
+    assert aggregate['matches_played'] == 3
+    assert aggregate['totals']['passes_attempted'] == 6
+    assert aggregate['rates']['pass_completion'] == 1.0
+
+
+def test_cached_aggregate_is_extended():
+    asyncio.run(aggregate_player_season(PLAYER, [1, 2]))
+    aggregate = asyncio.run(aggregate_player_season(PLAYER, [1, 2, 3]))
+    assert sorted(aggregate.per_match) == [1, 2, 3]
+    assert aggregate.totals['passes_attempted'] == 6
+
+
+def test_concurrent_requests_only_see_their_matches():
+    async def run():
+        await aggregate_player_season(PLAYER, [1])
+        return await asyncio.gather(aggregate_player_season(PLAYER, [1, 2]),
+                                    aggregate_player_season(PLAYER, [1, 3]))
+
+    first, second = asyncio.run(run())
+    assert sorted(first.per_match) == [1, 2]
+    assert sorted(second.per_match) == [1, 3]
+    assert first.totals['passes_attempted'] == 3
+    assert second.totals['passes_attempted'] == 4
+
+
+def test_smaller_request_rebuilds_aggregate():
+    asyncio.run(aggregate_player_season(PLAYER, [1, 2, 3]))
+    aggregate = asyncio.run(aggregate_player_season(PLAYER, [2]))
+    assert sorted(aggregate.per_match) == [2]
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight('test_shared')
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'resultado'
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do('chave', work) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ['resultado'] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {'in_flight': 0, 'waiters': 0}
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight('test_keys')
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do(key, lambda key=key: work(key)) for key in 'abab'))
+
+    assert asyncio.run(scenario()) == list('abab')
+    assert sorted(calls) == ['a', 'b']
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight('test_sequential')
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        return [await flight.do('chave', work), await flight.do('chave', work)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight('test_error')
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('falhou')
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do('chave', failing) for _ in range(3)),
+                                       return_exceptions=True)
+        await asyncio.gather(flight.do('chave', failing), return_exceptions=True)
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    flight = SingleFlight('test_cancel')
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return 'resultado'
+
+    async def scenario():
+        first = asyncio.create_task(flight.do('chave', work))
+        second = asyncio.create_task(flight.do('chave', work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert flight.stats() == {'in_flight': 1, 'waiters': 1}
+        return await second
+
+    assert asyncio.run(scenario()) == 'resultado'
+    assert flight.stats() == {'in_flight': 0, 'waiters': 0}